@@ -0,0 +1,111 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from scripts.constants import Columns
+
+PRODUCT_CATEGORIES = [
+    "airtime",
+    "data_bundles",
+    "financial_services",
+    "movies",
+    "other",
+    "ticket",
+    "transport",
+    "tv",
+    "utility_bill",
+]
+
+
+def make_transactions(n_rows: int, n_customers: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Builds a synthetic raw transaction dataframe shaped like the Xente extract.
+    :param n_rows: Number of transactions
+    :param n_customers: Number of distinct customers
+    :param seed: Random seed
+    :return: DataFrame with the raw Columns
+    :rtype: pd.DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    amounts = rng.choice([-5000.0, -500.0, 500.0, 1000.0, 2000.0, 5000.0, 10000.0], size=n_rows)
+    start = pd.Timestamp("2018-11-15", tz="UTC")
+    seconds = rng.integers(0, 90 * 24 * 3600, size=n_rows)
+
+    return pd.DataFrame(
+        {
+            Columns.TransactionId.value: np.char.add("TransactionId_", np.arange(n_rows).astype(str)),
+            Columns.BatchId.value: np.char.add("BatchId_", rng.integers(0, n_rows // 2 + 1, size=n_rows).astype(str)),
+            Columns.AccountId.value: np.char.add("AccountId_", rng.integers(0, n_customers, size=n_rows).astype(str)),
+            Columns.SubscriptionId.value: np.char.add(
+                "SubscriptionId_", rng.integers(0, n_customers, size=n_rows).astype(str)
+            ),
+            Columns.CustomerId.value: np.char.add("CustomerId_", rng.integers(0, n_customers, size=n_rows).astype(str)),
+            Columns.CurrencyCode.value: "UGX",
+            Columns.CountryCode.value: 256,
+            Columns.ProviderId.value: np.char.add("ProviderId_", rng.integers(1, 7, size=n_rows).astype(str)),
+            Columns.ProductId.value: np.char.add("ProductId_", rng.integers(1, 28, size=n_rows).astype(str)),
+            Columns.ProductCategory.value: rng.choice(PRODUCT_CATEGORIES, size=n_rows),
+            Columns.ChannelId.value: np.char.add("ChannelId_", rng.integers(1, 6, size=n_rows).astype(str)),
+            Columns.Amount.value: amounts,
+            Columns.Value.value: np.abs(amounts).astype(np.int64),
+            Columns.TransactionStartTime.value: (start + pd.to_timedelta(seconds, unit="s")).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            Columns.PricingStrategy.value: rng.integers(0, 5, size=n_rows),
+            Columns.FraudResult.value: (rng.random(n_rows) < 0.002).astype(np.int64),
+        }
+    )
+
+
+def make_time_featured_transactions(n_rows: int, n_customers: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Builds a lean synthetic frame holding only what CustomAggregator reads, i.e. the output of
+    TimeFeatureExtractor. String columns reference a small pool of objects so that tens of
+    millions of rows fit in memory; TransactionId is an integer since only its count is used.
+    """
+    rng = np.random.default_rng(seed)
+    customers = np.array([f"CustomerId_{i}" for i in range(n_customers)], dtype=object)
+    channels = np.array([f"ChannelId_{i}" for i in range(1, 6)], dtype=object)
+
+    return pd.DataFrame(
+        {
+            Columns.TransactionId.value: np.arange(n_rows),
+            Columns.CustomerId.value: customers[rng.integers(0, n_customers, size=n_rows)],
+            Columns.Amount.value: rng.choice([-5000.0, -500.0, 500.0, 1000.0, 2000.0, 5000.0], size=n_rows),
+            Columns.ProductCategory.value: np.array(PRODUCT_CATEGORIES, dtype=object)[
+                rng.integers(0, len(PRODUCT_CATEGORIES), size=n_rows)
+            ],
+            Columns.ChannelId.value: channels[rng.integers(0, len(channels), size=n_rows)],
+            "TransactionHour": rng.integers(0, 24, size=n_rows).astype(np.int32),
+            "TransactionDay": rng.integers(1, 32, size=n_rows).astype(np.int32),
+            "TransactionMonth": rng.integers(1, 13, size=n_rows).astype(np.int32),
+            "TransactionYear": rng.choice([2018, 2019], size=n_rows).astype(np.int32),
+        }
+    )
+
+
+def timed(func, *args, repeat: int = 3, **kwargs):
+    """
+    Runs func several times and returns (best wall time in seconds, last result).
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def traced(func, *args, **kwargs):
+    """
+    Runs func once under tracemalloc and returns (wall time in seconds, peak traced MiB, result).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, result
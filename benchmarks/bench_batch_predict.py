@@ -0,0 +1,93 @@
+"""
+Benchmark: scoring throughput of the FastAPI service, one /predict request per customer
+vs a single /predict/batch request (records and columnar payloads).
+
+A logistic regression is fitted on synthetic WoE features and registered as the Production model
+in a throwaway MLflow registry, so the api loads and scores a real pyfunc model.
+
+Usage: python -m benchmarks.bench_batch_predict [--rows 500] [--batch-rows 100000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import warnings
+
+import mlflow
+import mlflow.sklearn
+import numpy as np
+import pandas as pd
+from mlflow.tracking import MlflowClient
+from sklearn.linear_model import LogisticRegression
+
+from benchmarks._synthetic import timed
+from scripts.constants import FEATURE_ORDER, MODEL_NAME, MODEL_STAGE
+
+
+def register_model(tracking_dir: str, feature_order: list, seed: int = 42, model=None, n_rows: int = 5_000):
+    """
+    Fits a model (a logistic regression by default) on WoE-like features and promotes it to MODEL_STAGE
+    in a local registry.
+    """
+    mlflow.set_tracking_uri(f"file:{os.path.join(tracking_dir, 'mlruns')}")
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(0, 1, size=(n_rows, len(feature_order))), columns=feature_order)
+    y = (X.to_numpy() @ np.linspace(-1, 1, len(feature_order)) + rng.normal(0, 1, len(X)) > 0).astype(int)
+    model = (model if model is not None else LogisticRegression()).fit(X, y)
+
+    mlflow.set_experiment(MODEL_NAME)
+    with mlflow.start_run():
+        info = mlflow.sklearn.log_model(
+            model,
+            name="model",
+            input_example=X.head(2),
+            registered_model_name=MODEL_NAME,
+            pyfunc_predict_fn="predict_proba",
+        )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        MlflowClient().transition_model_version_stage(MODEL_NAME, info.registered_model_version, MODEL_STAGE)
+    os.environ["MLFLOW_TRACKING_URI"] = mlflow.get_tracking_uri()
+
+
+def make_records(n_rows: int, feature_order: list, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 1, size=(n_rows, len(feature_order))).round(6)
+    return [dict(zip(feature_order, row)) for row in values.tolist()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500, help="customers scored through /predict")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="customers scored through /predict/batch")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tracking_dir:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            register_model(tracking_dir, FEATURE_ORDER)
+            from fastapi.testclient import TestClient
+
+            from src.api.main import app  # loads the Production model from the registry above
+
+        client = TestClient(app)
+        records = make_records(args.batch_rows, FEATURE_ORDER)
+        columns = {col: [record[col] for record in records] for col in FEATURE_ORDER}
+
+        with contextlib.redirect_stdout(io.StringIO()):  # /predict prints its input frame
+            seconds, single = timed(
+                lambda: [client.post("/predict", json=record).json() for record in records[: args.rows]]
+            )
+        print(f"/predict        {args.rows:>8} rows  {seconds:7.2f}s  {args.rows / seconds:>10,.0f} rows/s")
+
+        for name, payload in (("records", {"records": records}), ("columns", {"columns": columns})):
+            seconds, response = timed(lambda: client.post("/predict/batch", json=payload).json())
+            rate = args.batch_rows / seconds
+            print(f"/predict/batch  {args.batch_rows:>8} rows  {seconds:7.2f}s  {rate:>10,.0f} rows/s ({name})")
+            expected = [row["risk_probability"] for row in single]
+            assert np.allclose(response["risk_probability"][: args.rows], expected)
+
+
+if __name__ == "__main__":
+    main()
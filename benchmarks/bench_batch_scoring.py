@@ -0,0 +1,91 @@
+"""
+Benchmark: offline scoring of a customer feature file, read whole vs streamed through src.batch_scorer.
+
+The feature file holds --rows customers (CustomerId and the FEATURE_ORDER columns, WoE scale). The model is a
+random forest placed in a throwaway model cache as a native scorer and a pyfunc model, as the api and the pool
+workers load it. Every run scores with the model chunk_model picks for its batch size (the native scorer, or
+the pyfunc model for batches above NATIVE_TREE_MAX_BATCH_ROWS rows); --native-only scores chunks with the native
+scorer to compare. The whole-file baseline reads the file with pandas, scores it with one model call and writes
+the csv, the streamed runs use BatchScorer in this process and across a pool. Peak memory is the tracemalloc peak of
+this process, so it does not count what the pool workers allocate.
+
+Usage: python -m benchmarks.bench_batch_scoring [--rows 500000] [--chunksize 50000] [--workers 2]
+    [--native-only]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+import mlflow.sklearn
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks._synthetic import traced
+from scripts.constants import FEATURE_ORDER, MODEL_NAME, NATIVE_SCORER_ARTIFACT_PATH, Columns
+from src.api.model_loader import PYFUNC_DIR_NAME, load_model_version, score_matrix
+from src.batch_scorer import BatchScorer, chunk_model
+from src.registry.native_scorer import compile_native_scorer
+
+
+def score_whole_file(loaded, input_path, output_path):
+    df = pd.read_parquet(input_path)
+    risk_probability = score_matrix(loaded, df[FEATURE_ORDER].to_numpy(dtype=np.float64))
+    pd.DataFrame(
+        {
+            Columns.CustomerId.value: df[Columns.CustomerId.value],
+            "risk_probability": risk_probability,
+            "is_high_risk": (risk_probability >= 0.5).astype(np.int8),
+        }
+    ).to_csv(output_path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--native-only", action="store_true", help="score every chunk with the native scorer")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(0, 1, size=(20_000, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+    y = (X.to_numpy() @ np.linspace(-1, 1, len(FEATURE_ORDER)) + rng.normal(0, 1, len(X)) > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=100, min_samples_leaf=20, random_state=0).fit(X, y)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["MODEL_CACHE_DIR"] = os.path.join(tmp_dir, "model_cache")
+        version_dir = os.path.join(tmp_dir, "model_cache", MODEL_NAME, "1")
+        compile_native_scorer(model, predict_fn="predict_proba").save(
+            os.path.join(version_dir, NATIVE_SCORER_ARTIFACT_PATH)
+        )
+        mlflow.sklearn.save_model(model, os.path.join(version_dir, PYFUNC_DIR_NAME), pyfunc_predict_fn="predict_proba")
+        loaded = load_model_version("1")
+
+        input_path = os.path.join(tmp_dir, "customers.parquet")
+        features = pd.DataFrame(rng.normal(0, 1, size=(args.rows, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+        features.insert(0, Columns.CustomerId.value, [f"CustomerId_{i}" for i in range(args.rows)])
+        features.to_parquet(input_path, row_group_size=args.chunksize)
+        del features
+        scored_by = "native scorer" if args.native_only else "pyfunc model"
+        print(f"{args.rows:,} customers, random forest {scored_by}, chunks of {args.chunksize:,} rows")
+
+        whole_file_model = loaded if args.native_only else chunk_model(loaded, args.rows)
+        runs = {"whole file": lambda output: score_whole_file(whole_file_model, input_path, output)}
+        for workers in sorted({1, args.workers}):
+            scorer = BatchScorer(loaded, chunksize=args.chunksize, workers=workers, channel_woe={})
+            if args.native_only:
+                scorer.loaded = loaded  # pool workers load the native scorer too
+            runs[f"streamed, {workers} worker(s)"] = lambda output, scorer=scorer: scorer.score_file(input_path, output)
+        for name, run in runs.items():
+            output = os.path.join(tmp_dir, f"scores-{len(name)}.csv")
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds, peak, _ = traced(run, output)
+            print(f"{name:<22} {seconds:7.2f}s  {args.rows / seconds:>10,.0f} rows/s  peak {peak:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
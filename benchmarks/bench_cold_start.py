@@ -0,0 +1,89 @@
+"""
+Benchmark: api cold start, seconds from launching uvicorn until /health/live and /health/ready answer 200,
+for eager loading with an empty artifact cache, eager and background loading with a warm cache
+and background loading of a pinned MODEL_VERSION.
+
+The served model is a logistic regression registered in a throwaway MLflow registry and promoted with its
+native scorer.
+
+Usage: python -m benchmarks.bench_cold_start [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_batch_predict import register_model
+from scripts.constants import FEATURE_ORDER, MODEL_NAME
+from src.registry.model_registry import ModelRegistryManager
+
+PORT = 8766
+
+
+def cold_start(load_mode: str, cache_dir: str, version: str = None) -> tuple:
+    """Starts the api and returns (seconds until live, seconds until ready, timings reported by /health/ready)."""
+    env = dict(os.environ, PYTHONWARNINGS="ignore", MODEL_LOAD_MODE=load_mode, MODEL_CACHE_DIR=cache_dir)
+    if version is not None:
+        env["MODEL_VERSION"] = version
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    live = None
+    try:
+        while True:
+            with contextlib.suppress(httpx.TransportError):
+                if live is None and httpx.get(f"http://127.0.0.1:{PORT}/health/live").status_code == 200:
+                    live = time.perf_counter() - start
+                response = httpx.get(f"http://127.0.0.1:{PORT}/health/ready")
+                if response.status_code == 200:
+                    return live, time.perf_counter() - start, response.json()["timings"]
+            if server.poll() is not None:
+                raise RuntimeError("api server exited")
+            time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tracking_dir:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            register_model(tracking_dir, FEATURE_ORDER)
+            manager = ModelRegistryManager(MODEL_NAME)
+            manager.export_native_scorer(manager.get_all_versions()[0])
+        cache_dir = os.path.join(tracking_dir, "model_cache")
+
+        for name, load_mode, warm, version in (
+            ("eager, empty cache", "eager", False, None),
+            ("eager, warm cache", "eager", True, None),
+            ("background, warm cache", "background", True, None),
+            ("background, pinned", "background", True, "1"),
+        ):
+            results = []
+            for _ in range(args.repeat):
+                if not warm:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                results.append(cold_start(load_mode, cache_dir, version))
+            live, ready, timings = min(results, key=lambda result: result[1])
+            steps = "  ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items())
+            print(f"{name:<24} live {live:5.2f}s  ready {ready:5.2f}s  ({steps})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: CustomAggregator single-pass engine vs two groupbys plus an outer merge.
+
+Usage: python -m benchmarks.bench_customer_aggregation [--rows 10000000] [--customers 500000]
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks._synthetic import make_time_featured_transactions, traced
+from scripts.constants import Columns, Aggregated_Columns, Default_Enums
+from src.aggregation import most_common_by_group
+from src.data_pipeline import CustomAggregator
+
+
+def two_groupby_merge(X: pd.DataFrame) -> pd.DataFrame:
+    """CustomAggregator.transform before the aggregation engine, kept as the baseline."""
+    working_df = X.copy()
+    numeric_aggregated_df = (
+        working_df.groupby(Columns.CustomerId.value)
+        .agg(
+            **{
+                Aggregated_Columns.TotalTransactionAmount.value: (Columns.Amount.value, "sum"),
+                Aggregated_Columns.AverageTransactionAmount.value: (Columns.Amount.value, "mean"),
+                Aggregated_Columns.TransactionCount.value: (Columns.TransactionId.value, "count"),
+                Aggregated_Columns.TransactionAmountSTD.value: (Columns.Amount.value, "std"),
+                Aggregated_Columns.AverageTransactionHour.value: (Aggregated_Columns.TransactionHour.value, "mean"),
+                Aggregated_Columns.ActiveYearsCount.value: (Aggregated_Columns.TransactionYear.value, "nunique"),
+            }
+        )
+        .reset_index()
+    )
+    codes, customers = pd.factorize(working_df[Columns.CustomerId.value], sort=True)
+    for position, (out_col, source) in enumerate(
+        [
+            (Aggregated_Columns.MostCommonTransactionDay.value, Aggregated_Columns.TransactionDay.value),
+            (Aggregated_Columns.MostCommonTransactionMonth.value, Aggregated_Columns.TransactionMonth.value),
+        ]
+    ):
+        numeric_aggregated_df.insert(
+            6 + position, out_col, most_common_by_group(codes, len(customers), working_df[source])
+        )
+    numeric_aggregated_df[Aggregated_Columns.TransactionAmountSTD.value] = numeric_aggregated_df[
+        Aggregated_Columns.TransactionAmountSTD.value
+    ].fillna(0)
+
+    categorical_aggregated_df = (
+        working_df.groupby(Columns.CustomerId.value)
+        .agg(**{Aggregated_Columns.UniqueProductCategoryCount.value: (Columns.ProductCategory.value, "nunique")})
+        .reset_index()
+    )
+    categorical_aggregated_df.insert(
+        1,
+        Aggregated_Columns.MostCommonProductCategory.value,
+        most_common_by_group(
+            codes, len(customers), working_df[Columns.ProductCategory.value], Default_Enums.UNKNOWN.value
+        ),
+    )
+    categorical_aggregated_df[Aggregated_Columns.MostCommonChannel.value] = most_common_by_group(
+        codes, len(customers), working_df[Columns.ChannelId.value], Default_Enums.UNKNOWN.value
+    )
+    return pd.merge(numeric_aggregated_df, categorical_aggregated_df, on=Columns.CustomerId.value, how="outer")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--customers", type=int, default=500_000)
+    args = parser.parse_args()
+
+    df = make_time_featured_transactions(args.rows, args.customers)
+    print(f"{args.rows:,} transactions, {args.customers:,} customers, input {df.memory_usage().sum() / 2**20:,.0f} MiB")
+    print(f"{'implementation':<26}{'wall (s)':>10}{'peak (MiB)':>12}")
+
+    baseline_time, baseline_peak, expected = traced(two_groupby_merge, df)
+    print(f"{'two groupbys + merge':<26}{baseline_time:>10.2f}{baseline_peak:>12,.0f}")
+
+    engine_time, engine_peak, result = traced(CustomAggregator().transform, df)
+    print(f"{'aggregation engine':<26}{engine_time:>10.2f}{engine_peak:>12,.0f}")
+
+    pd.testing.assert_frame_equal(result, expected)
+    print(f"speedup {baseline_time / engine_time:.1f}x, peak memory {baseline_peak / engine_peak:.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: evaluating a fitted model the previous way vs with the evaluation engine of ExperimentRunner.evaluate.
+
+The previous way calls predict and predict_proba (two inference passes), computes every metric with its own
+sklearn call, and then sweeps precision/recall/F1 over the thresholds of roc_curve to find the best-F1
+operating point. The engine runs predict_proba once and derives every metric and the threshold table from a
+single sort of the scores. The model is a random forest on a synthetic WoE-like frame with the FEATURE_ORDER columns.
+
+Usage: python -m benchmarks.bench_evaluation [--rows 200000] [--sweep 200]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score, roc_curve
+
+from benchmarks._synthetic import timed
+from scripts.constants import FEATURE_ORDER
+from src.training.experiment_runner import ExperimentRunner
+
+
+def previous_evaluate(model, X_test, y_test, n_thresholds: int) -> dict:
+    y_pred = model.predict(X_test)
+    y_prob = model.predict_proba(X_test)[:, 1]
+    metrics = {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "recall": recall_score(y_test, y_pred),
+        "f1": f1_score(y_test, y_pred),
+        "roc_auc": roc_auc_score(y_test, y_prob),
+    }
+    fpr, tpr, thresholds = roc_curve(y_test, y_prob)
+    metrics["ks"] = (tpr - fpr).max()
+    sweep = np.quantile(y_prob, np.linspace(0, 1, n_thresholds))
+    metrics["max_f1"] = max(f1_score(y_test, y_prob >= threshold) for threshold in sweep)
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000, help="test rows")
+    parser.add_argument("--sweep", type=int, default=200, help="thresholds swept by the previous way")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(0, 1, size=(args.rows + 20_000, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+    y = (X.to_numpy() @ np.linspace(-1, 1, len(FEATURE_ORDER)) + rng.normal(0, 1, len(X)) > 1).astype(int)
+    model = RandomForestClassifier(n_estimators=100, min_samples_leaf=5, random_state=0).fit(X[:20_000], y[:20_000])
+    X_test, y_test = X[20_000:], y[20_000:]
+
+    previous, metrics = timed(previous_evaluate, model, X_test, y_test, args.sweep)
+    runner = ExperimentRunner(model, "RandomForest")
+    engine, _ = timed(runner.evaluate, X_test, y_test)
+    print(f"{args.rows:,} test rows, random forest with 100 trees")
+    print(f"previous evaluate + {args.sweep}-threshold sweep {previous:8.2f}s   max f1 {metrics['max_f1']:.4f}")
+    print(
+        f"evaluation engine (every threshold) {engine:8.2f}s   max f1 {runner.threshold_table.loc['max_f1', 'f1']:.4f}"
+    )
+    print(f"roc_auc {metrics['roc_auc']:.6f} vs {runner.metrics['roc_auc']:.6f}")
+    print(f"ks      {metrics['ks']:.6f} vs {runner.metrics['ks']:.6f}")
+
+
+if __name__ == "__main__":
+    main()
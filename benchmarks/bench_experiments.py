@@ -0,0 +1,94 @@
+"""
+Benchmark: wall-clock time of the notebook's four experiments (logistic regression and random forest baselines,
+and a randomized search of each) run one after the other with TrainModels.run_experiment vs in parallel with
+TrainModels.run_experiments.
+
+The data is a synthetic WoE-like frame with the FEATURE_ORDER columns and a binary target. Both runs log to
+their own throwaway MLflow file store, so the times include logging and registering every model.
+
+Usage: python -m benchmarks.bench_experiments [--rows 50000] [--workers 4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import warnings
+
+import mlflow
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import RandomizedSearchCV
+
+from scripts.constants import FEATURE_ORDER, MODEL_NAME, TARGET_COL
+from src.training.experiment_runner import ExperimentRunner
+from src.training.train import TrainModels
+
+
+def make_runners() -> dict:
+    lr_search = RandomizedSearchCV(
+        LogisticRegression(max_iter=1000),
+        {"C": [0.001, 0.01, 0.1, 1, 10, 100], "penalty": ["l1", "l2"], "solver": ["liblinear"]},
+        n_iter=10,
+        scoring="roc_auc",
+        cv=5,
+        random_state=42,
+    )
+    rf_search = RandomizedSearchCV(
+        RandomForestClassifier(random_state=42),
+        {"n_estimators": [50, 100], "max_depth": [None, 5, 10], "min_samples_split": [2, 5, 10]},
+        n_iter=4,
+        scoring="roc_auc",
+        cv=3,
+        random_state=42,
+    )
+    return {
+        "LogisticRegression_Baseline": ExperimentRunner(LogisticRegression(max_iter=1000), "LogisticRegression"),
+        "RandomForest_Baseline": ExperimentRunner(RandomForestClassifier(random_state=42), "RandomForest"),
+        "LogisticRegression_Tuned": ExperimentRunner(LogisticRegression(), "LogisticRegression", lr_search),
+        "RandomForest_Tuned": ExperimentRunner(RandomForestClassifier(), "RandomForest", rf_search),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(0, 1, size=(args.rows, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+    logit = df.to_numpy() @ np.linspace(-1, 1, len(FEATURE_ORDER)) + rng.normal(0, 1, args.rows)
+    df[TARGET_COL] = (logit > 1).astype(int)
+    print(f"{args.rows:,} rows, {len(make_runners())} experiments, {os.cpu_count()} cores")
+
+    def sequential(trainer):
+        return {name: trainer.run_experiment(name, runner) for name, runner in make_runners().items()}
+
+    for name, run in (
+        ("sequential run_experiment", sequential),
+        (
+            f"run_experiments, {args.workers} workers",
+            lambda trainer: trainer.run_experiments(make_runners(), args.workers),
+        ),
+    ):
+        with tempfile.TemporaryDirectory() as tracking_dir:
+            trainer = TrainModels(df, target_col=TARGET_COL)
+            trainer.split_data()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                mlflow.set_tracking_uri(f"file:{tracking_dir}")
+                mlflow.set_experiment(MODEL_NAME)
+                start = time.perf_counter()
+                metrics = run(trainer)
+                seconds = time.perf_counter() - start
+        auc = "  ".join(f"{run_name} {m['roc_auc']:.4f}" for run_name, m in metrics.items())
+        print(f"{name:<28} {seconds:7.2f}s   roc_auc: {auc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: scoring a customer by CustomerId from the feature store vs computing its features on the request path.
+
+The first section builds a store from a synthetic transaction history and reports how long it takes to publish
+the store, open it (building the CustomerId index), upsert a refreshed batch of customers and look up one row.
+The second section, in the api, compares three ways of scoring one customer:
+- aggregating its transactions with the fitted DataPreprocessor, WoE-encoding them and calling /predict
+- calling /predict with features the caller already has
+- calling /predict/customer/{id}
+It then reports the rows per second of the /predict/customers bulk export.
+
+The model is a logistic regression with its native scorer, registered in a throwaway MLflow registry.
+
+Usage: python -m benchmarks.bench_feature_store [--rows 1000000] [--customers 100000] [--lookups 1000]
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from benchmarks._synthetic import make_transactions, timed
+from benchmarks.bench_batch_predict import register_model
+from scripts.constants import FEATURE_ORDER, MODEL_NAME, TARGET_COL, WOE_CANDIDATE_COLS, Columns
+from src.data_pipeline import DataPreprocessor
+from src.feature_store import CustomerFeatureStore
+from src.registry.model_registry import ModelRegistryManager
+from src.woe_transformer import WoeTransformer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="transactions of the history")
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=1_000, help="customers scored through each api path")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    raw_df = make_transactions(args.rows, args.customers)
+    history, batch = raw_df.iloc[: -args.rows // 100], raw_df.iloc[-args.rows // 100 :]
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(io.StringIO()):
+        preprocessor = DataPreprocessor(history).fit()
+        customer_df = preprocessor.transform(history).infer_objects()
+        rng = np.random.default_rng(0)
+        woe_df = customer_df[WOE_CANDIDATE_COLS].assign(**{TARGET_COL: rng.integers(0, 2, len(customer_df))})
+        woe_transformer = WoeTransformer(woe_df)
+        woe_transformer.fit_transform()
+        woe_transformer.get_iv_table()
+
+        store_dir, state_dir = os.path.join(tmp_dir, "store"), os.path.join(tmp_dir, "state")
+        preprocessor.refresh(history, state_dir=state_dir)
+        publish, store = timed(preprocessor.publish_features, history, woe_transformer, store_dir, repeat=1)
+        open_seconds, store = timed(CustomerFeatureStore.open, store_dir)
+        upsert, _ = timed(preprocessor.refresh_feature_store, batch, woe_transformer, state_dir, store_dir, repeat=1)
+        store = CustomerFeatureStore.open(store_dir)
+        customer_ids = rng.choice(store.customer_ids, size=args.lookups)
+        lookup, _ = timed(lambda: [store.row(customer_id) for customer_id in customer_ids])
+
+    print(f"feature store of {len(store):,} customers from {len(history):,} transactions")
+    print(
+        f"publish {publish:7.2f}s   open {open_seconds * 1e3:7.1f}ms   lookup {lookup / args.lookups * 1e6:6.2f}us/row"
+    )
+    print(
+        f"refresh + upsert of {batch[Columns.CustomerId.value].nunique():,} customers ({len(batch):,} transactions)"
+        f" {upsert:7.2f}s"
+    )
+
+    with tempfile.TemporaryDirectory() as tracking_dir, contextlib.redirect_stdout(io.StringIO()):
+        with contextlib.redirect_stderr(io.StringIO()):
+            register_model(tracking_dir, FEATURE_ORDER)
+            manager = ModelRegistryManager(MODEL_NAME)
+            manager.export_native_scorer(manager.get_all_versions()[0])
+        store_dir = os.path.join(tracking_dir, "store")
+        store = preprocessor.publish_features(history, woe_transformer, store_dir)
+        os.environ.update(
+            FEATURE_STORE_DIR=store_dir,
+            MODEL_CACHE_DIR=os.path.join(tracking_dir, "model_cache"),
+            MODEL_WATCH_INTERVAL="0",
+            PREDICT_MAX_BATCH_SIZE="1",
+        )
+        sys.modules.pop("src.api.main", None)
+        with contextlib.redirect_stderr(io.StringIO()):
+            api = importlib.import_module("src.api.main")
+        client = TestClient(api.app)
+
+        customer_ids = rng.choice(store.customer_ids, size=args.lookups)
+        transactions = {
+            customer_id: rows for customer_id, rows in history.groupby(Columns.CustomerId.value, observed=True)
+        }
+
+        def from_transactions(customer_id):
+            features = preprocessor.transform(transactions[customer_id])
+            row = woe_transformer.transform_to_woe_matrix(features, FEATURE_ORDER)[0]
+            return client.post("/predict", json=dict(zip(FEATURE_ORDER, row.tolist())))
+
+        paths = {
+            "aggregate + /predict": from_transactions,
+            "features + /predict": lambda customer_id: client.post(
+                "/predict", json=dict(zip(FEATURE_ORDER, store.row(customer_id).tolist()))
+            ),
+            "/predict/customer/{id}": lambda customer_id: client.get(f"/predict/customer/{customer_id}"),
+        }
+        results = {}
+        for name, path in paths.items():
+            results[name], _ = timed(lambda: [path(customer_id) for customer_id in customer_ids], repeat=1)
+        export, response = timed(lambda: client.get("/predict/customers"), repeat=1)
+
+    for name, seconds in results.items():
+        print(f"{name:<24} {seconds / args.lookups * 1e3:8.3f} ms/customer")
+    rows = len(response.text.splitlines()) - 1
+    print(f"/predict/customers export {rows:,} customers  {export:6.2f}s  {rows / export:>10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
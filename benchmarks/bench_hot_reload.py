@@ -0,0 +1,139 @@
+"""
+Load test: /predict throughput and latency while a new model version is promoted to Production.
+
+A uvicorn server polls a throwaway MLflow registry for the Production version. Concurrent async clients
+hit /predict for a fixed duration, and halfway through a second, already registered logistic regression
+is promoted. The results are reported per served model version, along with failed requests and the slowest
+request. A hot swap shows no failures and no latency spike around the promotion.
+
+Usage: python -m benchmarks.bench_hot_reload [--seconds 20] [--concurrency 32] [--watch-interval 0.5]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_batch_predict import make_records, register_model
+from scripts.constants import FEATURE_ORDER, MODEL_NAME
+from src.registry.model_registry import ModelRegistryManager
+
+PORT = 8767
+
+
+def register_versions(tracking_dir: str) -> ModelRegistryManager:
+    """
+    Registers two logistic regressions with their native scorers and moves the second one back to Staging,
+    so the benchmark only has to change its stage to promote it.
+    """
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        for seed in (42, 7):
+            register_model(tracking_dir, FEATURE_ORDER, seed=seed)
+        manager = ModelRegistryManager(MODEL_NAME)
+        for model_version in manager.get_all_versions():
+            manager.export_native_scorer(model_version)
+        manager.client.transition_model_version_stage(MODEL_NAME, "2", "Staging")
+    return manager
+
+
+def promote(manager: ModelRegistryManager, version: str):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # registry stages are deprecated, the api still serves by stage
+        manager.client.transition_model_version_stage(MODEL_NAME, version, "Production")
+
+
+def start_server(cache_dir: str, watch_interval: float) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONWARNINGS="ignore", MODEL_CACHE_DIR=cache_dir, MODEL_WATCH_INTERVAL=str(watch_interval))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(600):
+        with contextlib.suppress(httpx.TransportError):
+            if httpx.get(f"http://127.0.0.1:{PORT}/health/ready").status_code == 200:
+                return server
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("api server did not start")
+
+
+async def load(records: list, concurrency: int, seconds: float, promote) -> tuple:
+    """
+    Sends records to /predict from concurrency clients for the given duration and runs promote halfway.
+    Returns ({model version: latencies in seconds}, failed requests, seconds at which promote returned).
+    """
+    latencies = defaultdict(list)
+    failed = 0
+    start = time.perf_counter()
+
+    async def client_loop(client, offset):
+        nonlocal failed
+        i = offset
+        while time.perf_counter() - start < seconds:
+            sent = time.perf_counter()
+            response = await client.post("/predict", json=records[i % len(records)])
+            if response.status_code == 200:
+                latencies[response.json()["model_version"]].append(time.perf_counter() - sent)
+            else:
+                failed += 1
+            i += concurrency
+
+    async def promote_halfway():
+        await asyncio.sleep(seconds / 2)
+        await asyncio.to_thread(promote)
+        return time.perf_counter() - start
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        *_, promoted_at = await asyncio.gather(*(client_loop(client, i) for i in range(concurrency)), promote_halfway())
+    return latencies, failed, promoted_at
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--watch-interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    records = make_records(1_000, FEATURE_ORDER)
+    with tempfile.TemporaryDirectory() as tracking_dir:
+        manager = register_versions(tracking_dir)
+        server = start_server(os.path.join(tracking_dir, "model_cache"), args.watch_interval)
+        try:
+            latencies, failed, promoted_at = asyncio.run(
+                load(
+                    records,
+                    args.concurrency,
+                    args.seconds,
+                    lambda: promote(manager, "2"),
+                )
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"promoted a new version after {promoted_at:.1f}s, {failed} failed requests")
+    for version, version_latencies in sorted(latencies.items()):
+        version_latencies = np.array(version_latencies)
+        p50, p99 = np.percentile(version_latencies, [50, 99]) * 1000
+        print(
+            f"version {version:<3} {len(version_latencies):>7} requests  p50 {p50:8.1f}ms  p99 {p99:8.1f}ms  "
+            f"max {version_latencies.max() * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
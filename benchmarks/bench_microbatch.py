@@ -0,0 +1,99 @@
+"""
+Load test: /predict latency (p50/p99) and requests per second with and without micro-batching.
+
+A uvicorn server is started for each configuration, serving a logistic regression registered
+in a throwaway MLflow registry, and hit by concurrent async clients.
+
+Usage: python -m benchmarks.bench_microbatch [--requests 1000] [--concurrency 32] [--max-batch-size 64]
+                                            [--max-wait-ms 2]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_batch_predict import make_records, register_model
+from scripts.constants import FEATURE_ORDER
+
+PORT = 8765
+
+
+def start_server(max_batch_size: int, max_wait_ms: float) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PYTHONWARNINGS="ignore",
+        PREDICT_MAX_BATCH_SIZE=str(max_batch_size),
+        PREDICT_MAX_WAIT_MS=str(max_wait_ms),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    for _ in range(600):
+        with contextlib.suppress(httpx.TransportError):
+            if httpx.get(f"http://127.0.0.1:{PORT}/docs").status_code == 200:
+                return server
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("api server did not start")
+
+
+async def load(records: list, concurrency: int) -> tuple:
+    """Sends every record to /predict from concurrency clients, returns (latencies in seconds, wall time)."""
+    latencies = []
+    pending = iter(records)
+
+    async def client_loop(client):
+        for record in pending:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=record)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        return np.array(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    records = make_records(args.requests, FEATURE_ORDER)
+    with tempfile.TemporaryDirectory() as tracking_dir:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            register_model(tracking_dir, FEATURE_ORDER)
+
+        for name, max_batch_size in (("unbatched", 1), ("batched", args.max_batch_size)):
+            server = start_server(max_batch_size, args.max_wait_ms)
+            try:
+                asyncio.run(load(records[:100], args.concurrency))  # warm up
+                latencies, seconds = asyncio.run(load(records, args.concurrency))
+            finally:
+                server.terminate()
+                server.wait()
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            print(
+                f"{name:<10} max_batch_size={max_batch_size:<4} p50 {p50:8.1f}ms  p99 {p99:8.1f}ms  "
+                f"{len(latencies) / seconds:8.0f} req/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: per-customer most common value, lambda row.mode() vs most_common_by_group.
+
+Usage: python -m benchmarks.bench_most_common [--rows 1000000] [--customers 50000]
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks._synthetic import make_transactions, timed
+from scripts.constants import Columns, Default_Enums
+from src.aggregation import most_common_by_group
+
+
+def lambda_mode(df: pd.DataFrame, col: str, default=None) -> pd.Series:
+    return df.groupby(Columns.CustomerId.value)[col].agg(
+        lambda row: (row.mode()[0] if not row.mode().empty else default)
+    )
+
+
+def vectorized_mode(df: pd.DataFrame, col: str, default=None) -> pd.Series:
+    codes, customers = pd.factorize(df[Columns.CustomerId.value], sort=True)
+    return most_common_by_group(codes, len(customers), df[col], default)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=50_000)
+    args = parser.parse_args()
+
+    df = make_transactions(args.rows, args.customers)
+    df["TransactionDay"] = pd.to_datetime(df[Columns.TransactionStartTime.value], utc=True).dt.day
+
+    print(f"{args.rows:,} transactions, {args.customers:,} customers")
+    print(f"{'column':<20}{'lambda (s)':>12}{'vectorized (s)':>16}{'speedup':>10}")
+    for col, default in [
+        ("TransactionDay", None),
+        (Columns.ProductCategory.value, Default_Enums.UNKNOWN.value),
+        (Columns.ChannelId.value, Default_Enums.UNKNOWN.value),
+    ]:
+        slow, expected = timed(lambda_mode, df, col, default, repeat=1)
+        fast, result = timed(vectorized_mode, df, col, default)
+        assert (result.to_numpy() == expected.to_numpy()).all()
+        print(f"{col:<20}{slow:>12.3f}{fast:>16.3f}{slow / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
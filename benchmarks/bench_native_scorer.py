@@ -0,0 +1,61 @@
+"""
+Benchmark: scoring latency of the pyfunc wrapper (DataFrame input) vs the native NumPy scorer
+(array input) for a logistic regression and a random forest, at online and batch sizes.
+
+Usage: python -m benchmarks.bench_native_scorer [--batch-sizes 1 64 10000]
+"""
+
+import argparse
+import os
+import tempfile
+import warnings
+
+import mlflow.pyfunc
+import mlflow.sklearn
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from benchmarks._synthetic import timed
+from scripts.constants import FEATURE_ORDER
+from src.registry.native_scorer import check_rows, compile_native_scorer, max_score_difference
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 10_000])
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame(rng.normal(0, 1, size=(5_000, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+    y = (X.to_numpy() @ np.linspace(-1, 1, len(FEATURE_ORDER)) + rng.normal(0, 1, len(X)) > 0).astype(int)
+    models = {
+        "LogisticRegression": LogisticRegression().fit(X, y),
+        "RandomForest(100)": RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, sk_model in models.items():
+            path = os.path.join(directory, name)
+            mlflow.sklearn.save_model(sk_model, path)
+            pyfunc_model = mlflow.pyfunc.load_model(path)
+            scorer = compile_native_scorer(sk_model)
+            rows = check_rows(scorer, n_rows=max(args.batch_sizes))
+            print(f"{name}: max probability difference {max_score_difference(scorer, sk_model, rows):.1e}")
+
+            for batch_size in args.batch_sizes:
+                batch = rows[:batch_size]
+                frame = pd.DataFrame(batch, columns=FEATURE_ORDER)
+                repeat = max(1, 2_000 // batch_size)
+                pyfunc_seconds, _ = timed(lambda: [pyfunc_model.predict(frame) for _ in range(repeat)])
+                native_seconds, _ = timed(lambda: [scorer.predict(batch) for _ in range(repeat)])
+                print(
+                    f"  {batch_size:>6} rows  pyfunc {pyfunc_seconds / repeat * 1e3:8.3f}ms  "
+                    f"native {native_seconds / repeat * 1e3:8.3f}ms  ({pyfunc_seconds / native_seconds:5.1f}x)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: /predict and /predict/batch latency with the prediction cache off and on, when callers keep rescoring
+a small set of customers.
+
+Requests draw their feature vectors from --distinct customers, so all but the first request per customer can be
+answered from the cache. The served models are a logistic regression (pyfunc) and a random forest
+(native scorer) registered in a throwaway MLflow registry. Micro-batching is turned off, so only the scoring path is
+measured.
+
+Usage: python -m benchmarks.bench_prediction_cache [--requests 2000] [--distinct 200] [--batch-rows 1000]
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks._synthetic import timed
+from benchmarks.bench_batch_predict import make_records, register_model
+from scripts.constants import FEATURE_ORDER, MODEL_NAME
+from src.registry.model_registry import ModelRegistryManager
+
+
+def import_api(cache_size: int):
+    os.environ["PREDICT_CACHE_SIZE"] = str(cache_size)
+    sys.modules.pop("src.api.main", None)
+    with contextlib.redirect_stderr(io.StringIO()):
+        return importlib.import_module("src.api.main")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--distinct", type=int, default=200, help="distinct customers the requests are drawn from")
+    parser.add_argument("--batch-rows", type=int, default=1_000)
+    args = parser.parse_args()
+
+    customers = make_records(args.distinct, FEATURE_ORDER)
+    rng = np.random.default_rng(0)
+    records = [customers[i] for i in rng.integers(0, args.distinct, args.requests)]
+    batches = [{"records": [customers[i] for i in rng.integers(0, args.distinct, args.batch_rows)]} for _ in range(10)]
+    os.environ.update(PREDICT_MAX_BATCH_SIZE="1", MODEL_WATCH_INTERVAL="0")
+    warnings.simplefilter("ignore")
+
+    for model_name, model, native in (
+        ("logistic regression", None, False),
+        ("random forest", RandomForestClassifier(n_estimators=200, min_samples_leaf=5, random_state=0), True),
+    ):
+        with tempfile.TemporaryDirectory() as tracking_dir:
+            os.environ["MODEL_CACHE_DIR"] = os.path.join(tracking_dir, "model_cache")
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                register_model(tracking_dir, FEATURE_ORDER, model=model, n_rows=20_000)
+                if native:
+                    manager = ModelRegistryManager(MODEL_NAME)
+                    manager.export_native_scorer(manager.get_all_versions()[0])
+
+            for cache_size in (0, 10_000):
+                api = import_api(cache_size)
+                client = TestClient(api.app)
+                single, _ = timed(lambda: [client.post("/predict", json=record) for record in records], repeat=1)
+                batch, _ = timed(lambda: [client.post("/predict/batch", json=payload) for payload in batches], repeat=1)
+                stats = client.get("/cache/stats").json()
+                hit_rate = f"hit rate {stats['hit_rate']:.2f}" if stats["enabled"] else "cache off"
+                print(
+                    f"{model_name:<20} {type(api.serving.current.model).__name__:<12} {hit_rate:<14} "
+                    f"/predict {single / args.requests * 1e3:7.3f} ms/request  "
+                    f"/predict/batch {batch / len(batches) * 1e3:8.2f} ms/{args.batch_rows} rows"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: peak RSS and wall time of loading raw csv + DataPreprocessor.transform_all, untyped vs RAW_SCHEMA.
+
+Usage: python -m benchmarks.bench_raw_schema [--rows 1000000]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks._synthetic import make_transactions
+from src.data_pipeline import DataPreprocessor
+from src.schema import read_csv_typed
+
+
+def _max_rss_mib() -> float:
+    """Peak resident set size of this process so far (VmHWM)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode: str, path: str):
+    """Runs one measurement in this (fresh) process and prints it as JSON."""
+    baseline = _max_rss_mib()
+    start = time.perf_counter()
+    if mode == "typed":
+        raw_df = read_csv_typed(path)
+    else:
+        raw_df = pd.read_csv(path)
+    loaded = time.perf_counter()
+    frame_mib = raw_df.memory_usage(deep=True).sum() / 2**20
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        DataPreprocessor(raw_df).transform_all()
+
+    print(
+        json.dumps(
+            {
+                "load": loaded - start,
+                "transform": time.perf_counter() - loaded,
+                "frame": frame_mib,
+                "peak": _max_rss_mib() - baseline,  # above the interpreter and imports
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--child", choices=["untyped", "typed"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "raw_data.csv")
+        make_transactions(args.rows, max(args.rows // 25, 1)).to_csv(path, index=False)
+
+        print(f"{args.rows:,} transactions")
+        print(f"{'raw dtypes':<12}{'frame (MiB)':>13}{'peak RSS (MiB)':>16}{'load (s)':>10}{'transform (s)':>15}")
+        for mode in ["untyped", "typed"]:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_raw_schema", "--child", mode, "--path", path],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{mode:<12}{result['frame']:>13,.0f}{result['peak']:>16,.0f}"
+                f"{result['load']:>10.2f}{result['transform']:>15.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
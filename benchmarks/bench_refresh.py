@@ -0,0 +1,69 @@
+"""
+Benchmark: per-batch cost of DataPreprocessor.refresh as the transaction history grows, vs a full recompute.
+
+For every history size (--customers customers with --rows-per-customer transactions each) the aggregate state of
+the history is saved, then one DataPreprocessor refreshes it with --batches batches of --batch new transactions.
+The first refresh loads the state, the following ones reuse it and append their batch to the delta log; the median
+of those is the per-batch cost. Saving a whole snapshot is what the state compaction costs once every
+AGGREGATE_STATE_MAX_DELTAS batches. The rows of the last refresh are checked against a full recompute.
+
+Usage: python -m benchmarks.bench_refresh [--customers 2000 20000 200000] [--rows-per-customer 10] [--batch 200]
+    [--batches 20]
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._synthetic import make_transactions, timed
+from scripts.constants import Columns
+from src.data_pipeline import CustomAggregator, DataPreprocessor, TimeFeatureExtractor
+from src.schema import apply_schema, concat_typed
+
+
+def full_recompute(raw_df: pd.DataFrame) -> pd.DataFrame:
+    return CustomAggregator().transform(TimeFeatureExtractor().transform(raw_df))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", type=int, nargs="+", default=[2_000, 20_000, 200_000])
+    parser.add_argument("--rows-per-customer", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--batches", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"batches of {args.batch} transactions, {args.rows_per_customer} historical transactions per customer")
+    print(f"{'customers':>10} {'full recompute':>15} {'first refresh':>14} {'per batch':>10} {'snapshot save':>14}")
+    for n_customers in args.customers:
+        history_df = apply_schema(make_transactions(n_customers * args.rows_per_customer, n_customers, seed=0))
+        batches = [
+            apply_schema(make_transactions(args.batch, n_customers, seed=seed)) for seed in range(1, args.batches + 1)
+        ]
+
+        with tempfile.TemporaryDirectory() as state_dir, contextlib.redirect_stdout(io.StringIO()):
+            save_time, _ = timed(DataPreprocessor().aggregate_state([history_df]).save, state_dir, repeat=1)
+            preprocessor = DataPreprocessor()
+            refresh_times = []
+            for batch_df in batches:
+                seconds, refreshed = timed(preprocessor.refresh, batch_df, state_dir=state_dir, repeat=1)
+                refresh_times.append(seconds)
+
+            refreshed_customers = batches[-1][Columns.CustomerId.value].astype(str).unique()
+            # concat_typed empties the frames it combines
+            full_time, expected = timed(full_recompute, concat_typed([history_df, *batches]), repeat=1)
+
+        expected = expected[expected[Columns.CustomerId.value].isin(refreshed_customers)]
+        pd.testing.assert_frame_equal(refreshed, expected.reset_index(drop=True))
+        print(
+            f"{n_customers:>10,} {full_time:>14.3f}s {refresh_times[0]:>13.3f}s "
+            f"{np.median(refresh_times[1:]):>9.3f}s {save_time:>13.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
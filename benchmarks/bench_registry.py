@@ -0,0 +1,84 @@
+"""
+Benchmark: registry queries of ModelRegistryManager against a local file-backed tracking store, with N versions.
+
+The previous way is reproduced inline: get_best_version_by_metric listed the versions (plus every registered model)
+and called get_run once per version, and promote_to_production listed the versions a second time to archive
+the Production ones. The manager now fetches the metrics of every version run with bulk search_runs calls,
+caches the listing for REGISTRY_CACHE_TTL_SECONDS, and promotes from a single fresh listing.
+Native scorer export is left out of the promotions, it does not depend on the number of versions.
+
+Usage: python -m benchmarks.bench_registry [--versions 300]
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import warnings
+
+import mlflow
+import numpy as np
+from mlflow.tracking import MlflowClient
+
+from benchmarks._synthetic import timed
+from scripts.constants import MODEL_NAME
+from src.registry.model_registry import ModelRegistryManager
+
+
+def previous_best_version(client: MlflowClient, metric_name: str = "roc_auc") -> tuple:
+    versions = client.search_model_versions(f"name='{MODEL_NAME}'")
+    client.search_registered_models()
+    best_version, best_metric = None, -1
+    for mv in versions:
+        metrics = client.get_run(mv.run_id).data.metrics
+        if metric_name in metrics and metrics[metric_name] > best_metric:
+            best_version, best_metric = mv, metrics[metric_name]
+    return best_version, best_metric
+
+
+def previous_promote(client: MlflowClient) -> tuple:
+    best_version, score = previous_best_version(client)
+    client.search_registered_models()
+    for mv in client.search_model_versions(f"name='{MODEL_NAME}'"):
+        if mv.current_stage == "Production":
+            client.transition_model_version_stage(MODEL_NAME, mv.version, "Archived")
+    client.transition_model_version_stage(MODEL_NAME, best_version.version, "Production")
+    return best_version.version, score
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--versions", type=int, default=300)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tracking_dir, contextlib.redirect_stderr(io.StringIO()):
+        mlflow.set_tracking_uri(f"file:{tracking_dir}")
+        experiment_id = mlflow.create_experiment(MODEL_NAME)
+        client = MlflowClient()
+        client.create_registered_model(MODEL_NAME)
+        for roc_auc in rng.uniform(0.6, 0.8, args.versions):
+            run = client.create_run(experiment_id)
+            client.log_metric(run.info.run_id, "roc_auc", float(roc_auc))
+            client.log_metric(run.info.run_id, "f1", float(roc_auc) - 0.1)
+            client.create_model_version(MODEL_NAME, f"runs:/{run.info.run_id}/model", run_id=run.info.run_id)
+
+        manager = ModelRegistryManager(MODEL_NAME)
+        manager.export_native_scorer = lambda model_version: False
+        results = {
+            "previous best version": timed(previous_best_version, client),
+            "best version, cold cache": timed(manager.get_best_version_by_metric, refresh=True),
+            "best version, cached": timed(manager.get_best_version_by_metric),
+            "previous promotion": timed(previous_promote, client),
+            "promotion": timed(manager.promote_to_production),
+        }
+
+    print(f"{args.versions} model versions, local file store")
+    for name, (seconds, result) in results.items():
+        version = getattr(result[0], "version", result[0])
+        print(f"{name:<26} {seconds * 1e3:10.1f} ms   version {version}")
+
+
+if __name__ == "__main__":
+    main()
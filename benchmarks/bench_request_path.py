@@ -0,0 +1,62 @@
+"""
+Benchmark: per-request latency of the /predict input path, one-row DataFrame from request.dict()
+reindexed by FEATURE_ORDER and printed vs RequestEncoder rows, with and without the model call.
+
+The model is a logistic regression registered in a throwaway MLflow registry and loaded as pyfunc.
+
+Usage: python -m benchmarks.bench_request_path [--requests 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._synthetic import timed
+from benchmarks.bench_batch_predict import make_records, register_model
+from scripts.constants import FEATURE_ORDER
+from src.api.features import RequestEncoder
+from src.api.model_loader import load_model
+from src.api.pydantic_models import PredictionRequest
+
+
+def frame_input(request: PredictionRequest) -> pd.DataFrame:
+    """predict_risk input before RequestEncoder, kept as the baseline."""
+    input_df = pd.DataFrame([request.dict()])
+    input_df = input_df[FEATURE_ORDER]
+    print(input_df)
+    return input_df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2_000)
+    args = parser.parse_args()
+
+    requests = [PredictionRequest(**record) for record in make_records(args.requests, FEATURE_ORDER)]
+    encoder = RequestEncoder(FEATURE_ORDER)
+    warnings.simplefilter("ignore")
+
+    with tempfile.TemporaryDirectory() as tracking_dir:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            register_model(tracking_dir, FEATURE_ORDER)
+            model = load_model()
+
+        paths = {
+            "frame input": lambda request: frame_input(request),
+            "encoder input": lambda request: encoder.frame(encoder.row(request)[np.newaxis]),
+            "frame input + predict": lambda request: model.predict(frame_input(request)),
+            "encoder input + predict": lambda request: model.predict(encoder.frame(encoder.row(request)[np.newaxis])),
+        }
+        for name, path in paths.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds, _ = timed(lambda: [path(request) for request in requests])
+            print(f"{name:<25} {seconds / args.requests * 1e6:9.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark: csv vs Parquet vs Feather storage for a raw transaction stage.
+
+Usage: python -m benchmarks.bench_storage [--rows 1000000]
+"""
+
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from benchmarks._synthetic import make_transactions, timed
+from scripts.constants import Columns
+from src.storage import STORAGE_BACKENDS
+
+PROJECTED_COLS = [Columns.CustomerId.value, Columns.Amount.value]
+TIME_RANGE = ("2018-12-01", "2018-12-15")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_transactions(args.rows, max(args.rows // 25, 1))
+    df[Columns.TransactionStartTime.value] = pd.to_datetime(df[Columns.TransactionStartTime.value], utc=True)
+    for col in [Columns.ProductCategory.value, Columns.ChannelId.value, Columns.ProviderId.value]:
+        df[col] = df[col].astype("category")
+
+    print(f"{args.rows:,} transactions")
+    print(f"{'format':<10}{'size (MiB)':>12}{'save (s)':>10}{'load (s)':>10}{'2 cols (s)':>12}{'2 weeks (s)':>13}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, storage in STORAGE_BACKENDS.items():
+            path = os.path.join(tmp_dir, f"raw{storage.suffix}")
+            save_time, _ = timed(storage.write, df, path, repeat=1)
+            load_time, loaded = timed(storage.read, path)
+            projected_time, _ = timed(storage.read, path, columns=PROJECTED_COLS)
+            filtered_time, _ = timed(storage.read, path, columns=PROJECTED_COLS, time_range=TIME_RANGE)
+            lossless = loaded.dtypes.equals(df.dtypes)
+            print(
+                f"{name:<10}{os.path.getsize(path) / 2**20:>12.1f}{save_time:>10.2f}{load_time:>10.2f}"
+                f"{projected_time:>12.2f}{filtered_time:>13.2f}" + ("" if lossless else "   (dtypes not preserved)")
+            )
+
+
+if __name__ == "__main__":
+    main()
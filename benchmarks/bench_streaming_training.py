@@ -0,0 +1,71 @@
+"""
+Benchmark: peak memory and time of training an SGD logistic regression on a model-ready parquet file,
+loaded whole into TrainModels (run_experiment) vs streamed chunk by chunk (run_streaming_experiment).
+
+The file holds --rows customers: CustomerId, the FEATURE_ORDER columns (WoE scale) and the target. Both runs
+log to their own throwaway MLflow file store. Peak memory is the tracemalloc peak of the run, which counts
+the numpy and pandas buffers but not the Arrow buffers of the parquet reader.
+
+Usage: python -m benchmarks.bench_streaming_training [--rows 2000000] [--chunksize 100000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import warnings
+
+import mlflow
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+
+from benchmarks._synthetic import traced
+from scripts.constants import FEATURE_ORDER, MODEL_NAME, TARGET_COL, Columns
+from src.training.experiment_runner import ExperimentRunner
+from src.training.train import TrainModels
+
+
+def in_memory(path: str) -> dict:
+    df = pd.read_parquet(path).drop(columns=[Columns.CustomerId.value])
+    trainer = TrainModels(df, target_col=TARGET_COL)
+    trainer.split_data()
+    runner = ExperimentRunner(SGDClassifier(loss="log_loss", random_state=0), "SGDLogisticRegression")
+    return trainer.run_experiment("SGD_InMemory", runner)
+
+
+def streamed(path: str, chunksize: int) -> dict:
+    trainer = TrainModels(None, target_col=TARGET_COL)
+    runner = ExperimentRunner(SGDClassifier(loss="log_loss", random_state=0), "SGDLogisticRegression")
+    return trainer.run_streaming_experiment("SGD_Streaming", runner, file_name=path, chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "final_data.parquet")
+        df = pd.DataFrame(rng.normal(0, 1, size=(args.rows, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+        logit = df.to_numpy() @ np.linspace(-1, 1, len(FEATURE_ORDER)) + rng.normal(0, 1, args.rows)
+        df[TARGET_COL] = (logit > 1).astype(int)
+        df.insert(0, Columns.CustomerId.value, [f"CustomerId_{i}" for i in range(args.rows)])
+        df.to_parquet(path, row_group_size=args.chunksize)
+        del df, logit
+        print(f"{args.rows:,} customers, {len(FEATURE_ORDER)} features, chunks of {args.chunksize:,} rows")
+
+        for name, run in (("in memory", lambda: in_memory(path)), ("streamed", lambda: streamed(path, args.chunksize))):
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                mlflow.set_tracking_uri(f"file:{os.path.join(tmp_dir, name.replace(' ', '_'))}")
+                mlflow.set_experiment(MODEL_NAME)
+                seconds, peak, metrics = traced(run)
+            print(f"{name:<10} {seconds:7.2f}s  peak {peak:8.1f} MiB  roc_auc {metrics['roc_auc']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
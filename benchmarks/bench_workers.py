@@ -0,0 +1,167 @@
+"""
+Benchmark: /predict/batch throughput and memory of the api served by gunicorn with 1..N uvicorn workers.
+
+A random forest is registered with its native scorer in a throwaway MLflow registry, so the served weights are
+large enough to show up in memory. For each configuration the total PSS (proportional set size: shared pages are
+split between the processes mapping them) of the master and its workers is reported, along with the USS (pages
+private to one worker). With preloading, workers are forked from a master that already imported the libraries
+and loaded the model. Without it, every worker imports and loads them on its own.
+
+A second section loads the native scorer in several plain processes, read into memory vs memory-mapped,
+to isolate what mapping the artifact saves per process.
+
+Throughput only scales with workers up to the number of cores of the machine.
+
+Usage: python -m benchmarks.bench_workers [--workers 1 2 4] [--seconds 10] [--rows 256] [--trees 200]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import psutil
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.bench_batch_predict import make_records, register_model
+from scripts.constants import FEATURE_ORDER, MODEL_NAME, NATIVE_SCORER_ARTIFACT_PATH
+from src.registry.model_registry import ModelRegistryManager
+from src.registry.native_scorer import NativeScorer
+
+PORT = 8768
+
+
+def start_server(workers: int, preload: bool, cache_dir: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PYTHONWARNINGS="ignore",
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_PRELOAD=str(preload).lower(),
+        BIND=f"127.0.0.1:{PORT}",
+        MODEL_LOAD_MODE="eager",
+        MODEL_CACHE_DIR=cache_dir,
+        MODEL_WATCH_INTERVAL="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "src.api.main:app"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(1200):
+        with contextlib.suppress(httpx.TransportError):
+            if httpx.get(f"http://127.0.0.1:{PORT}/health/ready").status_code == 200:
+                # Every worker answers health checks once it imported the app
+                if len(psutil.Process(server.pid).children()) == workers:
+                    time.sleep(2)
+                    return server
+        if server.poll() is not None:
+            raise RuntimeError("gunicorn exited")
+        time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("api server did not start")
+
+
+def memory_mb(pids: list) -> tuple:
+    """Returns (total PSS, mean USS) of the processes in MB."""
+    infos = [psutil.Process(pid).memory_full_info() for pid in pids]
+    return sum(info.pss for info in infos) / 2**20, sum(info.uss for info in infos) / len(infos) / 2**20
+
+
+async def load(payload: dict, concurrency: int, seconds: float) -> float:
+    """Sends payload to /predict/batch from concurrency clients for the given duration, returns requests per second."""
+    done = 0
+    start = time.perf_counter()
+
+    async def client_loop(client):
+        nonlocal done
+        while time.perf_counter() - start < seconds:
+            response = await client.post("/predict/batch", json=payload)
+            response.raise_for_status()
+            done += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=120) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return done / (time.perf_counter() - start)
+
+
+def _hold_scorer(directory: str, mmap_mode, ready, release):
+    scorer = NativeScorer.load(directory, mmap_mode=mmap_mode)
+    for array in scorer.arrays.values():
+        array.sum()  # reads every page, as scoring many rows eventually does
+    ready.set()
+    release.wait()
+
+
+def scorer_processes_mb(directory: str, processes: int, mmap_mode) -> tuple:
+    """Loads the scorer in several processes at once, returns their (total PSS, mean USS) in MB."""
+    context = multiprocessing.get_context("spawn")
+    release = context.Event()
+    readies = [context.Event() for _ in range(processes)]
+    workers = [context.Process(target=_hold_scorer, args=(directory, mmap_mode, r, release)) for r in readies]
+    for worker in workers:
+        worker.start()
+    try:
+        for ready in readies:
+            ready.wait(300)
+        return memory_mb([worker.pid for worker in workers])
+    finally:
+        release.set()
+        for worker in workers:
+            worker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rows", type=int, default=256, help="customers per /predict/batch request")
+    parser.add_argument("--trees", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = {"records": make_records(args.rows, FEATURE_ORDER)}
+    print(f"{psutil.cpu_count()} cores")
+    with tempfile.TemporaryDirectory() as tracking_dir:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            model = RandomForestClassifier(n_estimators=args.trees, min_samples_leaf=5, random_state=0)
+            register_model(tracking_dir, FEATURE_ORDER, model=model, n_rows=20_000)
+            manager = ModelRegistryManager(MODEL_NAME)
+            manager.export_native_scorer(manager.get_all_versions()[0])
+        cache_dir = os.path.join(tracking_dir, "model_cache")
+
+        configurations = [(workers, True) for workers in args.workers] + [(max(args.workers), False)]
+        for workers, preload in configurations:
+            server = start_server(workers, preload, cache_dir)
+            try:
+                pids = [server.pid] + [child.pid for child in psutil.Process(server.pid).children()]
+                pss, uss = memory_mb(pids)
+                rate = asyncio.run(load(payload, concurrency=2 * workers, seconds=args.seconds))
+            finally:
+                server.terminate()
+                server.wait()
+            name = f"{workers} workers, {'preloaded' if preload else 'not preloaded'}"
+            print(
+                f"{name:<28} {rate:7.1f} req/s  {rate * args.rows:>9,.0f} rows/s  "
+                f"total PSS {pss:7.1f}MB  USS per process {uss:6.1f}MB"
+            )
+
+        scorer_dir = next(os.scandir(os.path.join(cache_dir, MODEL_NAME))).path
+        scorer_dir = os.path.join(scorer_dir, NATIVE_SCORER_ARTIFACT_PATH)
+        size = sum(entry.stat().st_size for entry in os.scandir(scorer_dir)) / 2**20
+        processes = max(args.workers)
+        print(f"native scorer artifact {size:.1f}MB, loaded by {processes} processes")
+        for name, mmap_mode in (("read", None), ("memory-mapped", "r")):
+            pss, uss = scorer_processes_mb(scorer_dir, processes, mmap_mode)
+            print(f"{name:<28} total PSS {pss:7.1f}MB  USS per process {uss:6.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
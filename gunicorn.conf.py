@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for serving the api with several uvicorn workers, picked up from the working directory:
+    gunicorn src.api.main:app
+
+The app is imported once in the master before the workers are forked (preload_app), so with MODEL_LOAD_MODE=eager
+the model and the imported libraries are loaded once and shared copy-on-write by every worker. Native scorers are
+memory-mapped from the artifact cache as well, so versions loaded by the workers themselves (background loading,
+hot reloads) share their weights through the page cache.
+"""
+
+import gc
+import multiprocessing
+import os
+
+# Workers already use every core, one BLAS thread each avoids oversubscribing them
+for threads_var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(threads_var, "1")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+timeout = 120
+
+
+def when_ready(server):
+    # Runs in the master after preloading and before forking: objects created so far are left out of garbage
+    # collections, which would otherwise write to their headers and copy the pages shared with the workers
+    gc.freeze()
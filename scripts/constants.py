@@ -7,6 +7,24 @@ CLEAN_DATA_FILE_NAME = "clean_data.csv"
 PROCESSED_FEATURES_DATA_FILE_NAME = "processed_features.csv"
 PROCESSED_FEATURES_WITH_PROXY_VAR_DATA_FILE_NAME = "processed_features_with_proxy.csv"
 READY_TO_MODEL_DATA_FILE_NAME = "final_data.csv"
+CUSTOMER_AGGREGATE_STATE_DIR_NAME = "customer_aggregate_state"  # under CLEAN_DATA_DIR
+ARTIFACTS_DIR = "../artifacts"
+PREPROCESSOR_FILE_NAME = "preprocessor.joblib"  # fitted DataPreprocessor pipeline, under ARTIFACTS_DIR
+FEATURE_STORE_DIR_NAME = "customer_feature_store"  # WoE-encoded model rows by CustomerId, under ARTIFACTS_DIR
+CHANNEL_WOE_FILE_NAME = (
+    "channel_woe.json"  # MostCommonChannel label -> WoE table served by the api, under ARTIFACTS_DIR
+)
+
+# Storage format of each data stage, keyed by its file name constant.
+# Columnar stages keep the stem of the csv name with the format's own suffix.
+DEFAULT_STORAGE_FORMAT = "parquet"
+STORAGE_FORMATS = {
+    RAW_DATA_FILE_NAME: "csv",
+    CLEAN_DATA_FILE_NAME: "parquet",
+    PROCESSED_FEATURES_DATA_FILE_NAME: "parquet",
+    PROCESSED_FEATURES_WITH_PROXY_VAR_DATA_FILE_NAME: "parquet",
+    READY_TO_MODEL_DATA_FILE_NAME: "parquet",
+}
 
 
 class Columns(Enum):
@@ -28,6 +46,30 @@ class Columns(Enum):
     FraudResult = "FraudResult"
 
 
+# Declared storage type of every raw column:
+# "category" -> pandas categorical (low cardinality ids and categories)
+# "string" -> Arrow-backed strings (near unique ids, no Python object per row)
+# "integer" / "float" -> smallest numeric dtype holding every value exactly
+# "datetime" -> tz-aware UTC timestamp parsed once at load time
+RAW_SCHEMA = {
+    Columns.TransactionId.value: "string",
+    Columns.BatchId.value: "string",
+    Columns.AccountId.value: "category",
+    Columns.SubscriptionId.value: "category",
+    Columns.CustomerId.value: "category",
+    Columns.CurrencyCode.value: "category",
+    Columns.CountryCode.value: "integer",
+    Columns.ProviderId.value: "category",
+    Columns.ProductId.value: "category",
+    Columns.ProductCategory.value: "category",
+    Columns.ChannelId.value: "category",
+    Columns.Amount.value: "float",
+    Columns.Value.value: "integer",
+    Columns.TransactionStartTime.value: "datetime",
+    Columns.PricingStrategy.value: "integer",
+    Columns.FraudResult.value: "integer",
+}
+
 NUMERIC_COLS = [Columns.Amount.value, Columns.Value.value]
 CATEGORY_COLS = [
     Columns.ChannelId.value,
@@ -89,5 +131,51 @@ WOE_CANDIDATE_COLS = [
     Aggregated_Columns.MostCommonChannel.value,
 ]
 
+# Column order the registered model was trained with, the api builds its input in this order
+FEATURE_ORDER = [
+    Aggregated_Columns.TransactionCount.value,
+    Aggregated_Columns.TotalTransactionAmount.value,
+    Aggregated_Columns.UniqueProductCategoryCount.value,
+    Aggregated_Columns.TransactionAmountSTD.value,
+    Aggregated_Columns.AverageTransactionHour.value,
+    Aggregated_Columns.AverageTransactionAmount.value,
+    Aggregated_Columns.MostCommonChannel.value,
+    Aggregated_Columns.MostCommonTransactionDay.value,
+    Aggregated_Columns.MostCommonTransactionMonth.value,
+]
+
 MODEL_NAME = "credit-risk-models"
 MODEL_STAGE = "Production"
+NATIVE_SCORER_ARTIFACT_PATH = "native_scorer"  # run artifact written at promotion, see src/registry/native_scorer.py
+THRESHOLD_TABLE_ARTIFACT_PATH = "threshold_table.json"  # run artifact, operating points by objective
+# is_high_risk threshold of the api and the bulk scorer (HIGH_RISK_THRESHOLD env var): a row of the served version's
+# threshold table or a number. "default" is DEFAULT_RISK_THRESHOLD, the tuned "max_f1" / "max_ks" rows are opt-in
+HIGH_RISK_THRESHOLD = "default"
+DEFAULT_RISK_THRESHOLD = 0.5
+MODEL_CACHE_DIR = "../model_cache"  # api artifact cache, one directory per registry version
+NATIVE_SCORER_TOLERANCE = 1e-9  # largest probability difference accepted between a native scorer and its model
+# Seconds a registry listing (model versions and their run metrics) is reused by ModelRegistryManager
+REGISTRY_CACHE_TTL_SECONDS = 30.0
+
+# /predict micro-batching defaults, overridden by the PREDICT_MAX_BATCH_SIZE / PREDICT_MAX_WAIT_MS env vars
+PREDICT_MAX_BATCH_SIZE = 64
+PREDICT_MAX_WAIT_MS = 2.0
+# Prediction cache in front of /predict and /predict/batch (PREDICT_CACHE_SIZE / PREDICT_CACHE_TTL_SECONDS env vars),
+# a size of 0 turns it off
+PREDICT_CACHE_SIZE = 0
+PREDICT_CACHE_TTL_SECONDS = 300.0
+# Refresh batches logged as deltas of the customer aggregate state before it is compacted into a new snapshot
+AGGREGATE_STATE_MAX_DELTAS = 64
+# Customers scored per model call by the /predict/customers export
+FEATURE_STORE_EXPORT_CHUNK_ROWS = 50_000
+# Rows read and scored at once by the offline bulk scorer (python -m src.batch_scorer)
+BATCH_SCORING_CHUNK_ROWS = 100_000
+# Largest batch scored by the NumPy tree walk of a native tree ensemble, sklearn is faster above it
+# (benchmarks/bench_native_scorer.py: 100 trees, 64 rows 5.7 vs 10.2 ms, 256 rows 17.8 vs 13.8 ms)
+NATIVE_TREE_MAX_BATCH_ROWS = 128
+# Rows of the model-ready dataset read at once by TrainModels.run_streaming_experiment
+TRAINING_CHUNK_ROWS = 100_000
+# "eager" loads the model while the api is imported, "background" starts the api first and loads it in a thread
+MODEL_LOAD_MODE = "eager"
+# Seconds between two registry polls for a new Production version (MODEL_WATCH_INTERVAL env var), 0 turns it off
+MODEL_WATCH_INTERVAL = 30.0
@@ -1,9 +1,28 @@
-from .data_manager import DataManager
-from .data_pipeline import DataPreprocessor
-from .woe_transformer import WoeTransformer
-from .training.experiment_runner import ExperimentRunner
-from .training.train import TrainModels
-from .registry.model_registry import ModelRegistryManager
+import importlib
+
+# Exported name -> module defining it. Modules are imported on first access, so light modules
+# such as src.api do not pull in sklearn, mlflow and pandas just by living in this package.
+_EXPORTS = {
+    "DataManager": ".data_manager",
+    "DataPreprocessor": ".data_pipeline",
+    "WoeTransformer": ".woe_transformer",
+    "ExperimentRunner": ".training.experiment_runner",
+    "TrainModels": ".training.train",
+    "SuccessiveHalvingSearch": ".training.hyperparameter_search",
+    "ModelRegistryManager": ".registry.model_registry",
+}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
 
 
 __all__ = [
@@ -12,5 +31,6 @@ __all__ = [
     "WoeTransformer",
     "ExperimentRunner",
     "TrainModels",
+    "SuccessiveHalvingSearch",
     "ModelRegistryManager",
 ]
@@ -0,0 +1,593 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scripts.constants import AGGREGATE_STATE_MAX_DELTAS
+from .storage import get_storage
+
+# Largest (groups x distinct values) count table that is built densely with np.bincount.
+# Above it the per-group counts are computed on the sorted (group, value) pairs instead.
+DENSE_COUNT_TABLE_MIN_CELLS = 1 << 16
+MOMENT_COLUMNS = ("n", "total", "m2")
+STATE_META_FILE_NAME = "meta.json"
+
+
+def group_value_counts(group_codes: np.ndarray, n_groups: int, values: pd.Series):
+    """
+    Counts every observed (group, value) pair on factorized codes.
+    :param group_codes: Integer group code for every row (0..n_groups-1), rows coded -1 are ignored
+    :param n_groups: Number of groups
+    :param values: Values aligned with group_codes, missing values are ignored
+    :return: Tuple of (pair_groups, pair_values, counts, uniques) sorted by group then value,
+        where pair_values index into the sorted uniques
+    """
+    value_codes, uniques = pd.factorize(values, sort=True)
+    group_codes = np.asarray(group_codes)
+    valid = (value_codes >= 0) & (group_codes >= 0)
+    n_values = max(len(uniques), 1)
+    pairs = group_codes[valid].astype(np.int64) * n_values + value_codes[valid]
+
+    if n_groups * n_values <= max(len(pairs), DENSE_COUNT_TABLE_MIN_CELLS):
+        # Small tables: count every (group, value) cell and keep the observed ones
+        table = np.bincount(pairs, minlength=n_groups * n_values)
+        pairs = np.flatnonzero(table)
+        counts = table[pairs]
+    else:
+        # Large tables: count only observed pairs
+        pairs, counts = np.unique(pairs, return_counts=True)
+
+    pair_groups, pair_values = np.divmod(pairs, n_values)
+    return pair_groups, pair_values, counts, uniques
+
+
+def _most_common_from_counts(pair_groups, pair_values, counts, uniques, n_groups: int, default=None) -> pd.Series:
+    if len(counts) == 0:
+        return pd.Series([default] * n_groups, dtype=object)
+
+    # Pairs are sorted by group then value, so the first pair reaching the group maximum is the smallest mode
+    starts = np.flatnonzero(np.r_[True, pair_groups[1:] != pair_groups[:-1]])
+    group_max = np.maximum.reduceat(counts, starts) if len(starts) else counts
+    candidates = np.flatnonzero(counts == np.repeat(group_max, np.diff(np.r_[starts, len(counts)])))
+    is_first = np.r_[True, pair_groups[candidates[1:]] != pair_groups[candidates[:-1]]]
+
+    winner = np.full(n_groups, -1, dtype=np.int64)
+    winner[pair_groups[candidates[is_first]]] = pair_values[candidates[is_first]]
+
+    result = pd.Series(np.asarray(uniques)).take(np.where(winner >= 0, winner, 0)).reset_index(drop=True)
+    if (winner < 0).any():
+        result = result.where(winner >= 0, default)
+    return result
+
+
+def most_common_by_group(group_codes: np.ndarray, n_groups: int, values: pd.Series, default=None) -> pd.Series:
+    """
+    Computes the most frequent value per group without calling Series.mode() for every group.
+    Ties are broken by taking the smallest value, which matches ``row.mode()[0]``.
+    :param group_codes: Integer group code for every row (0..n_groups-1), rows coded -1 are ignored
+    :param n_groups: Number of groups
+    :param values: Values aligned with group_codes, missing values are ignored
+    :param default: Value returned for groups that have no non-missing values
+    :return: Series of length n_groups with the most common value of each group
+    :rtype: pd.Series
+    """
+    return _most_common_from_counts(*group_value_counts(group_codes, n_groups, values), n_groups, default)
+
+
+def group_moments(group_codes: np.ndarray, n_groups: int, values: pd.Series, with_m2: bool = True):
+    """
+    Computes the per-group count, sum and sum of squared deviations from the group mean.
+    :param group_codes: Integer group code for every row (0..n_groups-1), rows coded -1 are ignored
+    :param n_groups: Number of groups
+    :param values: Numeric values aligned with group_codes, missing values are ignored
+    :param with_m2: Whether to compute the squared deviations (needed for std only)
+    :return: Tuple of (count, total, m2) arrays of length n_groups, m2 is None when not requested
+    """
+    values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = (np.asarray(group_codes) >= 0) & ~np.isnan(values)
+    codes, values = group_codes[valid], values[valid]
+
+    count = np.bincount(codes, minlength=n_groups)
+    total = np.bincount(codes, weights=values, minlength=n_groups)
+    m2 = None
+    if with_m2:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            deviations = values - (total / count)[codes]
+        m2 = np.bincount(codes, weights=deviations * deviations, minlength=n_groups)
+    return count, total, m2
+
+
+def finalize_moments(how: str, count: np.ndarray, total: np.ndarray, m2: np.ndarray) -> np.ndarray:
+    """
+    Turns per-group moments into a "sum", "mean" or (sample) "std" aggregate, matching pandas groupby.
+    """
+    if how == "sum":
+        return total
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if how == "mean":
+            return total / count
+        return np.where(count > 1, m2 / (count - 1), np.nan) ** 0.5
+
+
+class CustomerAggregationEngine:
+    """
+    Computes many per-customer aggregates from a single factorization of the key column.
+    Every aggregate is a np.bincount over the key codes, so no groupby, merge or copy of
+    the input frame is needed and the output frame is built once.
+    Attributes:
+        key (str): Column to group by.
+        agg_config (dict): Output column -> (source column, aggregation[, default]) where
+            aggregation is one of AGGREGATIONS and default is used by "mode" for empty groups.
+    """
+
+    AGGREGATIONS = ("sum", "mean", "std", "count", "nunique", "mode")
+    MOMENT_AGGREGATIONS = ("sum", "mean", "std")
+
+    def __init__(self, key: str, agg_config: dict):
+        unknown = {spec[1] for spec in agg_config.values()} - set(self.AGGREGATIONS)
+        if unknown:
+            raise ValueError(f"Unsupported aggregations: {unknown}")
+
+        self.key = key
+        self.agg_config = agg_config
+
+    def aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregates df by key. Rows with a missing key are ignored, like in groupby.
+        :param df: Input dataframe holding the key and every source column
+        :return: DataFrame with the key column followed by the configured columns, sorted by key
+        :rtype: pd.DataFrame
+        """
+        codes, keys = pd.factorize(df[self.key], sort=True)
+        n_groups = len(keys)
+        has_key = codes >= 0
+        needs_m2 = {spec[0] for spec in self.agg_config.values() if spec[1] == "std"}
+
+        moments = {}  # source column -> (count, sum, m2)
+        value_counts = {}  # source column -> (group, value) pair counts
+        output = {self.key: np.asarray(keys)}
+
+        # Cached per-column intermediates are released once the last aggregate reading the column is done
+        last_use = {spec[0]: out_col for out_col, spec in self.agg_config.items()}
+
+        for out_col, spec in self.agg_config.items():
+            source, how = spec[0], spec[1]
+
+            if how == "count":
+                output[out_col] = np.bincount(codes[has_key & df[source].notna().to_numpy()], minlength=n_groups)
+            elif how in self.MOMENT_AGGREGATIONS:
+                if source not in moments:
+                    moments[source] = group_moments(codes, n_groups, df[source], with_m2=source in needs_m2)
+                output[out_col] = finalize_moments(how, *moments[source])
+            else:
+                if source not in value_counts:
+                    value_counts[source] = group_value_counts(codes, n_groups, df[source])
+                if how == "nunique":
+                    output[out_col] = np.bincount(value_counts[source][0], minlength=n_groups)
+                else:
+                    default = spec[2] if len(spec) > 2 else None
+                    output[out_col] = _most_common_from_counts(*value_counts[source], n_groups, default)
+
+            if last_use[source] == out_col:
+                moments.pop(source, None)
+                value_counts.pop(source, None)
+
+        return pd.DataFrame(output)
+
+
+def merge_moments(a: tuple, b: tuple) -> tuple:
+    """
+    Combines two (count, total, m2) moments of the same groups with Chan's parallel formula,
+    the incremental (Welford) update generalised from one value to a batch of values.
+    """
+    (n_a, total_a, m2_a), (n_b, total_b, m2_b) = a, b
+    n = n_a + n_b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = total_b / n_b - total_a / n_a
+        correction = np.where((n_a > 0) & (n_b > 0), delta * delta * n_a * n_b / n, 0.0)
+    return n, total_a + total_b, m2_a + m2_b + correction
+
+
+def _reserve(array: np.ndarray, size: int, fill=0) -> np.ndarray:
+    # Grows array to at least size entries by doubling its capacity, so appends are amortized O(appended)
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class _FrequencyTable:
+    """
+    (customer code, value, count) rows of one source column, updated in place. The rows of a customer are
+    chained from first_row[code] through next_row, so the rows of some customers are found by following their
+    chains instead of scanning the table. Values are coded against a vocabulary that only grows.
+    Arrays are over-allocated: only the first size rows are used.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.codes = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.next_row = np.zeros(0, dtype=np.int64)
+        self.first_row = np.zeros(0, dtype=np.int64)  # by customer code, -1 for customers without rows
+        self.vocabulary = np.zeros(0, dtype=object)
+        self._value_codes = {}
+
+    def reserve_customers(self, n_customers: int):
+        self.first_row = _reserve(self.first_row, n_customers, fill=-1)
+
+    def _encode(self, uniques: np.ndarray) -> np.ndarray:
+        # Vocabulary codes of distinct values, unseen values are appended
+        uniques = np.asarray(uniques)
+        if len(self.vocabulary) and len(uniques) and uniques.dtype != self.vocabulary.dtype:
+            # e.g. int months followed by a batch with missing months: values are read back like a full recompute
+            self.vocabulary = self.vocabulary.astype(np.result_type(self.vocabulary, uniques))
+        codes = np.fromiter((self._value_codes.get(value, -1) for value in uniques), dtype=np.int64, count=len(uniques))
+        unseen = np.flatnonzero(codes < 0)
+        if len(unseen):
+            codes[unseen] = np.arange(len(self.vocabulary), len(self.vocabulary) + len(unseen))
+            new_values = uniques[unseen]
+            self.vocabulary = np.concatenate([self.vocabulary, new_values]) if len(self.vocabulary) else new_values
+            self._value_codes.update(zip(new_values, codes[unseen].tolist()))
+        return codes
+
+    def rows_of(self, codes: np.ndarray) -> np.ndarray:
+        """
+        :param codes: Customer codes
+        :return: Rows of those customers
+        """
+        found = [np.zeros(0, dtype=np.int64)]
+        rows = self.first_row[codes]
+        while len(rows):
+            rows = rows[rows >= 0]
+            found.append(rows)
+            rows = self.next_row[rows]
+        return np.concatenate(found)
+
+    def _find(self, codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+        # Row of every (code, value) pair, -1 for pairs without one
+        rows = np.full(len(codes), -1, dtype=np.int64)
+        pending, candidates = np.arange(len(codes)), self.first_row[codes]
+        while len(pending):
+            live = candidates >= 0
+            pending, candidates = pending[live], candidates[live]
+            hit = self.values[candidates] == values[pending]
+            rows[pending[hit]] = candidates[hit]
+            pending, candidates = pending[~hit], self.next_row[candidates[~hit]]
+        return rows
+
+    def add(self, codes: np.ndarray, values: np.ndarray, uniques: np.ndarray, counts: np.ndarray):
+        """
+        Adds counts to the (codes[i], uniques[values[i]]) pairs, in place.
+        :param codes: Customer codes, already reserved
+        :param values: Positions in uniques, each (code, value) pair given once
+        :param uniques: Distinct values
+        :param counts: Occurrences of every pair
+        """
+        values = self._encode(uniques)[values]
+        rows = self._find(codes, values)
+        seen = rows >= 0
+        self.counts[rows[seen]] += counts[seen]
+        codes, values, counts = codes[~seen], values[~seen], counts[~seen]
+        if not len(codes):
+            return
+
+        new_rows = np.arange(self.size, self.size + len(codes))
+        self.size += len(codes)
+        for name in ("codes", "values", "counts", "next_row"):
+            setattr(self, name, _reserve(getattr(self, name), self.size))
+        self.codes[new_rows], self.values[new_rows], self.counts[new_rows] = codes, values, counts
+
+        # New rows are chained in front of the rows their customer already has
+        order = np.argsort(codes, kind="stable")
+        codes, new_rows = codes[order], new_rows[order]
+        same_customer = codes[1:] == codes[:-1]
+        self.next_row[new_rows] = np.where(np.r_[same_customer, False], np.r_[new_rows[1:], -1], self.first_row[codes])
+        first = np.r_[True, ~same_customer]
+        self.first_row[codes[first]] = new_rows[first]
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "code": self.codes[: self.size],
+                "value": self.vocabulary[self.values[: self.size]],
+                "count": self.counts[: self.size],
+            }
+        )
+
+
+def _read_state_meta(directory: Path) -> dict:
+    path = directory / STATE_META_FILE_NAME
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _write_state_meta(directory: Path, meta: dict):
+    staged = directory / f".{STATE_META_FILE_NAME}"
+    staged.write_text(json.dumps(meta))
+    os.replace(staged, directory / STATE_META_FILE_NAME)
+
+
+class CustomerAggregateState:
+    """
+    Mergeable per-customer partial aggregates from which the CustomerAggregationEngine output
+    can be rebuilt: non-null counts, moments (count, sum and squared deviations from the mean,
+    merged with Chan's parallel formula) and (customer, value) frequency tables, which also hold
+    the sets of values needed by "nunique". Its size grows with customers, not transactions.
+    Customers keep the position (code) they were first seen at and every array is updated in place
+    at the codes of new transactions, over-allocated for new customers, so folding a batch in costs
+    in proportion to the batch, not to the history.
+    Attributes:
+        key (str): Column to group by.
+        agg_config (dict): Same configuration as CustomerAggregationEngine.
+        n_customers (int): Customers seen so far, arrays by customer code only use their first n_customers entries.
+        counts (dict): Source column -> non-null counts by customer code.
+        moments (dict): Source column -> dict of n, total and m2 arrays by customer code.
+        frequencies (dict): Source column -> (code, value, count) rows chained by customer code.
+    """
+
+    def __init__(self, key: str, agg_config: dict):
+        CustomerAggregationEngine(key, agg_config)  # validates the configuration
+
+        self.key = key
+        self.agg_config = agg_config
+        self.n_customers = 0
+        self._keys = np.zeros(0, dtype=object)
+        self._codes_by_key = {}
+        self.counts = {source: np.zeros(0, dtype=np.int64) for source in self._sources(("count",))}
+        self.moments = {
+            source: {"n": np.zeros(0, dtype=np.int64), "total": np.zeros(0), "m2": np.zeros(0)}
+            for source in self._sources(CustomerAggregationEngine.MOMENT_AGGREGATIONS)
+        }
+        self.frequencies = {source: _FrequencyTable() for source in self._sources(("nunique", "mode"))}
+
+    def _sources(self, kinds) -> list:
+        return list(dict.fromkeys(spec[0] for spec in self.agg_config.values() if spec[1] in kinds))
+
+    @property
+    def keys(self) -> pd.Index:
+        """Customers seen so far, in order of first appearance."""
+        return pd.Index(self._keys[: self.n_customers], name=self.key, dtype=object)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, key: str, agg_config: dict) -> "CustomerAggregateState":
+        """
+        Computes the partial aggregates of one chunk of transactions.
+        :param df: Chunk holding the key and every source column
+        :return: CustomerAggregateState for the customers in the chunk
+        """
+        state = cls(key, agg_config)
+        codes, keys = pd.factorize(df[key])
+        n_groups = len(keys)
+        # Plain values rather than per-chunk categoricals, so that states of different chunks align
+        state._codes(np.asarray(keys, dtype=object))
+
+        for source, counts in state.counts.items():
+            valid = (codes >= 0) & df[source].notna().to_numpy()
+            counts[:n_groups] = np.bincount(codes[valid], minlength=n_groups)
+
+        for source, moments in state.moments.items():
+            for col, values in zip(MOMENT_COLUMNS, group_moments(codes, n_groups, df[source])):
+                moments[col][:n_groups] = values
+
+        for source, frequencies in state.frequencies.items():
+            pair_groups, pair_values, pair_counts, uniques = group_value_counts(codes, n_groups, df[source])
+            frequencies.add(pair_groups, pair_values, np.asarray(uniques), pair_counts)
+
+        return state
+
+    def _codes(self, keys: np.ndarray) -> np.ndarray:
+        # Codes of keys, unseen customers are appended with empty aggregates
+        codes = np.fromiter((self._codes_by_key.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+        unseen = np.flatnonzero(codes < 0)
+        if len(unseen):
+            codes[unseen] = np.arange(self.n_customers, self.n_customers + len(unseen))
+            self.n_customers += len(unseen)
+            self._keys = _reserve(self._keys, self.n_customers)
+            self._keys[codes[unseen]] = keys[unseen]
+            self._codes_by_key.update(zip(keys[unseen].tolist(), codes[unseen].tolist()))
+            for source, counts in self.counts.items():
+                self.counts[source] = _reserve(counts, self.n_customers)
+            for moments in self.moments.values():
+                for col, values in moments.items():
+                    moments[col] = _reserve(values, self.n_customers)
+            for frequencies in self.frequencies.values():
+                frequencies.reserve_customers(self.n_customers)
+        return codes
+
+    def update(self, other: "CustomerAggregateState") -> pd.Index:
+        """
+        Folds the aggregates of new transactions into this state, in place, touching only the customers of other.
+        :param other: State built with the same key and configuration, e.g. from a batch of new transactions
+        :return: The customers of other, whose finalized aggregates changed
+        """
+        n_other = other.n_customers
+        codes = self._codes(other._keys[:n_other])
+
+        for source, counts in self.counts.items():
+            counts[codes] += other.counts[source][:n_other]
+
+        for source, moments in self.moments.items():
+            current = tuple(moments[col][codes] for col in MOMENT_COLUMNS)
+            incoming = tuple(other.moments[source][col][:n_other] for col in MOMENT_COLUMNS)
+            for col, merged in zip(MOMENT_COLUMNS, merge_moments(current, incoming)):
+                moments[col][codes] = merged
+
+        for source, frequencies in self.frequencies.items():
+            incoming = other.frequencies[source]
+            rows = slice(0, incoming.size)
+            frequencies.add(
+                codes[incoming.codes[rows]], incoming.values[rows], incoming.vocabulary, incoming.counts[rows]
+            )
+
+        return other.keys
+
+    def merge(self, other: "CustomerAggregateState") -> "CustomerAggregateState":
+        """
+        Combines two partial states into a new one, as if their transactions had been aggregated together.
+        :param other: State built with the same key and configuration
+        :return: Merged CustomerAggregateState
+        """
+        merged = CustomerAggregateState(self.key, self.agg_config)
+        merged.update(self)
+        merged.update(other)
+        return merged
+
+    def _write(self, directory: Path):
+        # One row per customer with its counts and moments, one (code, value, count) table per source column
+        directory.mkdir(parents=True, exist_ok=True)
+        storage = get_storage("parquet")
+        n = self.n_customers
+
+        customers_df = pd.DataFrame({self.key: self._keys[:n]})
+        for source, counts in self.counts.items():
+            customers_df[f"{source}.count"] = counts[:n]
+        for source, moments in self.moments.items():
+            for col in MOMENT_COLUMNS:
+                customers_df[f"{source}.{col}"] = moments[col][:n]
+        storage.write(customers_df, directory / "customers.parquet")
+
+        for source, frequencies in self.frequencies.items():
+            storage.write(frequencies.frame(), directory / f"frequencies_{source}.parquet")
+
+    @classmethod
+    def _read(cls, directory: Path, key: str, agg_config: dict) -> "CustomerAggregateState":
+        storage = get_storage("parquet")
+        state = cls(key, agg_config)
+
+        customers_df = storage.read(directory / "customers.parquet")
+        n = len(customers_df)
+        state._codes(customers_df[key].to_numpy(dtype=object))
+        for source, counts in state.counts.items():
+            counts[:n] = customers_df[f"{source}.count"].to_numpy()
+        for source, moments in state.moments.items():
+            for col in MOMENT_COLUMNS:
+                moments[col][:n] = customers_df[f"{source}.{col}"].to_numpy()
+        for source, frequencies in state.frequencies.items():
+            frequencies_df = storage.read(directory / f"frequencies_{source}.parquet")
+            values, uniques = pd.factorize(frequencies_df["value"])
+            frequencies.add(
+                frequencies_df["code"].to_numpy(), values, np.asarray(uniques), frequencies_df["count"].to_numpy()
+            )
+
+        return state
+
+    def save(self, directory) -> Path:
+        """
+        Persists the whole state as a new snapshot in directory, as Parquet files, and drops the delta log.
+        :param directory: Directory to write to, created when missing
+        :return: The directory
+        """
+        directory = Path(directory)
+        previous = _read_state_meta(directory)
+        generation = previous.get("generation", 0) + 1
+        self._write(directory / f"snapshot-{generation}")
+        _write_state_meta(directory, {"generation": generation, "deltas": 0})
+
+        if previous:
+            shutil.rmtree(directory / f"snapshot-{previous['generation']}", ignore_errors=True)
+            for delta in range(1, previous["deltas"] + 1):
+                shutil.rmtree(directory / f"delta-{previous['generation']}-{delta}", ignore_errors=True)
+        return directory
+
+    def save_update(self, directory, batch: "CustomerAggregateState", max_deltas: int = AGGREGATE_STATE_MAX_DELTAS):
+        """
+        Persists update(batch) of a state loaded from directory by appending batch to the delta log of the
+        snapshot, so the write is the size of the batch. Once the log holds max_deltas batches the whole state
+        is saved as a new snapshot instead, which bounds the log replayed by load.
+        :param directory: Directory the state was loaded from, a state without a snapshot is saved whole
+        :param batch: State that was folded into this one with update
+        :param max_deltas: Batches logged before the state is compacted into a new snapshot
+        :return: The directory
+        """
+        directory = Path(directory)
+        meta = _read_state_meta(directory)
+        if not meta or meta["deltas"] >= max_deltas:
+            return self.save(directory)
+
+        deltas = meta["deltas"] + 1
+        batch._write(directory / f"delta-{meta['generation']}-{deltas}")
+        _write_state_meta(directory, {"generation": meta["generation"], "deltas": deltas})
+        return directory
+
+    @classmethod
+    def load(cls, directory, key: str, agg_config: dict) -> "CustomerAggregateState":
+        """
+        Reads a state written by save and save_update: the latest snapshot with its delta log folded in.
+        :param directory: Directory the state was saved to
+        :return: CustomerAggregateState
+        :raises FileNotFoundError: When no state was saved to directory
+        """
+        directory = Path(directory)
+        meta = _read_state_meta(directory)
+        if not meta:
+            raise FileNotFoundError(f"No customer aggregate state at {directory}")
+
+        state = cls._read(directory / f"snapshot-{meta['generation']}", key, agg_config)
+        for delta in range(1, meta["deltas"] + 1):
+            state.update(cls._read(directory / f"delta-{meta['generation']}-{delta}", key, agg_config))
+        return state
+
+    @staticmethod
+    def signature(directory):
+        """
+        Changes whenever a snapshot or a delta is saved to directory, None when nothing was saved there.
+        """
+        try:
+            stat = os.stat(Path(directory) / STATE_META_FILE_NAME)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def to_frame(self, keys=None) -> pd.DataFrame:
+        """
+        Finalizes the partial aggregates into the CustomerAggregationEngine output.
+        :param keys: Optional customers to finalize, e.g. the ones returned by update, defaults to every customer
+        :return: DataFrame with the key column followed by the configured columns, sorted by key
+        :rtype: pd.DataFrame
+        """
+        if keys is None:
+            codes = np.arange(self.n_customers)
+        else:
+            codes = np.fromiter((self._codes_by_key.get(k, -1) for k in keys), dtype=np.int64)
+            codes = codes[codes >= 0]
+        codes = codes[np.argsort(self._keys[codes], kind="stable")]
+        n_groups = len(codes)
+        positions = pd.Index(codes)
+
+        output = {self.key: self._keys[codes]}
+        pairs = {}  # source column -> (output row, row) of the frequency rows of the selected customers
+        for out_col, spec in self.agg_config.items():
+            source, how = spec[0], spec[1]
+
+            if how == "count":
+                output[out_col] = self.counts[source][codes]
+            elif how in CustomerAggregationEngine.MOMENT_AGGREGATIONS:
+                moments = self.moments[source]
+                output[out_col] = finalize_moments(how, *(moments[col][codes] for col in MOMENT_COLUMNS))
+            else:
+                frequencies = self.frequencies[source]
+                if source not in pairs:
+                    rows = np.arange(frequencies.size) if keys is None else frequencies.rows_of(codes)
+                    pairs[source] = positions.get_indexer(frequencies.codes[rows]), rows
+                pair_groups, rows = pairs[source]
+                if how == "nunique":
+                    output[out_col] = np.bincount(pair_groups, minlength=n_groups)
+                else:
+                    pair_values, uniques = pd.factorize(frequencies.vocabulary[frequencies.values[rows]], sort=True)
+                    order = np.lexsort((pair_values, pair_groups))
+                    default = spec[2] if len(spec) > 2 else None
+                    output[out_col] = _most_common_from_counts(
+                        pair_groups[order],
+                        pair_values[order],
+                        frequencies.counts[rows][order],
+                        uniques,
+                        n_groups,
+                        default,
+                    )
+
+        return pd.DataFrame(output)
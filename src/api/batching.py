@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any, Callable, Sequence
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batches for a vectorized predict function.
+    Items wait until max_batch_size items are queued or max_wait_ms has passed since the first one,
+    the whole batch is then scored in a worker thread and each awaiting caller gets its own result.
+    Attributes:
+        predict_batch (Callable): Scores a list of items, returns one result per item in the same order.
+        max_batch_size (int): Largest number of items scored in one call.
+        max_wait_ms (float): Longest time the first item of a batch waits for more items.
+    """
+
+    def __init__(self, predict_batch: Callable[[list], Sequence], max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._loop = None
+        self._queue = None
+        self._worker = None
+
+    def _ensure_started(self):
+        # The queue and worker belong to the event loop serving the requests, which is only known here
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queues one item and waits for its result.
+        :param item: Single item accepted by predict_batch
+        :return: The result predict_batch returned for this item
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Items that are already queued never wait for the deadline
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await asyncio.to_thread(self.predict_batch, items)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():  # the caller may have gone away
+                    future.set_result(result)
+
+    async def stop(self):
+        """
+        Cancels the worker, requests still queued fail with CancelledError.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+        self._worker = None
+        self._loop = None
@@ -0,0 +1,120 @@
+import json
+import numbers
+import operator
+from pathlib import Path
+
+import numpy as np
+
+from scripts.constants import ARTIFACTS_DIR, CHANNEL_WOE_FILE_NAME, FEATURE_ORDER, Aggregated_Columns
+
+CHANNEL_COL = Aggregated_Columns.MostCommonChannel.value
+
+
+class RequestEncoder:
+    """
+    Turns validated requests into float64 model rows without building a frame per request.
+    The column order is compiled once into a single attribute getter. MostCommonChannel labels
+    are encoded through a label -> WoE table, numeric channel values are taken as already WoE encoded.
+    Attributes:
+        feature_order (list): Model input columns.
+        channel_woe (dict): MostCommonChannel label -> WoE value.
+    """
+
+    def __init__(self, feature_order: list = FEATURE_ORDER, channel_woe: dict = None):
+        self.feature_order = list(feature_order)
+        self.channel_woe = dict(channel_woe or {})
+        self._getter = operator.attrgetter(*self.feature_order)
+        self._channel_position = self.feature_order.index(CHANNEL_COL)
+
+    def encode_channel(self, value) -> float:
+        """
+        :param value: WoE value or channel label
+        :return: The WoE value of the channel
+        :raises ValueError: For labels missing from channel_woe
+        """
+        if isinstance(value, numbers.Number):
+            return value
+        if value not in self.channel_woe:
+            raise ValueError(
+                f"Unknown {CHANNEL_COL} {value!r}, expected a WoE value or one of {list(self.channel_woe)}"
+            )
+        return self.channel_woe[value]
+
+    def values(self, request) -> list:
+        """
+        :param request: Validated PredictionRequest
+        :return: Feature values in feature_order, with the channel encoded
+        """
+        values = list(self._getter(request))
+        values[self._channel_position] = self.encode_channel(values[self._channel_position])
+        return values
+
+    def row(self, request) -> np.ndarray:
+        """
+        :param request: Validated PredictionRequest
+        :return: float64 array of shape (n_features,)
+        """
+        return np.array(self.values(request), dtype=np.float64)
+
+    def matrix(self, requests: list, out: np.ndarray = None) -> np.ndarray:
+        """
+        Fills one row per request, in input order.
+        :param requests: Validated PredictionRequest objects
+        :param out: Optional preallocated float64 buffer of shape (len(requests), n_features)
+        :return: The filled buffer
+        """
+        if out is None:
+            out = np.empty((len(requests), len(self.feature_order)), dtype=np.float64)
+        for i, request in enumerate(requests):
+            out[i] = self.values(request)
+        return out
+
+    def columns_matrix(self, columns) -> np.ndarray:
+        """
+        :param columns: Validated PredictionColumns, one list per feature
+        :return: float64 array of shape (n_rows, n_features)
+        """
+        out = np.empty((len(getattr(columns, CHANNEL_COL)), len(self.feature_order)), dtype=np.float64)
+        for j, col in enumerate(self.feature_order):
+            values = getattr(columns, col)
+            out[:, j] = [self.encode_channel(value) for value in values] if col == CHANNEL_COL else values
+        return out
+
+    def frame(self, matrix: np.ndarray):
+        """
+        Wraps rows in the named columns the registered model expects, without copying them.
+        pandas is only imported by models that need a frame.
+        """
+        import pandas as pd
+
+        return pd.DataFrame(matrix, columns=self.feature_order, copy=False)
+
+
+def save_channel_woe(woe_transformer, path=None):
+    """
+    Writes the fitted MostCommonChannel WoE values as a label -> WoE json table for the api.
+    Low-volume channels that were merged while fitting get the WoE of the merged bin.
+    :param woe_transformer: Fitted WoeTransformer
+    :param path: Destination, defaults to CHANNEL_WOE_FILE_NAME under ARTIFACTS_DIR
+    """
+    from ..woe_transformer import OTHER_LABEL
+
+    path = Path(path) if path is not None else Path(ARTIFACTS_DIR) / CHANNEL_WOE_FILE_NAME
+    woe_map = woe_transformer.woe_maps[CHANNEL_COL]
+    table = {str(label): float(woe) for label, woe in woe_map.items()}
+    if OTHER_LABEL in woe_map:
+        table.update(
+            {str(label): float(woe_map[OTHER_LABEL]) for label in woe_transformer.category_merge_map[CHANNEL_COL]}
+        )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(table, indent=2))
+    print(f"Saved {CHANNEL_COL} WoE table to {path}")
+
+
+def load_channel_woe(path=None) -> dict:
+    """
+    Reads the table written by save_channel_woe, an empty table when it does not exist.
+    """
+    path = Path(path) if path is not None else Path(ARTIFACTS_DIR) / CHANNEL_WOE_FILE_NAME
+    return json.loads(path.read_text()) if path.exists() else {}
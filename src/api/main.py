@@ -1,51 +1,314 @@
-from fastapi import FastAPI
-import pandas as pd
-from .model_loader import load_model
-from .pydantic_models import PredictionRequest, PredictionResponse
-from scripts.constants import Aggregated_Columns
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+import numpy as np
+import psutil
+from ..feature_store import CustomerFeatureStore
+from .batching import MicroBatcher
+from .features import RequestEncoder, load_channel_woe
+from .model_loader import load_model_version, resolve_production_version, score_matrix
+from .prediction_cache import PredictionCache
+from .pydantic_models import (
+    BatchPredictionRequest,
+    BatchPredictionResponse,
+    CustomerPredictionResponse,
+    PredictionRequest,
+    PredictionResponse,
+)
+from .serving import RegistryWatcher, ServingModel
+from .structured_logging import get_logger
+from scripts.constants import (
+    FEATURE_ORDER,
+    FEATURE_STORE_EXPORT_CHUNK_ROWS,
+    MODEL_LOAD_MODE,
+    MODEL_WATCH_INTERVAL,
+    PREDICT_CACHE_SIZE,
+    PREDICT_CACHE_TTL_SECONDS,
+    PREDICT_MAX_BATCH_SIZE,
+    PREDICT_MAX_WAIT_MS,
+)
 from pathlib import Path
 
 project_root = Path.cwd().parent
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if load_mode == "background":
+        serving.start()
+    if watcher is not None:
+        watcher.start()
+    yield
+    if watcher is not None:
+        watcher.stop()
+    if batcher is not None:
+        await batcher.stop()
+
+
 """Initialize FastAPI app"""
 app = FastAPI(
     title="Credit Risk Prediction API",
     description="Predict customer credit risk using MLFlow deployed model",
     version="1.0",
+    lifespan=lifespan,
 )
 
-""" Load the MLFlow model """
-model = load_model()
+logger = get_logger("credit_risk_api")
 
 
-FEATURE_ORDER = [
-    Aggregated_Columns.TransactionCount.value,
-    Aggregated_Columns.TotalTransactionAmount.value,
-    Aggregated_Columns.UniqueProductCategoryCount.value,
-    Aggregated_Columns.TransactionAmountSTD.value,
-    Aggregated_Columns.AverageTransactionHour.value,
-    Aggregated_Columns.AverageTransactionAmount.value,
-    Aggregated_Columns.MostCommonChannel.value,
-    Aggregated_Columns.MostCommonTransactionDay.value,
-    Aggregated_Columns.MostCommonTransactionMonth.value,
-]
+""" Requests are encoded straight into float rows in FEATURE_ORDER """
+encoder = RequestEncoder(FEATURE_ORDER, load_channel_woe())
 
 
-@app.post("/predict", response_model=PredictionResponse)
-def predict_risk(request: PredictionRequest):
+def encode(encode_fn, payload):
+    """
+    Runs an encoder method, unknown channel labels are rejected as invalid input
+    """
+    try:
+        return encode_fn(payload)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
+
+
+def loaded_model():
+    """
+    Returns the served LoadedModel, requests arriving before it is loaded are answered with 503
+    """
+    loaded = serving.current
+    if loaded is None:
+        serving.start()  # first use loads the model when the app was not started with a lifespan
+        raise HTTPException(status_code=503, detail=f"Model is {serving.status}", headers={"Retry-After": "1"})
+    return loaded
+
+
+def score_rows(rows: list) -> list:
     """
-    Predict credit risk probability for a single customer
+    Scores a list of encoded rows, used by the micro-batcher.
+    Returns one (risk probability, LoadedModel) pair per row, a batch is scored by a single model, so the
+    version and the threshold that go with a score are the ones of the model that computed it.
     """
+    loaded = serving.current
+    return [(score, loaded) for score in score_matrix(loaded, np.vstack(rows))]
+
+
+def warm_up(loaded):
+    """
+    Scores a row of zeros, so the first requests on a newly loaded model do not pay for lazy initialization
+    """
+    score_matrix(loaded, np.zeros((1, len(FEATURE_ORDER))))
+
 
-    input_df = pd.DataFrame([request.dict()])
+""" Load the MLFlow model, during import (eager) or in a background thread once the app started (background) """
+load_mode = os.getenv("MODEL_LOAD_MODE", MODEL_LOAD_MODE)
+serving = ServingModel(load_model_version, warm_up)
+if load_mode == "eager":
+    serving.load()
 
-    input_df = input_df[FEATURE_ORDER]
-    print(input_df)
+""" Swap in new Production versions as they are promoted, unless the served version is pinned with MODEL_VERSION """
+watch_interval = float(os.getenv("MODEL_WATCH_INTERVAL", MODEL_WATCH_INTERVAL))
+watcher = None
+if watch_interval > 0 and not os.getenv("MODEL_VERSION"):
+    watcher = RegistryWatcher(serving, resolve_production_version, watch_interval)
 
-    # Predict probability
-    risk_probability = model.predict(input_df)[0]
+
+""" Coalesce concurrent /predict requests, a max batch size of 1 turns batching off """
+max_batch_size = int(os.getenv("PREDICT_MAX_BATCH_SIZE", PREDICT_MAX_BATCH_SIZE))
+max_wait_ms = float(os.getenv("PREDICT_MAX_WAIT_MS", PREDICT_MAX_WAIT_MS))
+batcher = MicroBatcher(score_rows, max_batch_size, max_wait_ms) if max_batch_size > 1 else None
+
+""" Serve repeated feature vectors from a cache of the served version's scores, a size of 0 turns it off """
+cache_size = int(os.getenv("PREDICT_CACHE_SIZE", PREDICT_CACHE_SIZE))
+cache_ttl_seconds = float(os.getenv("PREDICT_CACHE_TTL_SECONDS", PREDICT_CACHE_TTL_SECONDS))
+cache = PredictionCache(cache_size, cache_ttl_seconds) if cache_size > 0 else None
+
+
+async def score_row(row: np.ndarray, loaded) -> tuple:
+    """
+    Scores one encoded row, from the prediction cache when it is on, through the micro-batcher unless batching is off.
+    Returns the risk probability and the LoadedModel that scored it, which can be newer than loaded when
+    a new version was swapped in while the row waited in the micro-batcher.
+    """
+    cached = cache.lookup(loaded.version, row[np.newaxis]) if cache is not None else None
+    if cached is not None and not cached[2][0]:
+        return cached[1][0], loaded
+
+    if batcher is not None:
+        risk_probability, loaded = await batcher.submit(row)
+    else:
+        risk_probability = (await run_in_threadpool(score_matrix, loaded, row[np.newaxis]))[0]
+    if cached is not None:
+        cache.store(loaded.version, cached[0], [risk_probability])
+    return risk_probability, loaded
+
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict_risk(request: PredictionRequest):
+    """
+    Predict credit risk probability for a single customer.
+    Concurrent requests are scored together by the micro-batcher unless batching is turned off,
+    feature vectors scored recently by the served model are answered from the prediction cache when it is on.
+    """
+    loaded = loaded_model()
+    row = encode(encoder.row, request)
+    risk_probability, loaded = await score_row(row, loaded)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("prediction", extra={"features": row.tolist(), "risk_probability": float(risk_probability)})
 
     return PredictionResponse(
         risk_probability=float(risk_probability),
-        is_high_risk=int(risk_probability >= 0.5),
+        is_high_risk=int(risk_probability >= loaded.threshold),
+        model_version=loaded.version,
     )
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_risk_batch(request: BatchPredictionRequest):
+    """
+    Predict credit risk probability for many customers with a single model call.
+    Results are returned in input order, only the rows missing from the prediction cache are scored when it is on.
+    """
+    loaded = loaded_model()
+    if request.records is not None:
+        matrix = encode(encoder.matrix, request.records)
+    else:
+        matrix = encode(encoder.columns_matrix, request.columns)
+    if not len(matrix):
+        return BatchPredictionResponse(risk_probability=[], is_high_risk=[], model_version=loaded.version)
+
+    if cache is None:
+        risk_probability = score_matrix(loaded, matrix)
+    else:
+        keys, risk_probability, missing = cache.lookup(loaded.version, matrix)
+        if missing.any():
+            risk_probability[missing] = score_matrix(loaded, matrix[missing])
+            cache.store(loaded.version, [key for key, miss in zip(keys, missing) if miss], risk_probability[missing])
+    is_high_risk = (risk_probability >= loaded.threshold).astype(int)
+    logger.info("batch prediction", extra={"rows": len(matrix), "high_risk": int(is_high_risk.sum())})
+
+    return BatchPredictionResponse(
+        risk_probability=risk_probability.tolist(),
+        is_high_risk=is_high_risk.tolist(),
+        model_version=loaded.version,
+    )
+
+
+""" Customers are scored from the feature store published by the pipeline, reopened when a new generation lands """
+feature_store_dir = os.getenv("FEATURE_STORE_DIR")
+feature_store = None
+
+
+def customer_features() -> CustomerFeatureStore:
+    """
+    Returns the latest published feature store, 503 until the pipeline published one
+    """
+    global feature_store
+    if feature_store is None or feature_store.is_stale():
+        try:
+            store = CustomerFeatureStore.open(feature_store_dir)
+        except FileNotFoundError as error:
+            if feature_store is None:
+                raise HTTPException(status_code=503, detail=str(error)) from None
+            return feature_store  # the previous generation keeps serving
+        if store.feature_order != FEATURE_ORDER:
+            raise HTTPException(
+                status_code=503, detail=f"Feature store columns {store.feature_order} do not match {FEATURE_ORDER}"
+            )
+        feature_store = store
+    return feature_store
+
+
+@app.get("/predict/customer/{customer_id}", response_model=CustomerPredictionResponse)
+async def predict_customer(customer_id: str):
+    """
+    Predict credit risk probability for a customer from the features stored by the pipeline, O(1) lookup by CustomerId.
+    """
+    loaded = loaded_model()
+    store = customer_features()
+    if customer_id not in store:
+        raise HTTPException(status_code=404, detail=f"CustomerId {customer_id!r} is not in the feature store")
+    risk_probability, loaded = await score_row(np.array(store.row(customer_id)), loaded)
+
+    return CustomerPredictionResponse(
+        CustomerId=customer_id,
+        risk_probability=float(risk_probability),
+        is_high_risk=int(risk_probability >= loaded.threshold),
+        model_version=loaded.version,
+    )
+
+
+def export_scores(store: CustomerFeatureStore, loaded, chunk_rows: int):
+    """
+    Yields csv lines scoring every customer of a feature store, one model call per chunk_rows customers.
+    """
+    yield "CustomerId,risk_probability,is_high_risk,model_version\n"
+    for start in range(0, len(store), chunk_rows):
+        risk_probability = score_matrix(loaded, np.asarray(store.features[start : start + chunk_rows]))
+        customer_ids = store.customer_ids[start : start + chunk_rows].tolist()
+        yield "".join(
+            f"{customer_id},{score!r},{int(score >= loaded.threshold)},{loaded.version}\n"
+            for customer_id, score in zip(customer_ids, risk_probability.tolist())
+        )
+
+
+@app.get("/predict/customers")
+def predict_customers():
+    """
+    Bulk export: scores every customer of the feature store and streams the results as csv,
+    every row is scored by the same model version and feature store generation.
+    """
+    loaded = loaded_model()
+    store = customer_features()
+    logger.info("customer export", extra={"customers": len(store), "model_version": loaded.version})
+    return StreamingResponse(
+        export_scores(store, loaded, FEATURE_STORE_EXPORT_CHUNK_ROWS),
+        media_type="text/csv",
+        headers={"X-Model-Version": loaded.version},
+    )
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Prediction cache hit/miss counters and size, to size PREDICT_CACHE_SIZE and PREDICT_CACHE_TTL_SECONDS
+    """
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.get("/health/live")
+def health_live():
+    """
+    Liveness: the process is up and serving http, whether or not the model is loaded
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """
+    Readiness: 200 once the model is loaded, 503 while it is loading or after its load failed
+    """
+    if serving.status != "ready":
+        if serving.status == "not_started":
+            serving.start()
+        return JSONResponse(status_code=503, content={"status": serving.status, "error": serving.error})
+
+    loaded = serving.current
+    return {
+        "status": "ready",
+        "model_version": loaded.version,
+        "model_type": type(loaded.model).__name__,
+        "timings": {"startup": startup_seconds, **loaded.timings},
+    }
+
+
+""" Seconds from process start until the app was importable, the model load is timed separately """
+startup_seconds = time.time() - psutil.Process().create_time()
+logger.info("api imported", extra={"load_mode": load_mode, "startup_seconds": round(startup_seconds, 3)})
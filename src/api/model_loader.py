@@ -1,11 +1,267 @@
-import mlflow.pyfunc
-from scripts.constants import MODEL_NAME, MODEL_STAGE
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from scripts.constants import (
+    DEFAULT_RISK_THRESHOLD,
+    FEATURE_ORDER,
+    HIGH_RISK_THRESHOLD,
+    MODEL_CACHE_DIR,
+    MODEL_NAME,
+    MODEL_STAGE,
+    NATIVE_SCORER_ARTIFACT_PATH,
+    THRESHOLD_TABLE_ARTIFACT_PATH,
+)
+from ..registry.native_scorer import NativeScorer
+from .structured_logging import get_logger
+
+# mlflow is only imported while a model is resolved or loaded, not when the api is imported
+PYFUNC_DIR_NAME = "pyfunc"
+# Last version the registry reported in Production, under MODEL_CACHE_DIR/<model name>
+PRODUCTION_VERSION_FILE_NAME = "production.json"
+# Registry answers meaning it cannot serve the request right now, as opposed to an answer about the model
+REGISTRY_UNAVAILABLE_ERROR_CODES = ("TEMPORARILY_UNAVAILABLE", "DEADLINE_EXCEEDED")
+
+logger = get_logger("credit_risk_api")
+
+
+class LoadedModel:
+    """
+    A registry version ready to score.
+    Attributes:
+        model: NativeScorer, or the mlflow pyfunc model when the version has no native scorer.
+        version (str): Registry version of the model.
+        timings (dict): Seconds spent in each loading step.
+        threshold (float): Risk probability from which a customer is labelled high risk.
+    """
+
+    def __init__(self, model, version: str, timings: dict = None, threshold: float = DEFAULT_RISK_THRESHOLD):
+        self.model = model
+        self.version = version
+        self.timings = timings or {}
+        self.threshold = threshold
+
+    @property
+    def native(self) -> bool:
+        return isinstance(self.model, NativeScorer)
+
+
+def score_matrix(loaded: LoadedModel, matrix: np.ndarray) -> np.ndarray:
+    """
+    Scores feature rows in FEATURE_ORDER with a single model call, in input order.
+    Versions logged with predict_fn="predict_proba" return one column per class, the positive class is served.
+    """
+    # Native scorers take the rows as they are, pyfunc models need the named columns
+    if loaded.native and loaded.model.feature_names in (None, FEATURE_ORDER):
+        model_input = matrix
+    else:
+        import pandas as pd  # only imported by models that need a frame
+
+        model_input = pd.DataFrame(matrix, columns=FEATURE_ORDER, copy=False)
+    scores = np.asarray(loaded.model.predict(model_input), dtype=float)
+    return scores[:, 1] if scores.ndim == 2 and scores.shape[1] == 2 else scores.ravel()
+
+
+def _cache_root(cache_dir=None) -> Path:
+    return Path(cache_dir or os.getenv("MODEL_CACHE_DIR", MODEL_CACHE_DIR)) / MODEL_NAME
+
+
+def resolve_production_version(cache_dir=None) -> tuple:
+    """
+    Returns the (version, run_id) currently in the Production stage of the registry.
+    The version is recorded in the model cache, it is served when the registry cannot be reached later on.
+    :param cache_dir: Cache root, defaults to the MODEL_CACHE_DIR env var or constant
+    """
+    from mlflow.tracking import MlflowClient
+
+    versions = MlflowClient().get_latest_versions(MODEL_NAME, stages=[MODEL_STAGE])
+    if not versions:
+        raise RuntimeError(f"{MODEL_NAME} has no {MODEL_STAGE} version")
+    version, run_id = versions[0].version, versions[0].run_id
+    _record_production_version(_cache_root(cache_dir), str(version))
+    return version, run_id
+
+
+def _record_production_version(cache_dir: Path, version: str):
+    # Written to a temporary file and renamed, concurrent workers read either the previous or the new version
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=cache_dir, prefix=".production-", delete=False) as file:
+            json.dump({"version": version}, file)
+        os.replace(file.name, cache_dir / PRODUCTION_VERSION_FILE_NAME)
+    except OSError:
+        pass  # a read-only cache only loses the fallback, not the resolved version
+
+
+def _registry_unreachable(error: BaseException) -> bool:
+    # Connection errors and timeouts are OSErrors (requests' included), mlflow raises its own exception from them
+    from mlflow.exceptions import MlflowException
+
+    while error is not None:
+        if isinstance(error, OSError):
+            return True
+        if isinstance(error, MlflowException) and error.error_code in REGISTRY_UNAVAILABLE_ERROR_CODES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _fallback_version(cache_dir: Path):
+    # The last version known to be in Production when it is cached, otherwise the highest cached version
+    cached = _cached_versions(cache_dir) if cache_dir.is_dir() else []
+    try:
+        production = json.loads((cache_dir / PRODUCTION_VERSION_FILE_NAME).read_text())["version"]
+    except (OSError, ValueError, KeyError):
+        production = None
+    if production in cached:
+        return production, f"last known {MODEL_STAGE}"
+    return (cached[-1], "highest cached") if cached else (None, None)
+
+
+def select_threshold(threshold_table: dict = None, choice: str = None) -> float:
+    """
+    Picks the is_high_risk threshold of a version from the threshold table logged with its run.
+    :param threshold_table: Objective -> operating point, None for versions logged without a table
+    :param choice: Objective or number, defaults to the HIGH_RISK_THRESHOLD env var or constant
+    :return: The threshold, DEFAULT_RISK_THRESHOLD when the objective is not in the table
+    """
+    choice = choice or os.getenv("HIGH_RISK_THRESHOLD", HIGH_RISK_THRESHOLD)
+    try:
+        return float(choice)
+    except ValueError:
+        pass
+    if threshold_table and choice in threshold_table:
+        return float(threshold_table[choice]["threshold"])
+    return DEFAULT_RISK_THRESHOLD
+
+
+def _cached_versions(cache_dir: Path) -> list:
+    return sorted((path.name for path in cache_dir.glob("[0-9]*") if path.is_dir()), key=int)
+
+
+def _download(version: str, run_id: str, version_dir: Path):
+    # Fetches the native scorer, or the pyfunc model when there is none, next to the cache entry and
+    # publishes it with a rename, so concurrent workers never load a half-written version
+    import mlflow
+    from mlflow.exceptions import MlflowException
+    from mlflow.tracking import MlflowClient
+
+    if run_id is None:
+        run_id = MlflowClient().get_model_version(MODEL_NAME, version).run_id
+    version_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{version}-", dir=version_dir.parent))
+    try:
+        try:
+            mlflow.artifacts.download_artifacts(
+                run_id=run_id, artifact_path=NATIVE_SCORER_ARTIFACT_PATH, dst_path=str(staging)
+            )
+        except (MlflowException, OSError):
+            mlflow.artifacts.download_artifacts(
+                artifact_uri=f"models:/{MODEL_NAME}/{version}", dst_path=str(staging / PYFUNC_DIR_NAME)
+            )
+        try:
+            mlflow.artifacts.download_artifacts(
+                run_id=run_id, artifact_path=THRESHOLD_TABLE_ARTIFACT_PATH, dst_path=str(staging)
+            )
+        except (MlflowException, OSError):
+            pass  # logged before runs carried a threshold table
+        try:
+            os.rename(staging, version_dir)
+        except OSError:
+            if not version_dir.is_dir():  # otherwise another worker published it first
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _download_pyfunc(version: str, pyfunc_dir: Path):
+    # Adds the pyfunc model to a cache entry that only holds the native scorer of the version
+    import mlflow
+
+    staging = Path(tempfile.mkdtemp(prefix=f".{PYFUNC_DIR_NAME}-", dir=pyfunc_dir.parent))
+    try:
+        mlflow.artifacts.download_artifacts(artifact_uri=f"models:/{MODEL_NAME}/{version}", dst_path=str(staging))
+        try:
+            os.rename(staging, pyfunc_dir)
+        except OSError:
+            if not pyfunc_dir.is_dir():  # otherwise another worker published it first
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _load_cached(version_dir: Path, native: bool = True):
+    if native and (version_dir / NATIVE_SCORER_ARTIFACT_PATH).is_dir():
+        # Mapped read-only, api workers serving the same version share its weights
+        return NativeScorer.load(version_dir / NATIVE_SCORER_ARTIFACT_PATH, mmap_mode="r")
+
+    import mlflow.pyfunc
+
+    return mlflow.pyfunc.load_model(str(version_dir / PYFUNC_DIR_NAME))
+
+
+def load_model_version(version: str = None, run_id: str = None, cache_dir=None, native: bool = True) -> LoadedModel:
+    """
+    Loads a registry version through the local artifact cache (MODEL_CACHE_DIR/<model name>/<version>).
+    A version is downloaded once, later cold starts only ask the registry which version is in Production.
+    When the registry cannot be reached, the cached version last known to be in Production (else the highest cached
+    version) is served with a warning, any other registry error is raised. A version pinned through the
+    MODEL_VERSION env var is loaded without asking the registry, so a cached native scorer never imports mlflow.
+    :param version: Registry version to load, defaults to MODEL_VERSION, then to the current Production version
+    :param run_id: Run of that version, resolved with it when version is not given
+    :param cache_dir: Cache root, defaults to the MODEL_CACHE_DIR env var or constant
+    :param native: Serve the native scorer when the version has one, False loads the pyfunc model
+    :return: LoadedModel with the time spent importing, resolving, downloading and loading
+    :rtype: LoadedModel
+    """
+    cache_dir = _cache_root(cache_dir)
+    timings = {}
+    start = time.perf_counter()
+    version = version or os.getenv("MODEL_VERSION")
+    if version is None:
+        import mlflow  # noqa: F401
+
+        timings["import"] = time.perf_counter() - start
+        try:
+            version, run_id = resolve_production_version(cache_dir.parent)
+        except Exception as error:
+            if not _registry_unreachable(error):
+                raise
+            version, reason = _fallback_version(cache_dir)
+            if version is None:
+                raise
+            logger.warning(
+                "model registry unreachable, serving a cached version",
+                extra={"model_version": version, "reason": reason, "error": str(error)},
+            )
+        timings["resolve"] = time.perf_counter() - start - timings.get("import", 0)
+
+    version_dir = cache_dir / str(version)
+    if not version_dir.is_dir():
+        step = time.perf_counter()
+        _download(str(version), run_id, version_dir)
+        timings["download"] = time.perf_counter() - step
+    if not native and not (version_dir / PYFUNC_DIR_NAME).is_dir():
+        step = time.perf_counter()
+        _download_pyfunc(str(version), version_dir / PYFUNC_DIR_NAME)
+        timings["download"] = timings.get("download", 0) + time.perf_counter() - step
+
+    step = time.perf_counter()
+    model = _load_cached(version_dir, native)
+    table_path = version_dir / THRESHOLD_TABLE_ARTIFACT_PATH
+    threshold = select_threshold(json.loads(table_path.read_text()) if table_path.is_file() else None)
+    timings["load"] = time.perf_counter() - step
+    timings["total"] = time.perf_counter() - start
+    return LoadedModel(model, str(version), timings, threshold)
 
 
 def load_model():
     """
-    Load model from MLflow Model "Registry"
+    Load model from MLflow Model "Registry", preferring its native scorer over the generic pyfunc wrapper
     """
-    model_uri = f"models:/{MODEL_NAME}/{MODEL_STAGE}"
-    model = mlflow.pyfunc.load_model(model_uri)
-    return model
+    return load_model_version().model
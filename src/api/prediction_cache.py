@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+from cachetools import TTLCache
+
+
+class PredictionCache:
+    """
+    Caches risk probabilities by encoded feature row (the FEATURE_ORDER values as float64 bytes) for the
+    served model version. Once max_size rows are cached the least recently used one is evicted, and entries
+    expire ttl_seconds after they were scored. Looking rows up for another model version empties the cache,
+    scores of a version that is no longer served are not stored.
+    Attributes:
+        max_size (int): Most rows cached at once.
+        ttl_seconds (float): Seconds a score is served from the cache.
+        version (str): Model version of the cached scores.
+        hits (int): Rows answered from the cache.
+        misses (int): Rows that had to be scored.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, timer: Callable[[], float] = time.monotonic):
+        if max_size < 1 or ttl_seconds <= 0:
+            raise ValueError(f"max_size and ttl_seconds must be positive, got {max_size} and {ttl_seconds}")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = TTLCache(maxsize=max_size, ttl=ttl_seconds, timer=timer)
+        self._lock = threading.Lock()
+
+    def lookup(self, version: str, matrix: np.ndarray) -> tuple:
+        """
+        Looks up encoded rows scored by a model version.
+        :param version: Version of the model that would score the rows
+        :param matrix: Encoded rows, one per customer
+        :return: (row keys, scores with NaN for the rows that are not cached, boolean mask of those rows)
+        """
+        keys = [row.tobytes() for row in np.asarray(matrix, dtype=np.float64)]
+        scores = np.full(len(keys), np.nan)
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            for i, key in enumerate(keys):
+                score = self._entries.get(key)
+                if score is not None:
+                    scores[i] = score
+            missing = np.isnan(scores)
+            self.misses += int(missing.sum())
+            self.hits += len(keys) - int(missing.sum())
+        return keys, scores, missing
+
+    def store(self, version: str, keys: list, scores):
+        """
+        Stores the scores of rows returned by lookup, unless the model version changed since.
+        """
+        with self._lock:
+            if version != self.version:
+                return
+            for key, score in zip(keys, scores):
+                self._entries[key] = float(score)
+
+    def stats(self) -> dict:
+        """
+        Returns the counters and the current size, to size the cache from the hit rate.
+        """
+        with self._lock:
+            self._entries.expire()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "model_version": self.version,
+            }
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, create_model, model_validator
 
 
 class PredictionRequest(BaseModel):
@@ -8,7 +10,7 @@ class PredictionRequest(BaseModel):
     TransactionAmountSTD: float
     AverageTransactionAmount: float
     AverageTransactionHour: float
-    MostCommonChannel: object
+    MostCommonChannel: Union[float, str]  # WoE value or channel label
     MostCommonTransactionDay: float
     MostCommonTransactionMonth: float
 
@@ -16,3 +18,45 @@ class PredictionRequest(BaseModel):
 class PredictionResponse(BaseModel):
     risk_probability: float
     is_high_risk: int
+    model_version: str  # registry version that scored the request
+
+
+class CustomerPredictionResponse(PredictionResponse):
+    CustomerId: str
+
+
+# One list per PredictionRequest field, validated with the same types
+PredictionColumns = create_model(
+    "PredictionColumns",
+    **{name: (List[field.annotation], ...) for name, field in PredictionRequest.model_fields.items()},
+)
+
+
+class BatchPredictionRequest(BaseModel):
+    """
+    Many customers to score at once, either as a list of records or as one list per feature.
+    Exactly one of the two payloads must be given.
+    """
+
+    records: Optional[List[PredictionRequest]] = None
+    columns: Optional[PredictionColumns] = None
+
+    @model_validator(mode="after")
+    def check_payload(self):
+        if (self.records is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of records or columns")
+        if self.columns is not None:
+            lengths = {len(values) for values in self.columns.__dict__.values()}
+            if len(lengths) > 1:
+                raise ValueError(f"All columns must have the same length, got lengths {sorted(lengths)}")
+        return self
+
+
+class BatchPredictionResponse(BaseModel):
+    """
+    Scores in input order, one entry per customer in each list.
+    """
+
+    risk_probability: List[float]
+    is_high_risk: List[int]
+    model_version: str
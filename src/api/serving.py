@@ -0,0 +1,159 @@
+import threading
+import time
+from typing import Callable
+
+from .structured_logging import get_logger
+
+logger = get_logger("credit_risk_api")
+
+
+class ServingModel:
+    """
+    Holds the model the api scores with and tracks whether it is loaded, so health checks can tell
+    a worker that is still loading apart from one that is ready. Loading runs either in the caller
+    (eager mode) or in a background thread started on app startup or on first use.
+    Newer versions are loaded and warmed up next to the served one, then swapped in with a single
+    assignment: requests that already picked up the old model finish on it.
+    Attributes:
+        loader (Callable): Returns a LoadedModel, for the given version and run_id when they are passed.
+        warmup (Callable): Scores a few rows with a LoadedModel before it is served, optional.
+        current (LoadedModel): Model being served, None until the first load finished.
+        status (str): "not_started", "loading", "ready" or "failed".
+        error (str): Why the last load failed, None otherwise.
+    """
+
+    def __init__(self, loader: Callable, warmup: Callable = None):
+        self.loader = loader
+        self.warmup = warmup
+        self.current = None
+        self.status = "not_started"
+        self.error = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def load(self):
+        """
+        Loads the model in the calling thread.
+        :raises Exception: Whatever the loader raised, after recording it in status and error
+        """
+        self.status = "loading"
+        try:
+            loaded = self._warm(self.loader())
+        except Exception as error:
+            self.status, self.error = "failed", f"{type(error).__name__}: {error}"
+            logger.exception("model load failed")
+            raise
+        self.current, self.status, self.error = loaded, "ready", None
+        logger.info("model ready", extra={"model_version": loaded.version, "timings": loaded.timings})
+        return loaded
+
+    def _warm(self, loaded):
+        if self.warmup is not None:
+            step = time.perf_counter()
+            self.warmup(loaded)
+            loaded.timings["warmup"] = time.perf_counter() - step
+        return loaded
+
+    def swap(self, version: str, run_id: str = None):
+        """
+        Loads and warms up a version while the current one keeps serving, then serves it.
+        :param version: Registry version to serve
+        :param run_id: Run of that version, looked up by the loader when not given
+        :raises Exception: Whatever loading or warming up raised, the current model keeps serving
+        """
+        loaded = self._warm(self.loader(version=version, run_id=run_id))
+        previous, self.current = self.current, loaded
+        self.status, self.error = "ready", None
+        logger.info(
+            "model swapped",
+            extra={
+                "model_version": loaded.version,
+                "previous_version": previous.version if previous is not None else None,
+                "timings": loaded.timings,
+            },
+        )
+        return loaded
+
+    def _load_quietly(self):
+        try:
+            self.load()
+        except Exception:
+            pass  # recorded in status and error, a later start() retries
+
+    def start(self):
+        """
+        Starts loading in a background thread, unless a load is running or finished successfully.
+        """
+        with self._lock:
+            if self.status in ("loading", "ready"):
+                return
+            self.status = "loading"
+            self._thread = threading.Thread(target=self._load_quietly, name="model-loader", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Waits for a background load, returns whether the model is ready.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.status == "ready"
+
+
+class RegistryWatcher:
+    """
+    Polls the registry for the Production version in a background thread and swaps it into a
+    ServingModel when it changes, so promoted versions are served without restarting workers.
+    Attributes:
+        serving (ServingModel): Model whose version is kept in line with the registry.
+        resolve (Callable): Returns the (version, run_id) currently in Production.
+        interval (float): Seconds between two polls.
+    """
+
+    def __init__(self, serving: ServingModel, resolve: Callable, interval: float):
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        self.serving = serving
+        self.resolve = resolve
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self) -> bool:
+        """
+        Polls the registry once and swaps the Production version in when it is not the one served.
+        :return: Whether a new version was swapped in
+        """
+        current = self.serving.current
+        if current is None:
+            return False  # the first load is still running, it resolves the version itself
+        version, run_id = self.resolve()
+        if str(version) == current.version:
+            return False
+        self.serving.swap(str(version), run_id)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("model watch failed")  # keeps serving the current version, retried next poll
+
+    def start(self):
+        """
+        Starts polling, unless the watcher is already running.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="registry-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """
+        Stops polling, a swap in progress finishes first.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,197 @@
+"""
+Offline bulk scoring with the Production model, without going through the api:
+    python -m src.batch_scorer customers.parquet scores.csv [--chunksize 100000] [--workers 4]
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.constants import BATCH_SCORING_CHUNK_ROWS, FEATURE_ORDER, NATIVE_TREE_MAX_BATCH_ROWS, Columns
+from .api.features import CHANNEL_COL, RequestEncoder, load_channel_woe
+from .api.model_loader import load_model_version, score_matrix
+from .data_manager import DataManager
+
+# Model of a pool worker, loaded once per worker by _init_worker
+_worker_loaded = None
+
+
+def _init_worker(version: str, native: bool):
+    global _worker_loaded
+    _worker_loaded = load_model_version(version, native=native)  # served from the local artifact cache
+
+
+def _score_in_worker(matrix: np.ndarray) -> np.ndarray:
+    return score_matrix(_worker_loaded, matrix)
+
+
+def chunk_model(loaded, chunksize: int):
+    """
+    Model to score chunks of chunksize rows with. The NumPy tree walk of a native tree ensemble is slower than
+    sklearn above NATIVE_TREE_MAX_BATCH_ROWS rows, so those versions score large chunks with their pyfunc model.
+    :param loaded: LoadedModel of the version to score with
+    :param chunksize: Rows scored per model call
+    :return: LoadedModel of the same version and threshold, loaded as pyfunc when that is faster and available
+    """
+    if chunksize <= NATIVE_TREE_MAX_BATCH_ROWS or not loaded.native or loaded.model.kind != "tree_ensemble":
+        return loaded
+    try:
+        pyfunc = load_model_version(loaded.version, native=False)
+    except Exception as error:
+        print(f"Scoring with the native scorer of version {loaded.version}, its pyfunc model did not load: {error}")
+        return loaded
+    pyfunc.threshold = loaded.threshold
+    return pyfunc
+
+
+class _ScoreWriter:
+    # Appends scored chunks to a csv or parquet file (one row group per chunk), chosen from the output suffix
+    def __init__(self, path: Path):
+        self.path = path
+        self.parquet = path.suffix == ".parquet"
+        self._file = None
+        self._writer = None
+
+    def write(self, df: pd.DataFrame):
+        if self.parquet:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, "w", newline="")
+                df.head(0).to_csv(self._file, index=False)
+            df.to_csv(self._file, index=False, header=False)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+class BatchScorer:
+    """
+    Scores a customer feature file (csv or parquet, e.g. READY_TO_MODEL_DATA_FILE_NAME) chunk by chunk.
+    Only the FEATURE_ORDER columns and the id column are read, each chunk is scored with one vectorized
+    model call, in this process or across a pool of worker processes, and appended to the output file
+    as soon as it is scored. At most two chunks per worker are in flight, so memory does not grow with the input.
+    Attributes:
+        loaded (LoadedModel): Model scoring in this process (see chunk_model), also loaded by the pool workers.
+        chunksize (int): Rows read and scored at once.
+        workers (int): Worker processes, 1 scores in this process.
+        encoder (RequestEncoder): Encodes MostCommonChannel labels to WoE values.
+    """
+
+    def __init__(self, loaded=None, chunksize: int = BATCH_SCORING_CHUNK_ROWS, workers: int = 1, channel_woe=None):
+        self.loaded = chunk_model(loaded if loaded is not None else load_model_version(), chunksize)
+        self.chunksize = chunksize
+        self.workers = workers
+        self.encoder = RequestEncoder(FEATURE_ORDER, channel_woe if channel_woe is not None else load_channel_woe())
+
+    def _matrix(self, chunk: pd.DataFrame) -> np.ndarray:
+        matrix = np.empty((len(chunk), len(FEATURE_ORDER)), dtype=np.float64)
+        for i, col in enumerate(FEATURE_ORDER):
+            values = chunk[col]
+            if col == CHANNEL_COL and not pd.api.types.is_numeric_dtype(values):
+                # Channel labels are encoded once per distinct label
+                codes, labels = pd.factorize(values)
+                values = np.array([self.encoder.encode_channel(label) for label in labels], dtype=np.float64)[codes]
+            matrix[:, i] = values
+        return matrix
+
+    def _scored_frame(self, chunk: pd.DataFrame, id_column: str, risk_probability: np.ndarray) -> pd.DataFrame:
+        scored = {id_column: chunk[id_column].to_numpy()} if id_column else {}
+        scored["risk_probability"] = risk_probability
+        scored["is_high_risk"] = (risk_probability >= self.loaded.threshold).astype(np.int8)
+        return pd.DataFrame(scored)
+
+    def score_file(self, input_path, output_path, id_column: str = Columns.CustomerId.value) -> dict:
+        """
+        Streams input_path through the model and writes risk_probability and is_high_risk per row to output_path.
+        The output is written next to output_path first and renamed once every chunk is scored.
+        :param input_path: Customer feature file, csv or parquet
+        :param output_path: Scores file, parquet when it ends with .parquet, csv otherwise
+        :param id_column: Column copied to the output next to the scores, None to leave it out
+        :return: Rows scored, seconds spent and the model version
+        :rtype: dict
+        """
+        start = time.perf_counter()
+        output_path = Path(output_path)
+        columns = ([id_column] if id_column else []) + FEATURE_ORDER
+        chunks = DataManager().load_chunks(
+            load_clean=True, file_name=Path(input_path).resolve(), chunksize=self.chunksize, columns=columns
+        )
+        writer = _ScoreWriter(output_path.with_name(f".{output_path.stem}.partial{output_path.suffix}"))
+        rows = 0
+        try:
+            if self.workers > 1:
+                rows = self._score_in_pool(chunks, id_column, writer)
+            else:
+                for chunk in chunks:
+                    writer.write(self._scored_frame(chunk, id_column, score_matrix(self.loaded, self._matrix(chunk))))
+                    rows += len(chunk)
+            if not rows:
+                # An empty input still gets an output with the header (csv) or the schema (parquet)
+                empty = pd.DataFrame({id_column: pd.Series(dtype=object)} if id_column else {})
+                writer.write(self._scored_frame(empty, id_column, np.zeros(0)))
+        except BaseException:
+            writer.close()
+            writer.path.unlink(missing_ok=True)
+            raise
+        writer.close()
+        os.replace(writer.path, output_path)
+        seconds = time.perf_counter() - start
+        print(
+            f"Scored {rows} rows with model version {self.loaded.version} in {seconds:.1f}s, written to {output_path}"
+        )
+        return {"rows": rows, "seconds": seconds, "model_version": self.loaded.version}
+
+    def _score_in_pool(self, chunks, id_column: str, writer: _ScoreWriter) -> int:
+        rows = 0
+        pending = deque()
+        with ProcessPoolExecutor(
+            self.workers, initializer=_init_worker, initargs=(self.loaded.version, self.loaded.native)
+        ) as pool:
+            for chunk in chunks:
+                # Workers only receive the float rows, ids stay here until the scores come back in order
+                ids = chunk[[id_column]] if id_column else chunk.iloc[:, :0]
+                pending.append((ids, pool.submit(_score_in_worker, self._matrix(chunk))))
+                if len(pending) >= 2 * self.workers:
+                    ids, future = pending.popleft()
+                    writer.write(self._scored_frame(ids, id_column, future.result()))
+                    rows += len(ids)
+            while pending:
+                ids, future = pending.popleft()
+                writer.write(self._scored_frame(ids, id_column, future.result()))
+                rows += len(ids)
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a customer feature file with the Production model")
+    parser.add_argument("input", help="csv or parquet file with the FEATURE_ORDER columns")
+    parser.add_argument("output", help="scores file, parquet when it ends with .parquet, csv otherwise")
+    parser.add_argument("--chunksize", type=int, default=BATCH_SCORING_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes, 1 scores in this process")
+    parser.add_argument(
+        "--id-column", default=Columns.CustomerId.value, help="column copied to the output, '' for none"
+    )
+    parser.add_argument("--model-version", default=None, help="registry version, defaults to the Production version")
+    args = parser.parse_args(argv)
+
+    scorer = BatchScorer(load_model_version(args.model_version), chunksize=args.chunksize, workers=args.workers)
+    return scorer.score_file(args.input, args.output, id_column=args.id_column or None)
+
+
+if __name__ == "__main__":
+    main()
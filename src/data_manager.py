@@ -7,7 +7,12 @@ from scripts.constants import (
     CLEAN_DATA_FILE_NAME,
     RAW_DATA_DIR,
     RAW_DATA_FILE_NAME,
+    RAW_SCHEMA,
+    DEFAULT_STORAGE_FORMAT,
+    STORAGE_FORMATS,
 )
+from .schema import apply_schema, parse_dtypes, read_csv_typed
+from .storage import format_from_suffix, get_storage
 
 
 class DataManager:
@@ -26,24 +31,31 @@ class DataManager:
         self.clean_data_file_name = Path(CLEAN_DATA_FILE_NAME)
         self.raw_data_file_name = Path(RAW_DATA_FILE_NAME)
 
+    def _resolve_path(self, load_clean: bool, file_name=None) -> Path:
+        file = file_name if file_name else (self.clean_data_file_name if load_clean else self.raw_data_file_name)
+        file_dir = self.clean_data_dir if load_clean else self.raw_data_dir
+        path = Path(file_dir) / Path(file)
+
+        if not Path(path).exists():
+            raise FileNotFoundError(f"Path does not exist: {path}")
+
+        return path
+
     @handle_errors
-    def load_csv(self, load_clean=False, file_name=None) -> pd.DataFrame:
+    def load_csv(self, load_clean=False, file_name=None, use_schema=True) -> pd.DataFrame:
         """
         Docstring for load_csv
         :param load_clean: Boolean indicating whether to load clean data or raw data
         :param file_name: The name of the file to load
+        :param use_schema: Whether raw data is typed with RAW_SCHEMA (categoricals, downcast numerics, parsed time)
         :return: DataFrame containing the loaded data
         :rtype: pd.DataFrame
         """
-        file = file_name if file_name else (self.clean_data_file_name if load_clean else self.raw_data_file_name)
-        file_dir = self.clean_data_dir if load_clean else self.raw_data_dir
-        path = Path(file_dir) / Path(file)
+        path = self._resolve_path(load_clean, file_name)
+        typed = use_schema and not load_clean
 
         print(f"Loading {path}...")
-        if not Path(path).exists():
-            raise FileNotFoundError(f"Path does not exist: {path}")
-
-        df = pd.read_csv(path)
+        df = read_csv_typed(path) if typed else pd.read_csv(path)
 
         if df.empty:
             raise ValueError(f"The CSV at {path} is empty. Please try again!")
@@ -51,6 +63,111 @@ class DataManager:
         print(f"Sucessfully loaded {path}!")
         return df
 
+    @handle_errors
+    def load_csv_chunks(self, load_clean=False, file_name=None, chunksize: int = 100_000, use_schema=True):
+        """
+        Docstring for load_csv_chunks
+        :param load_clean: Boolean indicating whether to load clean data or raw data
+        :param file_name: The name of the file to load
+        :param chunksize: Number of rows per chunk
+        :param use_schema: Whether raw data is typed with RAW_SCHEMA (categoricals, downcast numerics, parsed time)
+        :return: Iterator of DataFrames with at most chunksize rows each
+        """
+        path = self._resolve_path(load_clean, file_name)
+        typed = use_schema and not load_clean
+
+        print(f"Streaming {path} in chunks of {chunksize} rows...")
+        chunks = pd.read_csv(path, chunksize=chunksize, dtype=parse_dtypes() if typed else None)
+        return (apply_schema(chunk) for chunk in chunks) if typed else chunks
+
+    def _resolve_stage(self, load_clean: bool, file_name=None, file_format=None):
+        file = file_name if file_name else (self.clean_data_file_name if load_clean else self.raw_data_file_name)
+        if file_format is None:
+            file_format = STORAGE_FORMATS.get(str(file)) or format_from_suffix(file, DEFAULT_STORAGE_FORMAT)
+        storage = get_storage(file_format)
+        return storage, Path(file).with_suffix(storage.suffix)
+
+    @handle_errors
+    def load(
+        self, load_clean=False, file_name=None, columns=None, time_range=None, file_format=None, use_schema=True
+    ) -> pd.DataFrame:
+        """
+        Docstring for load
+        :param load_clean: Boolean indicating whether to load clean data or raw data
+        :param file_name: The file name constant of the stage to load, its storage format comes from STORAGE_FORMATS
+        :param columns: Optional list of columns to load, other columns are never read
+        :param time_range: Optional (start, end) tuple on TransactionStartTime, start inclusive and end exclusive
+        :param file_format: Optional "csv", "parquet" or "feather" overriding STORAGE_FORMATS
+        :param use_schema: Whether raw data is typed with RAW_SCHEMA (categoricals, downcast numerics, parsed time)
+        :return: DataFrame containing the loaded data
+        :rtype: pd.DataFrame
+        """
+        storage, file = self._resolve_stage(load_clean, file_name, file_format)
+        path = self._resolve_path(load_clean, file)
+        typed = use_schema and not load_clean
+
+        print(f"Loading {path}...")
+        df = storage.read(path, columns=columns, time_range=time_range, schema=RAW_SCHEMA if typed else None)
+
+        if df.empty and time_range is None:
+            raise ValueError(f"The file at {path} is empty. Please try again!")
+
+        print(f"Sucessfully loaded {path}!")
+        return df
+
+    @handle_errors
+    def load_chunks(
+        self,
+        load_clean=False,
+        file_name=None,
+        chunksize: int = 100_000,
+        columns=None,
+        time_range=None,
+        file_format=None,
+        use_schema=True,
+    ):
+        """
+        Docstring for load_chunks
+        :param load_clean: Boolean indicating whether to load clean data or raw data
+        :param file_name: The file name constant of the stage to load, its storage format comes from STORAGE_FORMATS
+        :param chunksize: Maximum number of rows per chunk
+        :param columns: Optional list of columns to load
+        :param time_range: Optional (start, end) tuple on TransactionStartTime, start inclusive and end exclusive
+        :param file_format: Optional "csv", "parquet" or "feather" overriding STORAGE_FORMATS
+        :param use_schema: Whether raw data is typed with RAW_SCHEMA (categoricals, downcast numerics, parsed time)
+        :return: Iterator of DataFrames
+        """
+        storage, file = self._resolve_stage(load_clean, file_name, file_format)
+        path = self._resolve_path(load_clean, file)
+        typed = use_schema and not load_clean
+
+        print(f"Streaming {path} in chunks of {chunksize} rows...")
+        return storage.iter_chunks(
+            path, chunksize, columns=columns, time_range=time_range, schema=RAW_SCHEMA if typed else None
+        )
+
+    @handle_errors
+    def save(self, df: pd.DataFrame, file_name: str, file_format=None):
+        """
+        Docstring for save
+        :param df: DataFrame to be saved, the index is only stored when it is not a default RangeIndex
+        :type df: pd.DataFrame
+        :param file_name: The file name constant of the stage to save, its storage format comes from STORAGE_FORMATS
+        :param file_format: Optional "csv", "parquet" or "feather" overriding STORAGE_FORMATS
+        """
+        if df.empty:
+            raise ValueError("Dataframe is empty and can not be saved.")
+
+        storage, file = self._resolve_stage(True, file_name, file_format)
+        path = self.clean_data_dir / file
+
+        if not self.clean_data_dir.exists():
+            raise FileNotFoundError(f"Dir does not exist: {self.clean_data_dir}")
+
+        storage.write(df, path)
+        print(f"Sucessfully saved dataframe to {path}!")
+        return path
+
     @handle_errors
     def save_to_csv(self, df: pd.DataFrame, file_name: str):
         """
@@ -1,16 +1,25 @@
 from scripts import handle_errors
+import joblib
 import pandas as pd
+from pathlib import Path
+from .aggregation import CustomerAggregationEngine, CustomerAggregateState
+from .feature_store import CustomerFeatureStore, publish_customer_features
 from scripts.constants import (
     Columns,
     Aggregated_Columns,
     Default_Enums,
     AGG_NUMERIC_COLS,
     AGG_FREQUENCY_COLS,
+    CLEAN_DATA_DIR,
+    CUSTOMER_AGGREGATE_STATE_DIR_NAME,
+    ARTIFACTS_DIR,
+    PREPROCESSOR_FILE_NAME,
 )
 from sklearn.preprocessing import RobustScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
+from sklearn.utils.validation import check_is_fitted
 
 
 class TimeFeatureExtractor(BaseEstimator, TransformerMixin):
@@ -22,11 +31,14 @@ class TimeFeatureExtractor(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, X):
-        working_df = X.copy()
+        # Shallow copy: new columns are added without duplicating the raw transaction data
+        working_df = X.copy(deep=False)
 
-        working_df[Columns.TransactionStartTime.value] = pd.to_datetime(
-            working_df[Columns.TransactionStartTime.value], errors="coerce", utc=True
-        )
+        # Raw data loaded with RAW_SCHEMA already holds parsed UTC timestamps
+        if not isinstance(working_df[Columns.TransactionStartTime.value].dtype, pd.DatetimeTZDtype):
+            working_df[Columns.TransactionStartTime.value] = pd.to_datetime(
+                working_df[Columns.TransactionStartTime.value], errors="coerce", utc=True
+            )
 
         working_df[Aggregated_Columns.TransactionHour.value] = working_df[Columns.TransactionStartTime.value].dt.hour
         working_df[Aggregated_Columns.TransactionDay.value] = working_df[Columns.TransactionStartTime.value].dt.day
@@ -41,84 +53,68 @@ class CustomAggregator(BaseEstimator, TransformerMixin):
     Aggregates the raw transaction data into customer-level features.
     """
 
+    agg_config = {
+        Aggregated_Columns.TotalTransactionAmount.value: (Columns.Amount.value, "sum"),
+        Aggregated_Columns.AverageTransactionAmount.value: (Columns.Amount.value, "mean"),
+        Aggregated_Columns.TransactionCount.value: (Columns.TransactionId.value, "count"),
+        Aggregated_Columns.TransactionAmountSTD.value: (Columns.Amount.value, "std"),
+        Aggregated_Columns.AverageTransactionHour.value: (Aggregated_Columns.TransactionHour.value, "mean"),
+        Aggregated_Columns.MostCommonTransactionDay.value: (Aggregated_Columns.TransactionDay.value, "mode"),
+        Aggregated_Columns.MostCommonTransactionMonth.value: (Aggregated_Columns.TransactionMonth.value, "mode"),
+        Aggregated_Columns.ActiveYearsCount.value: (Aggregated_Columns.TransactionYear.value, "nunique"),
+        Aggregated_Columns.MostCommonProductCategory.value: (
+            Columns.ProductCategory.value,
+            "mode",
+            Default_Enums.UNKNOWN.value,
+        ),
+        Aggregated_Columns.UniqueProductCategoryCount.value: (Columns.ProductCategory.value, "nunique"),
+        Aggregated_Columns.MostCommonChannel.value: (Columns.ChannelId.value, "mode", Default_Enums.UNKNOWN.value),
+    }
+
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
-        working_df = X.copy()
-        missing_cols = list(set([Columns.CustomerId.value, Columns.TransactionId.value]) - set(working_df.columns))
+        missing_cols = list(set([Columns.CustomerId.value, Columns.TransactionId.value]) - set(X.columns))
         if missing_cols:
             print(f"Missing columns found, unable to continue pre-processing {missing_cols}")
 
-        # Step 1: Aggregate using Numeric Values
-        numeric_agg_config = {
-            Aggregated_Columns.TotalTransactionAmount.value: (
-                Columns.Amount.value,
-                "sum",
-            ),
-            Aggregated_Columns.AverageTransactionAmount.value: (
-                Columns.Amount.value,
-                "mean",
-            ),
-            Aggregated_Columns.TransactionCount.value: (
-                Columns.TransactionId.value,
-                "count",
-            ),
-            Aggregated_Columns.TransactionAmountSTD.value: (
-                Columns.Amount.value,
-                "std",
-            ),
-            Aggregated_Columns.AverageTransactionHour.value: (
-                Aggregated_Columns.TransactionHour.value,
-                "mean",
-            ),
-            Aggregated_Columns.MostCommonTransactionDay.value: (
-                Aggregated_Columns.TransactionDay.value,
-                lambda row: (row.mode()[0] if not row.mode().empty else None),
-            ),
-            Aggregated_Columns.MostCommonTransactionMonth.value: (
-                Aggregated_Columns.TransactionMonth.value,
-                lambda row: (row.mode()[0] if not row.mode().empty else None),
-            ),
-            Aggregated_Columns.ActiveYearsCount.value: (
-                Aggregated_Columns.TransactionYear.value,
-                "nunique",
-            ),
-        }
-        numeric_aggregated_df = working_df.groupby(Columns.CustomerId.value).agg(**numeric_agg_config).reset_index()
-
-        numeric_aggregated_df[Aggregated_Columns.TransactionAmountSTD.value] = numeric_aggregated_df[
+        # Single factorization of CustomerId shared by every numeric and categorical aggregate
+        engine = CustomerAggregationEngine(Columns.CustomerId.value, self.agg_config)
+        return self._finalize(engine.aggregate(X))
+
+    def aggregate_partial(self, X) -> CustomerAggregateState:
+        """
+        Computes mergeable partial aggregates for one chunk of time-featured transactions.
+        :param X: Chunk of transactions after TimeFeatureExtractor
+        :return: CustomerAggregateState to be merged with the states of the other chunks
+        """
+        return CustomerAggregateState.from_frame(X, Columns.CustomerId.value, self.agg_config)
+
+    def transform_state(self, state: CustomerAggregateState) -> pd.DataFrame:
+        """
+        Finalizes merged partial aggregates into the same customer-level features as transform.
+        :param state: CustomerAggregateState covering every chunk
+        :return: DataFrame of customer-level features
+        """
+        return self._finalize(state.to_frame())
+
+    def update_state(self, state: CustomerAggregateState, batch_state: CustomerAggregateState) -> pd.DataFrame:
+        """
+        Folds the partial aggregates of a batch of new transactions into state, in place.
+        :param state: CustomerAggregateState of the transaction history
+        :param batch_state: aggregate_partial of the batch
+        :return: Refreshed customer-level features of the customers in the batch only
+        """
+        return self._finalize(state.to_frame(state.update(batch_state)))
+
+    def _finalize(self, final_df: pd.DataFrame) -> pd.DataFrame:
+        final_df[Aggregated_Columns.TransactionAmountSTD.value] = final_df[
             Aggregated_Columns.TransactionAmountSTD.value
         ].fillna(
             0
         )  # Customers with 1 transaction will have NaN std
 
-        # Step 2: Aggregate using Categorical Values
-        categorical_agg_config = {
-            Aggregated_Columns.MostCommonProductCategory.value: (
-                Columns.ProductCategory.value,
-                lambda row: (row.mode()[0] if not row.mode().empty else Default_Enums.UNKNOWN.value),
-            ),
-            Aggregated_Columns.UniqueProductCategoryCount.value: (
-                Columns.ProductCategory.value,
-                lambda row: row.nunique(),
-            ),
-            Aggregated_Columns.MostCommonChannel.value: (
-                Columns.ChannelId.value,
-                lambda row: (row.mode()[0] if not row.mode().empty else Default_Enums.UNKNOWN.value),
-            ),
-        }
-
-        categorical_aggregated_df = (
-            working_df.groupby(Columns.CustomerId.value).agg(**categorical_agg_config).reset_index()
-        )
-        final_df = pd.merge(
-            numeric_aggregated_df,
-            categorical_aggregated_df,
-            on=Columns.CustomerId.value,
-            how="outer",
-        )
-
         return final_df
 
 
@@ -131,7 +127,7 @@ class MissingValuesHandler(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, X):
-        working_df = X.copy()
+        working_df = X
 
         # Check 0 on AverageTransactionAmount
         zero_transactions = working_df[working_df[Aggregated_Columns.AverageTransactionAmount.value] == 0][
@@ -172,6 +168,9 @@ class FeatureScaler(BaseEstimator, TransformerMixin):
         self.scaler.fit(X)
         return self
 
+    def __sklearn_is_fitted__(self):
+        return hasattr(self.scaler, "transformers_")
+
     def transform(self, X):
         transformed_data = self.scaler.transform(X)
         passthrough_cols = [col for col in X.columns if col not in AGG_NUMERIC_COLS + AGG_FREQUENCY_COLS]
@@ -184,12 +183,13 @@ class DataPreprocessor:
     """
     Orchestrates the data preprocessing pipeline.
     Attributes:
-        df (pd.DataFrame): The raw input dataframe.
+        df (pd.DataFrame): The raw input dataframe, None when the raw data is streamed in chunks.
         pipeline (Pipeline): The sklearn pipeline for data preprocessing.
     """
 
-    def __init__(self, raw_df: pd.DataFrame):
+    def __init__(self, raw_df: pd.DataFrame = None):
         self.df = raw_df
+        self._aggregate_states = {}  # state directory -> (CustomerAggregateState, signature) of the last refresh
         self.pipeline = Pipeline(
             [
                 (
@@ -213,5 +213,160 @@ class DataPreprocessor:
 
     @handle_errors
     def transform_all(self) -> pd.DataFrame:
-        """Applies the full preprocessing pipeline to the raw dataframe."""
+        """Fits the full preprocessing pipeline on the raw dataframe and returns the transformed dataframe."""
         return self.pipeline.fit_transform(self.df)
+
+    @handle_errors
+    def fit(self, raw_df: pd.DataFrame = None) -> "DataPreprocessor":
+        """
+        Learns the preprocessing statistics (scaler centers and scales) from training transactions.
+        :param raw_df: Raw training transactions, defaults to the dataframe given at construction
+        :return: The fitted DataPreprocessor
+        """
+        self.pipeline.fit(self.df if raw_df is None else raw_df)
+        return self
+
+    @handle_errors
+    def transform(self, raw_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transforms new transactions with the statistics learned by fit (or transform_all), without refitting.
+        :param raw_df: Raw transactions to score
+        :return: Customer-level features scaled like the training data
+        :rtype: pd.DataFrame
+        """
+        check_is_fitted(self.pipeline.named_steps["feature_scaler"])
+        return self.pipeline.transform(raw_df)
+
+    @handle_errors
+    def save(self, path=None) -> Path:
+        """
+        Serializes the fitted pipeline, so that it can be loaded once and reused for scoring.
+        :param path: Destination file, defaults to PREPROCESSOR_FILE_NAME in ARTIFACTS_DIR
+        :return: The path written to
+        """
+        check_is_fitted(self.pipeline.named_steps["feature_scaler"])
+        path = Path(path) if path else Path(ARTIFACTS_DIR) / PREPROCESSOR_FILE_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        joblib.dump(self.pipeline, path)
+        print(f"Sucessfully saved the fitted preprocessing pipeline to {path}!")
+        return path
+
+    @classmethod
+    @handle_errors
+    def load(cls, path=None) -> "DataPreprocessor":
+        """
+        Loads a pipeline written by save.
+        :param path: Serialized pipeline, defaults to PREPROCESSOR_FILE_NAME in ARTIFACTS_DIR
+        :return: A fitted DataPreprocessor ready for transform
+        """
+        path = Path(path) if path else Path(ARTIFACTS_DIR) / PREPROCESSOR_FILE_NAME
+        if not path.exists():
+            raise FileNotFoundError(f"Path does not exist: {path}")
+
+        preprocessor = cls()
+        preprocessor.pipeline = joblib.load(path)
+        return preprocessor
+
+    @handle_errors
+    def transform_chunks(self, chunks) -> pd.DataFrame:
+        """
+        Streaming variant of transform_all for raw data that does not fit in memory.
+        Each chunk is reduced to partial customer aggregates that are merged as they arrive,
+        so memory is bounded by the number of customers rather than transactions.
+        :param chunks: Iterable of raw transaction DataFrames, e.g. DataManager.load_csv_chunks()
+        :return: Same output as transform_all on the concatenated chunks
+        :rtype: pd.DataFrame
+        """
+        customer_df = self.pipeline.named_steps["custom_aggregator"].transform_state(self.aggregate_state(chunks))
+        return self.pipeline[2:].fit_transform(customer_df)
+
+    @handle_errors
+    def aggregate_state(self, chunks) -> CustomerAggregateState:
+        """
+        Reduces raw transaction chunks to mergeable per-customer aggregates.
+        :param chunks: Iterable of raw transaction DataFrames
+        :return: CustomerAggregateState covering every chunk
+        """
+        time_feature_extractor = self.pipeline.named_steps["time_feature_extractor"]
+        custom_aggregator = self.pipeline.named_steps["custom_aggregator"]
+
+        state = None
+        for chunk in chunks:
+            partial_state = custom_aggregator.aggregate_partial(time_feature_extractor.transform(chunk))
+            if state is None:
+                state = partial_state
+            else:
+                state.update(partial_state)
+
+        if state is None:
+            raise ValueError("No transaction chunks to preprocess.")
+        return state
+
+    @handle_errors
+    def refresh(self, batch: pd.DataFrame, state_dir=None) -> pd.DataFrame:
+        """
+        Incremental counterpart of transform_all: folds a batch of new raw transactions into the
+        persisted per-customer aggregates and recomputes the features of the affected customers only.
+        The rows are identical to the CustomAggregator output of a full recompute over the history.
+        The state stays in memory between refreshes and only the batch is appended to its delta log,
+        so a refresh costs in proportion to the batch rather than to the history.
+        :param batch: New raw transactions
+        :param state_dir: Directory of the persisted CustomerAggregateState, started empty when missing
+        :return: Customer-level features (before scaling) of the customers in the batch
+        :rtype: pd.DataFrame
+        """
+        state_dir = (
+            Path(state_dir) if state_dir else Path(CLEAN_DATA_DIR) / CUSTOMER_AGGREGATE_STATE_DIR_NAME
+        ).resolve()
+        custom_aggregator = self.pipeline.named_steps["custom_aggregator"]
+        state = self._aggregate_state(state_dir, custom_aggregator.agg_config)
+
+        time_df = self.pipeline.named_steps["time_feature_extractor"].transform(batch)
+        batch_state = custom_aggregator.aggregate_partial(time_df)
+        refreshed_df = custom_aggregator.update_state(state, batch_state)
+        state.save_update(state_dir, batch_state)
+        self._aggregate_states[state_dir] = (state, CustomerAggregateState.signature(state_dir))
+
+        print(f"Refreshed features of {len(refreshed_df)} customers")
+        return refreshed_df
+
+    def _aggregate_state(self, state_dir: Path, agg_config: dict) -> CustomerAggregateState:
+        # The state of the previous refresh is reused until another writer saves to state_dir, it is taken out
+        # of the cache while it is being updated so that a failed refresh does not leave it half updated
+        signature = CustomerAggregateState.signature(state_dir)
+        state, cached_signature = self._aggregate_states.pop(state_dir, (None, None))
+        if signature is None:
+            print(f"No customer aggregate state at {state_dir}, starting from an empty history")
+            return CustomerAggregateState(Columns.CustomerId.value, agg_config)
+        if state is None or cached_signature != signature:
+            state = CustomerAggregateState.load(state_dir, Columns.CustomerId.value, agg_config)
+        return state
+
+    @handle_errors
+    def publish_features(self, raw_df: pd.DataFrame, woe_transformer, store_dir=None) -> CustomerFeatureStore:
+        """
+        Rebuilds the customer feature store served by /predict/customer/{id} from the full transaction history.
+        :param raw_df: Raw transactions of every customer
+        :param woe_transformer: WoeTransformer fitted on the training features
+        :param store_dir: Store directory, defaults to FEATURE_STORE_DIR_NAME under ARTIFACTS_DIR
+        :return: The store opened on the published generation
+        """
+        return publish_customer_features(self.transform(raw_df), woe_transformer, store_dir, replace=True)
+
+    @handle_errors
+    def refresh_feature_store(
+        self, batch: pd.DataFrame, woe_transformer, state_dir=None, store_dir=None
+    ) -> CustomerFeatureStore:
+        """
+        Folds a batch of new transactions into the persisted aggregates (refresh), then scales and WoE-encodes
+        the features of the affected customers and upserts them into the customer feature store.
+        :param batch: New raw transactions
+        :param woe_transformer: WoeTransformer fitted on the training features
+        :param state_dir: Directory of the persisted CustomerAggregateState
+        :param store_dir: Store directory, defaults to FEATURE_STORE_DIR_NAME under ARTIFACTS_DIR
+        :return: The store opened on the published generation
+        """
+        check_is_fitted(self.pipeline.named_steps["feature_scaler"])
+        customer_df = self.pipeline[2:].transform(self.refresh(batch, state_dir))
+        return publish_customer_features(customer_df, woe_transformer, store_dir)
@@ -0,0 +1,170 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from scripts.constants import ARTIFACTS_DIR, FEATURE_ORDER, FEATURE_STORE_DIR_NAME, Columns
+
+META_FILE_NAME = "meta.json"
+
+
+def _store_dir(directory) -> Path:
+    return Path(directory) if directory is not None else Path(ARTIFACTS_DIR) / FEATURE_STORE_DIR_NAME
+
+
+class CustomerFeatureStore:
+    """
+    Model-ready feature rows (FEATURE_ORDER values, WoE encoded) of every customer, keyed by CustomerId,
+    so the api scores customers without computing their features on the request path.
+    Rows live in a float64 .npy matrix that is memory-mapped read-only, a CustomerId -> row index built at open
+    makes lookups O(1). Every write publishes a new generation of files and then swaps meta.json in atomically,
+    readers keep the generation they opened until they reopen the store.
+    Attributes:
+        directory (Path): Store directory.
+        feature_order (list): Columns of the feature rows.
+        customer_ids (np.ndarray): CustomerId of every row.
+        features (np.ndarray): Feature rows, one per customer.
+        generation (int): Number of the published write.
+    """
+
+    def __init__(self, directory, feature_order: list, customer_ids: np.ndarray, features: np.ndarray, generation: int):
+        self.directory = Path(directory)
+        self.feature_order = list(feature_order)
+        self.customer_ids = customer_ids
+        self.features = features
+        self.generation = generation
+        self._index = {customer_id: i for i, customer_id in enumerate(customer_ids.tolist())}
+        self._meta_signature = None
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    def __contains__(self, customer_id) -> bool:
+        return customer_id in self._index
+
+    def row(self, customer_id: str) -> np.ndarray:
+        """
+        :param customer_id: CustomerId to look up
+        :return: The customer's feature row in feature_order
+        :raises KeyError: For customers that are not in the store
+        """
+        return self.features[self._index[customer_id]]
+
+    def is_stale(self) -> bool:
+        """
+        Whether a newer generation was published since the store was opened, a stat call cheap enough per request.
+        """
+        return _meta_signature(self.directory) != self._meta_signature
+
+    @classmethod
+    def open(cls, directory=None) -> "CustomerFeatureStore":
+        """
+        Opens the latest published generation.
+        :param directory: Store directory, defaults to FEATURE_STORE_DIR_NAME under ARTIFACTS_DIR
+        :raises FileNotFoundError: When nothing was published to the directory yet
+        """
+        directory = _store_dir(directory)
+        while True:
+            signature = _meta_signature(directory)  # taken first, a generation published meanwhile reads as stale
+            meta = _read_meta(directory)
+            if not meta:
+                raise FileNotFoundError(f"No customer feature store at {directory}")
+            generation = meta["generation"]
+            try:
+                customer_ids = np.load(directory / f"customer_ids-{generation}.npy")
+                features = np.load(directory / f"features-{generation}.npy", mmap_mode="r")
+            except FileNotFoundError:
+                if _read_meta(directory).get("generation") == generation:
+                    raise
+                continue  # a newer generation replaced this one while it was being opened
+            store = cls(directory, meta["feature_order"], customer_ids, features, generation)
+            store._meta_signature = signature
+            return store
+
+    @classmethod
+    def write(
+        cls, customer_ids, features: np.ndarray, feature_order: list = FEATURE_ORDER, directory=None
+    ) -> "CustomerFeatureStore":
+        """
+        Publishes the feature rows of every customer as a new generation, replacing the stored customers.
+        :param customer_ids: CustomerId of every row, unique
+        :param features: Feature rows in feature_order
+        :param feature_order: Columns of the feature rows
+        :param directory: Store directory, defaults to FEATURE_STORE_DIR_NAME under ARTIFACTS_DIR
+        :return: The store opened on the new generation
+        """
+        directory = _store_dir(directory)
+        customer_ids = np.asarray(customer_ids).astype(str)
+        features = np.ascontiguousarray(features, dtype=np.float64)
+        if features.shape != (len(customer_ids), len(feature_order)):
+            raise ValueError(
+                f"Expected {len(customer_ids)} rows of {len(feature_order)} features, got shape {features.shape}"
+            )
+        if len(np.unique(customer_ids)) != len(customer_ids):
+            raise ValueError("CustomerIds must be unique")
+
+        directory.mkdir(parents=True, exist_ok=True)
+        previous = _read_meta(directory).get("generation", 0)
+        generation = previous + 1
+        np.save(directory / f"customer_ids-{generation}.npy", customer_ids)
+        np.save(directory / f"features-{generation}.npy", features)
+        meta = {"generation": generation, "feature_order": list(feature_order), "n_customers": len(customer_ids)}
+        staged = directory / f".{META_FILE_NAME}.{generation}"
+        staged.write_text(json.dumps(meta, indent=2))
+        os.replace(staged, directory / META_FILE_NAME)
+
+        # Readers that still map the previous generation keep its pages until they reopen
+        for name in ("customer_ids", "features"):
+            (directory / f"{name}-{previous}.npy").unlink(missing_ok=True)
+        print(f"Published {len(customer_ids)} customers to the feature store at {directory} (generation {generation})")
+        return cls.open(directory)
+
+    def upsert(self, customer_ids, features: np.ndarray) -> "CustomerFeatureStore":
+        """
+        Publishes a new generation where the given customers are added or replaced, the others are kept.
+        :param customer_ids: CustomerId of every new row
+        :param features: New feature rows in feature_order
+        :return: The store opened on the new generation
+        """
+        customer_ids = np.asarray(customer_ids).astype(str)
+        kept = ~np.isin(self.customer_ids, customer_ids)
+        return self.write(
+            np.concatenate([self.customer_ids[kept], customer_ids]),
+            np.vstack(
+                [self.features[kept], np.asarray(features, dtype=np.float64).reshape(-1, len(self.feature_order))]
+            ),
+            self.feature_order,
+            self.directory,
+        )
+
+
+def _meta_signature(directory: Path):
+    try:
+        stat = os.stat(directory / META_FILE_NAME)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _read_meta(directory: Path) -> dict:
+    path = directory / META_FILE_NAME
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def publish_customer_features(customer_df, woe_transformer, directory=None, replace: bool = False):
+    """
+    WoE-encodes customer-level features (DataPreprocessor output) into model rows and publishes them.
+    :param customer_df: Customer-level features with a CustomerId column
+    :param woe_transformer: WoeTransformer fitted on the training features, encodes the FEATURE_ORDER columns
+    :param directory: Store directory, defaults to FEATURE_STORE_DIR_NAME under ARTIFACTS_DIR
+    :param replace: Replace every stored customer instead of upserting the given ones
+    :return: The store opened on the new generation
+    :rtype: CustomerFeatureStore
+    """
+    customer_ids = customer_df[Columns.CustomerId.value].to_numpy()
+    features = woe_transformer.transform_to_woe_matrix(customer_df, FEATURE_ORDER)
+    directory = _store_dir(directory)
+    if replace or not _read_meta(directory):
+        return CustomerFeatureStore.write(customer_ids, features, FEATURE_ORDER, directory)
+    return CustomerFeatureStore.open(directory).upsert(customer_ids, features)
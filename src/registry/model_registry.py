@@ -1,5 +1,23 @@
+import tempfile
+import threading
+
+import mlflow.sklearn
+from cachetools import TTLCache
+from mlflow.entities import ViewType
+from mlflow.models import Model
 from mlflow.tracking import MlflowClient
 
+from scripts.constants import NATIVE_SCORER_ARTIFACT_PATH, NATIVE_SCORER_TOLERANCE, REGISTRY_CACHE_TTL_SECONDS
+from .native_scorer import check_rows, compile_native_scorer, max_score_difference
+
+# Run IDs per search_runs filter: bounds the filter string sent to remote tracking servers, while the file store,
+# which scans every run of the experiments per call, gets a single call for up to this many versions
+RUN_ID_BATCH_SIZE = 500
+
+# (tracking uri, registry uri, model name) -> (versions, run_id -> metrics), shared by every manager
+_listing_cache = TTLCache(maxsize=64, ttl=REGISTRY_CACHE_TTL_SECONDS)
+_listing_lock = threading.Lock()
+
 
 class ModelRegistryManager:
     """
@@ -7,35 +25,90 @@ class ModelRegistryManager:
     and promoting the best model to production based on a specified metric.
     Attributes:
         model_name (str): The name of the registered model in MLflow.
+        tracking_uri (str): Tracking server the client was built for.
+        registry_uri (str): Model registry the client was built for.
         client (MlflowClient): The MLflow client for interacting with the model registry.
     """
 
     def __init__(self, model_name: str):
         self.model_name = model_name
-        self.client = MlflowClient()
+        self.tracking_uri = mlflow.get_tracking_uri()
+        self.registry_uri = mlflow.get_registry_uri()
+        self.client = MlflowClient(tracking_uri=self.tracking_uri, registry_uri=self.registry_uri)
+
+    @property
+    def _cache_key(self) -> tuple:
+        return self.tracking_uri, self.registry_uri, self.model_name
+
+    def _listing(self, refresh: bool = False) -> tuple:
+        """
+        Versions of the registered model and the metrics of their runs, fetched with one search_model_versions
+        call and one search_runs call per RUN_ID_BATCH_SIZE runs, then cached for REGISTRY_CACHE_TTL_SECONDS.
+        :param refresh: Fetch from the registry even when a cached listing is fresh
+        :return: (list of ModelVersion, run_id -> metrics dict)
+        """
+        if not refresh:
+            with _listing_lock:
+                cached = _listing_cache.get(self._cache_key)
+            if cached is not None:
+                return cached
+
+        versions = list(self.client.search_model_versions(f"name='{self.model_name}'"))
+        run_ids = sorted({mv.run_id for mv in versions if mv.run_id})
+        metrics = {}
+        if run_ids:
+            experiment_ids = [e.experiment_id for e in self.client.search_experiments(view_type=ViewType.ALL)]
+            for start in range(0, len(run_ids), RUN_ID_BATCH_SIZE):
+                batch = ", ".join(f"'{run_id}'" for run_id in run_ids[start : start + RUN_ID_BATCH_SIZE])
+                page_token = None
+                while True:
+                    runs = self.client.search_runs(
+                        experiment_ids,
+                        filter_string=f"attributes.run_id IN ({batch})",
+                        run_view_type=ViewType.ALL,
+                        page_token=page_token,
+                    )
+                    metrics.update((run.info.run_id, run.data.metrics) for run in runs)
+                    page_token = runs.token
+                    if not page_token:
+                        break
+
+        listing = (versions, metrics)
+        with _listing_lock:
+            _listing_cache[self._cache_key] = listing
+        return listing
 
-    def get_all_versions(self):
+    def invalidate_cache(self):
+        """
+        Drops the cached listing of the model, after its versions or stages changed.
+        """
+        with _listing_lock:
+            _listing_cache.pop(self._cache_key, None)
+
+    def get_all_versions(self, refresh: bool = False):
         """
         Retrieves all versions of the registered model.
+        :param refresh: Fetch from the registry even when a cached listing is fresh
         :return: List of ModelVersion objects."""
-        cds = self.client.search_model_versions(f"name='{self.model_name}'")
-        print(cds, self.model_name)
-        for m in self.client.search_registered_models():
-            print(m.name)
-        return cds
+        return self._listing(refresh)[0]
 
-    def get_best_version_by_metric(self, metric_name="roc_auc"):
+    def get_best_version_by_metric(self, metric_name="roc_auc", refresh: bool = False):
         """
         Retrieves the best model version based on the specified metric.
         :param metric_name: The metric to evaluate model performance.
+        :param refresh: Fetch from the registry even when a cached listing is fresh
         :return: Tuple of (best ModelVersion, best metric value)
         """
+        versions, run_metrics = self._listing(refresh)
+        return self._best_version(versions, run_metrics, metric_name)
+
+    @staticmethod
+    def _best_version(versions: list, run_metrics: dict, metric_name: str) -> tuple:
         best_version = None
         best_metric = -1
 
-        for mv in self.get_all_versions():
-            run = self.client.get_run(mv.run_id)
-            metrics = run.data.metrics
+        for mv in versions:
+            metrics = run_metrics.get(mv.run_id, {})
 
             if metric_name not in metrics:
                 continue
@@ -55,16 +128,53 @@ class ModelRegistryManager:
         Archives any existing production models.
         :param metric_name: The metric to evaluate model performance.
         :return: The version number of the promoted model and its metric score."""
-        best_version, score = self.get_best_version_by_metric(metric_name)
+        # One fresh listing picks the best version and finds the versions to archive
+        versions, run_metrics = self._listing(refresh=True)
+        best_version, score = self._best_version(versions, run_metrics, metric_name)
+        # Exported before the stage change, so the api never sees a Production version without its scorer
+        self.export_native_scorer(best_version)
 
         # Archive existing production models
-        for mv in self.get_all_versions():
-            if mv.current_stage == "Production":
+        for mv in versions:
+            if mv.current_stage == "Production" and mv.version != best_version.version:
                 self.client.transition_model_version_stage(name=self.model_name, version=mv.version, stage="Archived")
 
         # Promote best model
         self.client.transition_model_version_stage(
             name=self.model_name, version=best_version.version, stage="Production"
         )
+        self.invalidate_cache()
 
         return best_version.version, score
+
+    def export_native_scorer(self, model_version) -> bool:
+        """
+        Compiles the model of a version into a NumPy scoring artifact (see native_scorer.NativeScorer),
+        logged under NATIVE_SCORER_ARTIFACT_PATH of the version's run for the api to load.
+        The compiled scores are compared with the model first and nothing is exported when they
+        differ by more than NATIVE_SCORER_TOLERANCE.
+        :param model_version: ModelVersion to export
+        :return: True when the artifact was logged, False when the api has to fall back to pyfunc
+        """
+        model_uri = f"models:/{self.model_name}/{model_version.version}"
+        flavors = Model.load(model_uri).flavors
+        if "sklearn" not in flavors:
+            print(f"Version {model_version.version} is not a sklearn model, serving it through pyfunc")
+            return False
+
+        sk_model = mlflow.sklearn.load_model(model_uri)
+        scorer = compile_native_scorer(sk_model, flavors.get("python_function", {}).get("predict_fn", "predict"))
+        if scorer is None:
+            print(f"{type(sk_model).__name__} has no native scorer, serving version {model_version.version} via pyfunc")
+            return False
+
+        difference = max_score_difference(scorer, sk_model, check_rows(scorer))
+        if difference > NATIVE_SCORER_TOLERANCE:
+            print(f"Native scorer differs from version {model_version.version} by {difference}, not exporting it")
+            return False
+
+        with tempfile.TemporaryDirectory() as directory:
+            scorer.save(directory)
+            self.client.log_artifacts(model_version.run_id, directory, NATIVE_SCORER_ARTIFACT_PATH)
+        print(f"Exported {scorer.kind} native scorer for version {model_version.version}")
+        return True
@@ -0,0 +1,211 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+META_FILE_NAME = "meta.json"
+FORMAT_VERSION = 1
+# Rows walked through the trees at once, bounds the (rows, trees) node index arrays
+TREE_WALK_CELLS = 1 << 22
+
+
+class NativeScorer:
+    """
+    Scores a compiled classifier with NumPy only, bypassing pyfunc schema handling and sklearn input validation.
+    Linear models are a dot product and a sigmoid, tree ensembles are walked level by level over flattened
+    node arrays for all rows and trees at once.
+    Attributes:
+        kind (str): "linear" or "tree_ensemble".
+        arrays (dict): Array name -> np.ndarray of the compiled model.
+        classes (np.ndarray): Class labels in the order of the probability columns.
+        predict_fn (str): Pyfunc prediction function reproduced by predict, "predict" or "predict_proba".
+        feature_names (list): Columns the model was fitted on, None when it was fitted on arrays.
+        max_depth (int): Deepest leaf of any tree, 0 for linear models.
+    """
+
+    def __init__(
+        self, kind: str, arrays: dict, classes, predict_fn: str = "predict", feature_names=None, max_depth: int = 0
+    ):
+        self.kind = kind
+        self.arrays = arrays
+        self.classes = np.asarray(classes)
+        self.predict_fn = predict_fn
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.max_depth = max_depth
+
+    def _features(self, X) -> np.ndarray:
+        if hasattr(X, "columns"):
+            X = X[self.feature_names] if self.feature_names is not None else X
+            X = X.to_numpy(dtype=np.float64)
+        return np.asarray(X, dtype=np.float64).reshape(-1, self.arrays["n_features"].item())
+
+    def _linear_proba(self, X: np.ndarray) -> np.ndarray:
+        positive = 1 / (1 + np.exp(-(X @ self.arrays["coef"] + self.arrays["intercept"].item())))
+        return np.column_stack([1 - positive, positive])
+
+    def _tree_proba(self, X: np.ndarray) -> np.ndarray:
+        left, right = self.arrays["left"], self.arrays["right"]
+        feature, threshold = self.arrays["feature"], self.arrays["threshold"]
+        missing_left, value, roots = self.arrays["missing_left"], self.arrays["value"], self.arrays["roots"]
+        # Trees compare float32 features against float64 thresholds, as sklearn does
+        X = X.astype(np.float32)
+        n_features = X.shape[1]
+        proba = np.empty((len(X), value.shape[1]))
+        step = max(1, TREE_WALK_CELLS // len(roots))
+        for start in range(0, len(X), step):
+            rows = X[start : start + step]
+            # One (row, tree) pair per position, only the pairs that have not reached a leaf move down a level
+            nodes = np.tile(roots, len(rows))
+            cell_offset = np.repeat(np.arange(len(rows)) * n_features, len(roots))
+            active = np.arange(len(nodes))
+            flat_rows = rows.ravel()
+            while len(active):
+                current = nodes[active]
+                children = left[current]
+                internal = children >= 0
+                active, current, children = active[internal], current[internal], children[internal]
+                values = flat_rows[cell_offset[active] + feature[current]]
+                go_left = np.where(np.isnan(values), missing_left[current], values <= threshold[current])
+                nodes[active] = np.where(go_left, children, right[current])
+            proba[start : start + step] = value[nodes].reshape(len(rows), len(roots), -1).mean(axis=1)
+        return proba
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        :param X: DataFrame with the fitted columns, or array with the columns in fitted order
+        :return: Class probabilities of shape (n_rows, n_classes)
+        """
+        X = self._features(X)
+        return self._linear_proba(X) if self.kind == "linear" else self._tree_proba(X)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Same output as the pyfunc model: class labels for "predict", probabilities for "predict_proba".
+        """
+        proba = self.predict_proba(X)
+        return proba if self.predict_fn == "predict_proba" else self.classes[proba.argmax(axis=1)]
+
+    def save(self, directory):
+        """
+        Writes one .npy file per array and the remaining attributes as meta.json.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(directory / f"{name}.npy", array)
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "kind": self.kind,
+            "arrays": list(self.arrays),
+            "classes": self.classes.tolist(),
+            "predict_fn": self.predict_fn,
+            "feature_names": self.feature_names,
+            "max_depth": self.max_depth,
+        }
+        (directory / META_FILE_NAME).write_text(json.dumps(meta, indent=2))
+
+    @classmethod
+    def load(cls, directory, mmap_mode: str = None):
+        """
+        Reads a scorer written by save.
+        :param directory: Directory written by save
+        :param mmap_mode: np.load memory-map mode, "r" maps the arrays read-only instead of reading them, so
+            processes loading the same artifact share one copy of the weights in the page cache
+        :raises ValueError: When the artifact was written in another format version
+        """
+        directory = Path(directory)
+        meta = json.loads((directory / META_FILE_NAME).read_text())
+        if meta["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported native scorer format {meta['format_version']}, expected {FORMAT_VERSION}")
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in meta["arrays"]}
+        return cls(meta["kind"], arrays, meta["classes"], meta["predict_fn"], meta["feature_names"], meta["max_depth"])
+
+
+def _compile_trees(trees: list) -> tuple:
+    # Concatenates the node arrays of every tree, child indices become offsets into the concatenation
+    arrays = {"left": [], "right": [], "feature": [], "threshold": [], "missing_left": [], "value": [], "roots": []}
+    offset, max_depth = 0, 0
+    for tree in trees:
+        tree_ = tree.tree_
+        is_leaf = tree_.children_left < 0
+        arrays["roots"].append(offset)
+        arrays["left"].append(np.where(is_leaf, -1, tree_.children_left + offset))
+        arrays["right"].append(np.where(is_leaf, -1, tree_.children_right + offset))
+        arrays["feature"].append(np.where(is_leaf, 0, tree_.feature))
+        arrays["threshold"].append(tree_.threshold)
+        missing_left = getattr(tree_, "missing_go_to_left", np.zeros(tree_.node_count, dtype=bool))
+        arrays["missing_left"].append(np.asarray(missing_left, dtype=bool))
+        value = tree_.value[:, 0, :]
+        arrays["value"].append(value / value.sum(axis=1, keepdims=True))
+        offset += tree_.node_count
+        max_depth = max(max_depth, tree_.max_depth)
+
+    arrays = {name: np.concatenate(parts) if name != "roots" else np.array(parts) for name, parts in arrays.items()}
+    return arrays, max_depth
+
+
+def compile_native_scorer(sk_model, predict_fn: str = "predict"):
+    """
+    Compiles a fitted sklearn classifier into a NativeScorer.
+    Supported: binary LogisticRegression, DecisionTreeClassifier, RandomForestClassifier and
+    ExtraTreesClassifier with a single output.
+    :param sk_model: Fitted sklearn model
+    :param predict_fn: Pyfunc prediction function the model was logged with
+    :return: NativeScorer, or None when the model type or predict_fn is unsupported
+    :rtype: NativeScorer
+    """
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+
+    if predict_fn not in ("predict", "predict_proba"):
+        return None
+
+    feature_names = getattr(sk_model, "feature_names_in_", None)
+    n_features = np.array(sk_model.n_features_in_)
+    if isinstance(sk_model, LogisticRegression) and len(sk_model.classes_) == 2:
+        arrays = {"coef": sk_model.coef_[0].astype(np.float64), "intercept": sk_model.intercept_.astype(np.float64)}
+        return NativeScorer(
+            "linear", {**arrays, "n_features": n_features}, sk_model.classes_, predict_fn, feature_names
+        )
+
+    if isinstance(sk_model, (RandomForestClassifier, ExtraTreesClassifier)) and sk_model.n_outputs_ == 1:
+        trees = sk_model.estimators_
+    elif isinstance(sk_model, DecisionTreeClassifier) and sk_model.n_outputs_ == 1:
+        trees = [sk_model]
+    else:
+        return None
+
+    arrays, max_depth = _compile_trees(trees)
+    arrays["n_features"] = n_features
+    return NativeScorer("tree_ensemble", arrays, sk_model.classes_, predict_fn, feature_names, max_depth)
+
+
+def check_rows(scorer: NativeScorer, n_rows: int = 2_000, seed: int = 0) -> np.ndarray:
+    """
+    Rows to compare a compiled scorer with its model on: standard normal values (the WoE scale),
+    with a quarter of the cells set exactly to split thresholds of their feature for tree models.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = scorer.arrays["n_features"].item()
+    X = rng.normal(0, 2, size=(n_rows, n_features))
+    if scorer.kind == "tree_ensemble":
+        internal = np.flatnonzero(scorer.arrays["left"] >= 0)
+        if len(internal):
+            cells = rng.random(X.shape) < 0.25
+            for j in range(n_features):
+                thresholds = scorer.arrays["threshold"][internal[scorer.arrays["feature"][internal] == j]]
+                thresholds = thresholds[np.isfinite(thresholds)]  # missing-value splits use an infinite threshold
+                if len(thresholds):
+                    X[cells[:, j], j] = rng.choice(thresholds, size=cells[:, j].sum())
+    return X
+
+
+def max_score_difference(scorer: NativeScorer, sk_model, X: np.ndarray) -> float:
+    """
+    Largest absolute probability difference between the scorer and the sklearn model on X.
+    """
+    import pandas as pd
+
+    model_input = pd.DataFrame(X, columns=scorer.feature_names) if scorer.feature_names is not None else X
+    return float(np.abs(scorer.predict_proba(X) - sk_model.predict_proba(model_input)).max())
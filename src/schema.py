@@ -0,0 +1,118 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from pandas.api.types import union_categoricals
+
+from scripts.constants import RAW_SCHEMA
+
+PARSE_DTYPES = {"category": "category", "string": "string[pyarrow]"}
+ARROW_TYPES = {
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    # large_string marks the declared string columns, other text columns stay object like with read_csv
+    "string": pa.large_string(),
+    "integer": pa.int64(),
+    "float": pa.float64(),
+    "datetime": pa.timestamp("ns", tz="UTC"),
+}
+# Bytes of csv text parsed per block. Each block is typed before the next one is read,
+# so peak memory is the compact frame plus a few blocks rather than the whole untyped file.
+TYPED_CSV_BLOCK_SIZE = 32 << 20
+FALLBACK_CHUNKSIZE = 100_000
+
+
+def parse_dtypes(schema: dict = RAW_SCHEMA) -> dict:
+    """
+    Returns the read_csv dtype mapping for the schema columns that can be typed while parsing.
+    :param schema: Column -> declared type, see RAW_SCHEMA
+    :return: Dictionary to pass as read_csv(dtype=...)
+    """
+    return {col: PARSE_DTYPES[kind] for col, kind in schema.items() if kind in PARSE_DTYPES}
+
+
+def apply_schema(df: pd.DataFrame, schema: dict = RAW_SCHEMA) -> pd.DataFrame:
+    """
+    Casts the columns of df to their declared types. Columns missing from df are skipped
+    and columns that already have their declared type are left untouched.
+    :param df: Raw dataframe, modified in place
+    :param schema: Column -> declared type, see RAW_SCHEMA
+    :return: The same dataframe with compact dtypes
+    :rtype: pd.DataFrame
+    """
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+
+        series = df[col]
+        if kind in PARSE_DTYPES:
+            if series.dtype != PARSE_DTYPES[kind]:
+                df[col] = series.astype(PARSE_DTYPES[kind])
+        elif kind == "datetime":
+            if not isinstance(series.dtype, pd.DatetimeTZDtype):
+                df[col] = pd.to_datetime(series, errors="coerce", utc=True)
+        elif kind in ("integer", "float") and pd.api.types.is_numeric_dtype(series):
+            # Integer columns with missing values are float, they only get a lossless float downcast
+            downcast = kind if pd.api.types.is_integer_dtype(series) else "float"
+            df[col] = pd.to_numeric(series, downcast=downcast)
+
+    return df
+
+
+def concat_typed(chunks: list) -> pd.DataFrame:
+    """
+    Concatenates typed chunks column by column. Categoricals are unioned instead of falling back
+    to object like pd.concat does when the chunks saw different categories.
+    Each column is released from the chunks once it has been combined.
+    :param chunks: Non-empty list of dataframes with the same columns
+    :return: A single dataframe with a RangeIndex
+    :rtype: pd.DataFrame
+    """
+    columns = {}
+    for col in chunks[0].columns:
+        parts = [chunk[col] for chunk in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[col] = union_categoricals(parts, sort_categories=True)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+        del parts
+        for chunk in chunks:
+            del chunk[col]
+    return pd.DataFrame(columns)
+
+
+def _read_arrow_blocks(path, usecols, schema: dict, block_size: int) -> list:
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={col: ARROW_TYPES[kind] for col, kind in schema.items()},
+            include_columns=usecols,
+            strings_can_be_null=True,  # empty cells are missing, as with read_csv
+        ),
+    )
+    string_dtype = {pa.large_string(): pd.StringDtype("pyarrow")}.get
+    chunks = [apply_schema(batch.to_pandas(types_mapper=string_dtype), schema) for batch in reader]
+    return chunks or [apply_schema(reader.schema.empty_table().to_pandas(types_mapper=string_dtype), schema)]
+
+
+def read_csv_typed(path, usecols=None, schema: dict = RAW_SCHEMA, block_size: int = TYPED_CSV_BLOCK_SIZE):
+    """
+    Reads a whole csv straight into the declared compact dtypes, one block at a time.
+    Blocks are parsed by the Arrow csv reader, which builds categoricals and UTC timestamps natively.
+    Files Arrow rejects (e.g. unparseable timestamps, which pandas coerces to NaT) are re-read
+    in chunks with the C reader.
+    :param path: Path of the csv file
+    :param usecols: Optional list of columns to read, other columns are never parsed
+    :param schema: Column -> declared type, see RAW_SCHEMA
+    :param block_size: Bytes of csv text parsed per block
+    :return: DataFrame with compact dtypes
+    :rtype: pd.DataFrame
+    """
+    try:
+        chunks = _read_arrow_blocks(path, usecols, schema, block_size)
+    except pa.ArrowInvalid:
+        reader = pd.read_csv(path, usecols=usecols, dtype=parse_dtypes(schema), chunksize=FALLBACK_CHUNKSIZE)
+        chunks = [apply_schema(chunk, schema) for chunk in reader]
+
+    df = concat_typed(chunks) if len(chunks) > 1 else chunks[0]
+    # Unnamed header cells (a saved index) get the names read_csv gives them
+    return df.rename(columns={col: f"Unnamed: {i}" for i, col in enumerate(df.columns) if col == ""})
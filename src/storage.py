@@ -0,0 +1,147 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from scripts.constants import Columns
+from .schema import apply_schema, parse_dtypes, read_csv_typed
+
+TIME_COL = Columns.TransactionStartTime.value
+LEGACY_INDEX_COL = "Unnamed: 0"  # index written by DataManager.save_to_csv
+ISO_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _time_bounds(time_range) -> tuple:
+    """
+    Normalizes a (start, end) time range to UTC timestamps, either bound may be None.
+    """
+
+    def to_utc(value):
+        if value is None:
+            return None
+        value = pd.Timestamp(value)
+        return value.tz_localize("UTC") if value.tz is None else value.tz_convert("UTC")
+
+    start, end = time_range
+    return to_utc(start), to_utc(end)
+
+
+class CsvStorage:
+    """
+    Row-oriented text storage. Columns are projected while parsing, the time range is applied after parsing.
+    """
+
+    suffix = ".csv"
+
+    def _filter(self, df: pd.DataFrame, time_range, columns) -> pd.DataFrame:
+        df = df.drop(columns=[LEGACY_INDEX_COL], errors="ignore")
+        if time_range is not None:
+            start, end = _time_bounds(time_range)
+            times = pd.to_datetime(df[TIME_COL], errors="coerce", utc=True)
+            mask = pd.Series(True, index=df.index)
+            if start is not None:
+                mask &= times >= start
+            if end is not None:
+                mask &= times < end
+            df = df[mask.to_numpy()]
+        return df[columns] if columns is not None else df
+
+    def _usecols(self, columns, time_range):
+        if columns is None:
+            return None
+        return list(dict.fromkeys(columns + ([TIME_COL] if time_range is not None else [])))
+
+    def read(self, path, columns=None, time_range=None, schema=None) -> pd.DataFrame:
+        usecols = self._usecols(columns, time_range)
+        df = read_csv_typed(path, usecols=usecols, schema=schema) if schema else pd.read_csv(path, usecols=usecols)
+        return self._filter(df, time_range, columns)
+
+    def iter_chunks(self, path, chunksize: int, columns=None, time_range=None, schema=None):
+        dtype = parse_dtypes(schema) if schema else None
+        for chunk in pd.read_csv(path, usecols=self._usecols(columns, time_range), chunksize=chunksize, dtype=dtype):
+            yield self._filter(apply_schema(chunk, schema) if schema else chunk, time_range, columns)
+
+    def write(self, df: pd.DataFrame, path):
+        df.to_csv(path, index=False)
+
+
+class ArrowStorage:
+    """
+    Columnar storage read through pyarrow datasets (Parquet or Arrow IPC/Feather).
+    Only the requested columns are read, the time range is pushed down to the scan
+    (Parquet skips row groups from their statistics) and pandas dtypes, including
+    categoricals and tz-aware timestamps, round-trip through the stored schema metadata.
+    Attributes:
+        dataset_format (str): pyarrow dataset format name.
+        suffix (str): File suffix for this format.
+    """
+
+    def __init__(self, dataset_format: str, suffix: str):
+        self.dataset_format = dataset_format
+        self.suffix = suffix
+
+    def _scan_options(self, path, columns, time_range):
+        dataset = ds.dataset(path, format=self.dataset_format)
+        expression = None
+        if time_range is not None:
+            start, end = _time_bounds(time_range)
+            field_type = dataset.schema.field(TIME_COL).type
+            if not pa.types.is_timestamp(field_type):
+                # Raw timestamps stored as ISO strings compare correctly as text
+                start, end = (bound.strftime(ISO_TIME_FORMAT) if bound is not None else None for bound in (start, end))
+            elif field_type.tz is None:
+                start, end = (bound.tz_localize(None) if bound is not None else None for bound in (start, end))
+
+            if start is not None:
+                expression = ds.field(TIME_COL) >= start
+            if end is not None:
+                condition = ds.field(TIME_COL) < end
+                expression = condition if expression is None else expression & condition
+        return dataset, {"columns": columns, "filter": expression}
+
+    def read(self, path, columns=None, time_range=None, schema=None) -> pd.DataFrame:
+        dataset, options = self._scan_options(path, columns, time_range)
+        df = dataset.to_table(**options).to_pandas()
+        # Columns stored with their declared types are left untouched
+        return apply_schema(df, schema) if schema else df
+
+    def iter_chunks(self, path, chunksize: int, columns=None, time_range=None, schema=None):
+        dataset, options = self._scan_options(path, columns, time_range)
+        for batch in dataset.to_batches(batch_size=chunksize, **options):
+            if batch.num_rows:
+                df = pa.Table.from_batches([batch]).to_pandas()
+                yield apply_schema(df, schema) if schema else df
+
+    def write(self, df: pd.DataFrame, path):
+        table = pa.Table.from_pandas(df)
+        if self.dataset_format == "parquet":
+            pq.write_table(table, path)
+        else:
+            feather.write_feather(table, path)
+
+
+STORAGE_BACKENDS = {
+    "csv": CsvStorage(),
+    "parquet": ArrowStorage("parquet", ".parquet"),
+    "feather": ArrowStorage("feather", ".feather"),
+}
+
+
+def format_from_suffix(file_name, default: str) -> str:
+    """
+    Returns the format whose suffix file_name carries, or default when no backend matches.
+    """
+    suffix = Path(str(file_name)).suffix
+    return next((name for name, storage in STORAGE_BACKENDS.items() if storage.suffix == suffix), default)
+
+
+def get_storage(file_format: str):
+    """
+    Returns the storage backend registered for file_format ("csv", "parquet" or "feather").
+    """
+    if file_format not in STORAGE_BACKENDS:
+        raise ValueError(f"Unsupported file format {file_format}, expected one of {list(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[file_format]
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from scripts.constants import DEFAULT_RISK_THRESHOLD
+
+
+def threshold_curve(y_true, y_score) -> pd.DataFrame:
+    """
+    Confusion counts and rates at every distinct score, from a single sort of the scores.
+    A customer is labelled high risk when its score is at least the threshold; the first row
+    (threshold +inf) labels nobody, the last one everybody.
+    :param y_true: Binary target
+    :param y_score: Risk probabilities
+    :return: DataFrame with threshold, tp, fp, precision, recall (true positive rate), fpr and f1 per threshold,
+        thresholds decreasing
+    :raises ValueError: When y_true does not hold both classes
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=np.float64)
+    order = np.argsort(-y_score, kind="mergesort")
+    scores, labels = y_score[order], y_true[order]
+
+    # Last position of every run of tied scores: ties move across the threshold together
+    ends = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp = np.r_[0, np.cumsum(labels)[ends]]
+    fp = np.r_[0, ends + 1 - tp[1:]]
+    positives, negatives = tp[-1], fp[-1]
+    if positives == 0 or negatives == 0:
+        raise ValueError("Evaluating scores needs both classes in y_true")
+
+    predicted = tp + fp
+    precision = np.divide(tp, predicted, out=np.zeros(len(tp)), where=predicted > 0)
+    recall = tp / positives
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(len(tp)), where=precision + recall > 0)
+    return pd.DataFrame(
+        {
+            "threshold": np.r_[np.inf, scores[ends]],
+            "tp": tp,
+            "fp": fp,
+            "precision": precision,
+            "recall": recall,
+            "fpr": fp / negatives,
+            "f1": f1,
+        }
+    )
+
+
+def _at_threshold(curve: pd.DataFrame, threshold: float) -> pd.Series:
+    # Row of the lowest curve threshold that is still >= threshold, i.e. the labels of score >= threshold
+    position = np.searchsorted(-curve["threshold"].to_numpy(), -threshold, side="right") - 1
+    return curve.iloc[position]
+
+
+def threshold_table(curve: pd.DataFrame, default: float = DEFAULT_RISK_THRESHOLD) -> pd.DataFrame:
+    """
+    Operating points worth serving, one row per objective: the default threshold, the best F1
+    and the largest gap between true and false positive rates (the KS point).
+    :param curve: Output of threshold_curve
+    :param default: Threshold used when no objective is chosen
+    :return: DataFrame indexed by objective with threshold, precision, recall, fpr, f1 and accuracy
+    """
+    positives, negatives = curve["tp"].iloc[-1], curve["fp"].iloc[-1]
+    scored = curve.iloc[1:]  # an infinite threshold labels nobody, it is no operating point
+    rows = {
+        "default": _at_threshold(curve, default),
+        "max_f1": scored.loc[scored["f1"].idxmax()],
+        "max_ks": scored.loc[(scored["recall"] - scored["fpr"]).idxmax()],
+    }
+    table = pd.DataFrame(rows).T[["threshold", "tp", "fp", "precision", "recall", "fpr", "f1"]].astype(float)
+    table.loc["default", "threshold"] = default
+    table["accuracy"] = (table["tp"] + negatives - table["fp"]) / (positives + negatives)
+    table.index.name = "objective"
+    return table.drop(columns=["tp", "fp"])
+
+
+def evaluate_scores(y_true, y_score, threshold: float = DEFAULT_RISK_THRESHOLD) -> tuple:
+    """
+    Every evaluation metric from one threshold curve: accuracy, precision, recall and f1 at the threshold,
+    ROC-AUC (trapezoids over the curve, ties included), the KS statistic and the Gini coefficient.
+    :param y_true: Binary target
+    :param y_score: Risk probabilities
+    :param threshold: Score from which a customer is labelled high risk
+    :return: (metrics dict, threshold table)
+    """
+    curve = threshold_curve(y_true, y_score)
+    table = threshold_table(curve, threshold)
+    roc_auc = float(np.trapezoid(curve["recall"], curve["fpr"]))
+    metrics = {
+        "accuracy": float(table.loc["default", "accuracy"]),
+        "precision": float(table.loc["default", "precision"]),
+        "recall": float(table.loc["default", "recall"]),
+        "f1": float(table.loc["default", "f1"]),
+        "roc_auc": roc_auc,
+        "ks": float((curve["recall"] - curve["fpr"]).max()),
+        "gini": 2 * roc_auc - 1,
+    }
+    return metrics, table
@@ -5,9 +5,9 @@ from sklearn.metrics import (
     precision_score,
     recall_score,
     f1_score,
-    roc_auc_score,
 )
-from scripts.constants import MODEL_NAME
+from scripts.constants import DEFAULT_RISK_THRESHOLD, MODEL_NAME, THRESHOLD_TABLE_ARTIFACT_PATH
+from .evaluation import evaluate_scores
 
 
 class ExperimentRunner:
@@ -15,6 +15,8 @@ class ExperimentRunner:
         self.model = model
         self.model_name = model_name
         self.metrics = {}
+        # Operating points by objective, computed by evaluate for models with predict_proba
+        self.threshold_table = None
         # Support tuning
         self.param_search = param_search
 
@@ -33,20 +35,37 @@ class ExperimentRunner:
             self.model.fit(X_train, y_train)
             self.best_params = self.model.get_params()
 
-    def evaluate(self, X_test, y_test):
-        y_pred = self.model.predict(X_test)
-        y_prob = self.model.predict_proba(X_test)[:, 1] if hasattr(self.model, "predict_proba") else None
+    def train_incremental(self, batches, classes):
+        """
+        Fits the model batch by batch with partial_fit, for training sets that do not fit in memory.
+        :param batches: Iterable of (X_batch, y_batch)
+        :param classes: Every target class, partial_fit cannot infer them from a single batch
+        """
+        if not hasattr(self.model, "partial_fit"):
+            raise TypeError(f"{type(self.model).__name__} does not support partial_fit")
+        for X_batch, y_batch in batches:
+            self.model.partial_fit(X_batch, y_batch, classes=classes)
+        self.best_params = self.model.get_params()
+
+    def evaluate_scores(self, y_test, y_prob, threshold: float = DEFAULT_RISK_THRESHOLD):
+        """
+        Computes the metrics and the threshold table from already predicted risk probabilities.
+        """
+        self.metrics, self.threshold_table = evaluate_scores(y_test, y_prob, threshold)
+        return self.metrics
 
+    def evaluate(self, X_test, y_test, threshold: float = DEFAULT_RISK_THRESHOLD):
+        if hasattr(self.model, "predict_proba"):
+            # One inference pass: labels and every metric are derived from the probabilities
+            return self.evaluate_scores(y_test, self.model.predict_proba(X_test)[:, 1], threshold)
+
+        y_pred = self.model.predict(X_test)
         self.metrics = {
             "accuracy": accuracy_score(y_test, y_pred),
             "precision": precision_score(y_test, y_pred, zero_division=0),
             "recall": recall_score(y_test, y_pred),
             "f1": f1_score(y_test, y_pred),
         }
-
-        if y_prob is not None:
-            self.metrics["roc_auc"] = roc_auc_score(y_test, y_prob)
-
         return self.metrics
 
     def log_to_mlflow(self):
@@ -58,9 +77,18 @@ class ExperimentRunner:
         for metric, value in self.metrics.items():
             mlflow.log_metric(metric, value)
 
-        mlflow.sklearn.log_model(self.model, artifact_path="model")
+        if self.threshold_table is not None:
+            # Read by the api to pick its is_high_risk threshold (HIGH_RISK_THRESHOLD)
+            mlflow.log_dict(self.threshold_table.to_dict(orient="index"), THRESHOLD_TABLE_ARTIFACT_PATH)
+
+        # Served scores are risk probabilities, the threshold table picks the cutoff applied to them
+        mlflow.sklearn.log_model(self.model, artifact_path="model", pyfunc_predict_fn="predict_proba")
 
         run_id = mlflow.active_run().info.run_id
         model_uri = f"runs:/{run_id}/model"
 
         mlflow.register_model(model_uri=model_uri, name=MODEL_NAME)
+
+        # Budgeted searches log their rungs as nested runs of this one
+        if hasattr(self.param_search, "log_to_mlflow"):
+            self.param_search.log_to_mlflow(run_name_prefix=self.model_name)
@@ -0,0 +1,184 @@
+import math
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterSampler, StratifiedKFold
+
+
+def _take(X, index):
+    return X.iloc[index] if hasattr(X, "iloc") else X[index]
+
+
+def _loggable(params: dict) -> dict:
+    return {k: v if isinstance(v, (str, int, float, bool, type(None))) else str(v) for k, v in params.items()}
+
+
+class SuccessiveHalvingSearch:
+    """
+    Budgeted hyperparameter search, a drop-in param_search for ExperimentRunner.
+    Candidates sampled from param_distributions are scored on a small budget first, either a stratified
+    subset of every training fold (resource="n_samples") or a low value of an estimator parameter such as
+    n_estimators, and only the best 1/factor of them move on to the next rung with factor times the budget.
+    Fold splits are computed once and reused by every rung and candidate; estimators that support warm_start
+    keep their fitted fold models between rungs and only grow the added trees. The best candidate is refitted
+    on all of the data with the full budget.
+    Attributes:
+        estimator: Unfitted sklearn estimator the candidates are cloned from.
+        param_distributions (dict): Parameter -> list of values or scipy distribution, as for RandomizedSearchCV.
+        n_candidates (int): Candidates sampled for the first rung.
+        factor (int): Budget multiplier and inverse of the share of candidates kept per rung.
+        resource (str): "n_samples" or the estimator parameter used as the budget.
+        max_resources (int): Budget of the last rung, defaults to the training fold size for "n_samples".
+        min_resources (int): Budget of the first rung, derived from max_resources when not given.
+        scoring (str): sklearn scorer name.
+        cv: Number of stratified folds, or a list of (train, test) index pairs.
+        random_state (int): Seed of the candidate sampling and of the folds.
+        best_estimator_: Best candidate refitted on all of the data.
+        best_params_ (dict): Parameters of the best candidate, with the full budget.
+        best_score_ (float): Mean fold score of the best candidate on the last rung.
+        rungs_ (list): Per rung: budget, candidates with their mean fold score, fits and seconds spent.
+        n_fits_ (int): Candidate fold fits, the final refit excluded.
+    """
+
+    def __init__(
+        self,
+        estimator,
+        param_distributions: dict,
+        n_candidates: int = 27,
+        factor: int = 3,
+        resource: str = "n_samples",
+        max_resources: int = None,
+        min_resources: int = None,
+        scoring: str = "roc_auc",
+        cv=3,
+        random_state: int = None,
+    ):
+        if factor < 2:
+            raise ValueError(f"factor must be at least 2, got {factor}")
+        if resource != "n_samples" and max_resources is None:
+            raise ValueError(f"max_resources is required when the budget is the {resource!r} parameter")
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_candidates = n_candidates
+        self.factor = factor
+        self.resource = resource
+        self.max_resources = max_resources
+        self.min_resources = min_resources
+        self.scoring = scoring
+        self.cv = cv
+        self.random_state = random_state
+
+    def _folds(self, y: np.ndarray) -> list:
+        if not isinstance(self.cv, int):
+            return [(np.asarray(train), np.asarray(test)) for train, test in self.cv]
+        splitter = StratifiedKFold(n_splits=self.cv, shuffle=True, random_state=self.random_state)
+        return list(splitter.split(np.zeros(len(y)), y))
+
+    def _stratified_order(self, train: np.ndarray, y: np.ndarray, rng) -> np.ndarray:
+        """
+        Orders a training fold so that every prefix keeps the class proportions: the subsets of the
+        successive rungs are then nested and none of them misses a class.
+        """
+        train = rng.permutation(train)
+        position = np.empty(len(train))
+        for label in np.unique(y[train]):
+            members = np.flatnonzero(y[train] == label)
+            position[members] = (np.arange(len(members)) + 0.5) / len(members)
+        return train[np.argsort(position, kind="stable")]
+
+    def _schedule(self, n_candidates: int, max_resources: int) -> list:
+        n_rungs = max(1, math.ceil(math.log(n_candidates, self.factor))) if n_candidates > 1 else 1
+        min_resources = self.min_resources or max(1, max_resources // self.factor ** (n_rungs - 1))
+        if self.resource == "n_samples":
+            min_resources = max(min_resources, 20)  # a few rows per class at least
+        return [min(max_resources, min_resources * self.factor**rung) for rung in range(n_rungs - 1)] + [max_resources]
+
+    def fit(self, X, y):
+        """
+        Runs the rungs and refits the best candidate on X, y.
+        :param X: Training features
+        :param y: Binary target
+        :return: self
+        """
+        y = np.asarray(y)
+        scorer = get_scorer(self.scoring)
+        rng = np.random.default_rng(self.random_state)
+        folds = self._folds(y)
+        by_samples = self.resource == "n_samples"
+        orders = [self._stratified_order(train, y, rng) for train, _ in folds] if by_samples else None
+        max_resources = self.max_resources or min(len(train) for train, _ in folds)
+        warm = not by_samples and "warm_start" in self.estimator.get_params()
+
+        candidates = list(ParameterSampler(self.param_distributions, self.n_candidates, random_state=self.random_state))
+        schedule = self._schedule(len(candidates), max_resources)
+        alive = list(range(len(candidates)))
+        fold_models = {}  # (candidate, fold) -> fitted estimator, grown between rungs when warm starting
+        self.rungs_, self.n_fits_ = [], 0
+
+        for rung, n_resources in enumerate(schedule):
+            start = time.perf_counter()
+            scores = {}
+            for candidate in alive:
+                fold_scores = []
+                for fold, (train, test) in enumerate(folds):
+                    if by_samples:
+                        model = clone(self.estimator).set_params(**candidates[candidate])
+                        train = orders[fold][:n_resources]
+                    else:
+                        model = fold_models.get((candidate, fold))
+                        if model is None:
+                            model = clone(self.estimator).set_params(**candidates[candidate])
+                            model.set_params(**({"warm_start": True} if warm else {}))
+                        model.set_params(**{self.resource: n_resources})
+                    model.fit(_take(X, train), y[train])
+                    if warm:
+                        fold_models[(candidate, fold)] = model
+                    fold_scores.append(scorer(model, _take(X, test), y[test]))
+                    self.n_fits_ += 1
+                scores[candidate] = float(np.mean(fold_scores))
+
+            ranked = sorted(alive, key=lambda c: scores[c], reverse=True)
+            self.rungs_.append(
+                {
+                    "rung": rung,
+                    "n_resources": int(n_resources),
+                    "n_candidates": len(alive),
+                    "candidates": [{"params": _loggable(candidates[c]), "score": scores[c]} for c in ranked],
+                    "fit_seconds": time.perf_counter() - start,
+                }
+            )
+            alive = ranked[: max(1, math.ceil(len(ranked) / self.factor))]
+            fold_models = {key: model for key, model in fold_models.items() if key[0] in alive}
+            if len(alive) == 1:
+                break
+
+        best = alive[0]
+        self.best_score_ = scores[best]
+        self.best_params_ = dict(candidates[best], **({} if by_samples else {self.resource: max_resources}))
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
+
+    def log_to_mlflow(self, run_name_prefix: str):
+        """
+        Logs the search budget to the active run and every rung as a nested run of it,
+        with the candidates and their scores as a json artifact.
+        :param run_name_prefix: Prefix of the nested run names
+        """
+        import mlflow
+
+        mlflow.log_metric("search_fits", self.n_fits_)
+        for rung in self.rungs_:
+            with mlflow.start_run(run_name=f"{run_name_prefix}_rung_{rung['rung']}", nested=True):
+                mlflow.log_params(
+                    {
+                        "rung": rung["rung"],
+                        "resource": self.resource,
+                        "n_resources": rung["n_resources"],
+                        "n_candidates": rung["n_candidates"],
+                    }
+                )
+                mlflow.log_metric(f"best_{self.scoring}", rung["candidates"][0]["score"])
+                mlflow.log_metric("fit_seconds", rung["fit_seconds"])
+                mlflow.log_dict({"candidates": rung["candidates"]}, "candidates.json")
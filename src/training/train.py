@@ -1,17 +1,70 @@
-from src import ExperimentRunner
+from src import DataManager, ExperimentRunner
 from scripts.constants import (
+    FEATURE_ORDER,
     MODEL_NAME,
+    READY_TO_MODEL_DATA_FILE_NAME,
+    TRAINING_CHUNK_ROWS,
 )
 from sklearn.model_selection import train_test_split
+from concurrent.futures import ProcessPoolExecutor
 import mlflow
+import numpy as np
 import os
 import pandas as pd
+import tempfile
+import time
 from pathlib import Path
 
 project_root = Path.cwd().parent
 mlruns_path = os.path.join(project_root, "mlruns")
 os.makedirs(mlruns_path, exist_ok=True)
 
+SPLIT_ARRAYS = ("X_train", "X_test", "y_train", "y_test")
+
+
+def _load_split(split_dir: str, columns: list) -> tuple:
+    """
+    Maps the shared split read-only, the frames wrap the mapped arrays without copying them.
+    """
+    arrays = {name: np.load(os.path.join(split_dir, f"{name}.npy"), mmap_mode="r") for name in SPLIT_ARRAYS}
+    return (
+        pd.DataFrame(arrays["X_train"], columns=columns, copy=False),
+        pd.DataFrame(arrays["X_test"], columns=columns, copy=False),
+        arrays["y_train"],
+        arrays["y_test"],
+    )
+
+
+def _holdout_mask(y: np.ndarray, seen: dict, test_size: float) -> np.ndarray:
+    """
+    Systematic stratified sampling: within each class, the rows whose running count crosses a multiple of
+    1 / test_size are held out. The same rows are picked on every pass over the file and every class
+    keeps test_size of its rows, whatever the chunk boundaries.
+    :param y: Target of one chunk
+    :param seen: Class -> rows of that class in the previous chunks, updated in place
+    """
+    mask = np.zeros(len(y), dtype=bool)
+    for label in np.unique(y):
+        rows = np.flatnonzero(y == label)
+        k = seen.get(label, 0) + np.arange(len(rows))
+        mask[rows] = np.floor((k + 1) * test_size) > np.floor(k * test_size)
+        seen[label] = seen.get(label, 0) + len(rows)
+    return mask
+
+
+def _train_and_evaluate(runner: ExperimentRunner, split_dir: str, columns: list) -> tuple:
+    """
+    Pool worker: trains and evaluates one runner on the shared split, logging is left to the parent.
+    """
+    from threadpoolctl import threadpool_limits
+
+    start = time.perf_counter()
+    X_train, X_test, y_train, y_test = _load_split(split_dir, columns)
+    with threadpool_limits(limits=1):  # one core per worker, BLAS threads would oversubscribe them
+        runner.train(X_train, y_train)
+        runner.evaluate(X_test, y_test)
+    return runner, time.perf_counter() - start
+
 
 class TrainModels:
     """
@@ -21,8 +74,9 @@ class TrainModels:
 
     def __init__(self, training_df: pd.DataFrame, target_col: str):
         self.target_col = target_col
-        self.y = training_df[target_col]
-        self.X = training_df.drop(columns=[target_col])
+        # None when the training data is only streamed from disk, see run_streaming_experiment
+        self.y = training_df[target_col] if training_df is not None else None
+        self.X = training_df.drop(columns=[target_col]) if training_df is not None else None
 
         self.X_train = None
         self.X_test = None
@@ -61,3 +115,117 @@ class TrainModels:
             runner.log_to_mlflow()
 
         return metrics
+
+    def run_experiments(self, runners: dict, max_workers: int = None) -> dict:
+        """
+        Trains and evaluates many runners in parallel, one per pool worker, then logs each to its own MLflow run.
+        The split is saved once as .npy files that every worker memory-maps, so it is not pickled per runner.
+        MLflow runs are logged and models registered from this process only, one after the other, which keeps
+        the tracking store and the registry version numbers consistent.
+        :param runners: run name -> ExperimentRunner, replaced by the fitted runner once it is logged
+        :param max_workers: Worker processes, defaults to one per runner up to the number of cores
+        :return: run name -> metrics, in the order of runners
+        :rtype: dict
+        """
+        if self.X_train is None:
+            raise ValueError("Call split_data before run_experiments")
+        max_workers = max_workers or min(len(runners), os.cpu_count() or 1)
+        results = {}
+        with tempfile.TemporaryDirectory(prefix="split-") as split_dir:
+            split = {
+                "X_train": self.X_train.to_numpy(dtype=np.float64),
+                "X_test": self.X_test.to_numpy(dtype=np.float64),
+                "y_train": self.y_train.to_numpy(),
+                "y_test": self.y_test.to_numpy(),
+            }
+            for name, array in split.items():
+                np.save(os.path.join(split_dir, f"{name}.npy"), np.ascontiguousarray(array))
+            columns = list(self.X_train.columns)
+
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    run_name: pool.submit(_train_and_evaluate, runner, split_dir, columns)
+                    for run_name, runner in runners.items()
+                }
+                for run_name, future in futures.items():
+                    runner, seconds = future.result()
+                    with mlflow.start_run(run_name=run_name):
+                        mlflow.log_metric("train_seconds", seconds)
+                        runner.log_to_mlflow()
+                    runners[run_name] = runner
+                    results[run_name] = runner.metrics
+                    print(f"{run_name}: trained and evaluated in {seconds:.1f}s")
+
+        return results
+
+    def run_streaming_experiment(
+        self,
+        run_name: str,
+        runner: ExperimentRunner,
+        file_name: str = READY_TO_MODEL_DATA_FILE_NAME,
+        file_format: str = None,
+        feature_cols: list = FEATURE_ORDER,
+        chunksize: int = TRAINING_CHUNK_ROWS,
+        test_size: float = 0.2,
+        n_epochs: int = 1,
+        random_state: int = 42,
+    ):
+        """
+        Executes one MLflow run for a runner whose model supports partial_fit, reading the model-ready
+        dataset chunk by chunk instead of holding it in memory.
+        A deterministic stratified hold-out (test_size of every class) is left out of training; each epoch feeds
+        the other rows to partial_fit one shuffled chunk at a time, and a last pass scores the hold-out rows,
+        keeping only their target and risk probability. The run is logged like run_experiment.
+        :param run_name: MLflow run name
+        :param runner: ExperimentRunner of a model with partial_fit and predict_proba (SGDClassifier(loss="log_loss"))
+        :param file_name: Clean data file, resolved like DataManager.load_chunks(load_clean=True)
+        :param file_format: "csv", "parquet" or "feather", defaults to csv for READY_TO_MODEL_DATA_FILE_NAME
+            (the notebooks write it with DataManager.save_to_csv) and to the STORAGE_FORMATS / suffix format otherwise
+        :param feature_cols: Model input columns
+        :param chunksize: Rows read at once
+        :param test_size: Share of every class held out for evaluation
+        :param n_epochs: Passes over the training rows
+        :param random_state: Seed of the within-chunk shuffling
+        :return: Metrics for downstream comparison
+        """
+        data_manager = DataManager()
+        if file_format is None and str(file_name) == READY_TO_MODEL_DATA_FILE_NAME:
+            file_format = "csv"
+        columns = list(feature_cols) + [self.target_col]
+        rng = np.random.default_rng(random_state)
+
+        def training_batches():
+            for _ in range(n_epochs):
+                seen = {}
+                for chunk in data_manager.load_chunks(
+                    load_clean=True,
+                    file_name=file_name,
+                    file_format=file_format,
+                    chunksize=chunksize,
+                    columns=columns,
+                ):
+                    y = chunk[self.target_col].to_numpy()
+                    train = np.flatnonzero(~_holdout_mask(y, seen, test_size))
+                    train = rng.permutation(train)
+                    yield chunk[feature_cols].iloc[train], y[train]
+
+        with mlflow.start_run(run_name=run_name):
+            runner.train_incremental(training_batches(), classes=np.array([0, 1]))
+
+            seen, y_test, y_prob = {}, [], []
+            for chunk in data_manager.load_chunks(
+                load_clean=True,
+                file_name=file_name,
+                file_format=file_format,
+                chunksize=chunksize,
+                columns=columns,
+            ):
+                y = chunk[self.target_col].to_numpy()
+                holdout = _holdout_mask(y, seen, test_size)
+                if holdout.any():
+                    y_test.append(y[holdout])
+                    y_prob.append(runner.model.predict_proba(chunk[feature_cols][holdout])[:, 1])
+            metrics = runner.evaluate_scores(np.concatenate(y_test), np.concatenate(y_prob))
+            runner.log_to_mlflow()
+
+        return metrics
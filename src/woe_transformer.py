@@ -2,6 +2,46 @@ import pandas as pd
 import numpy as np
 from scripts.constants import WOE_CANDIDATE_COLS, TARGET_COL
 
+MISSING_LABEL = "MISSING"
+OTHER_LABEL = "OTHER_LOW_VOLUME"
+PROTECTED_CATEGORIES = ["transport"]  # never merged into OTHER_LOW_VOLUME
+
+
+def _qcut_edges(sorted_values: np.ndarray, bins: int) -> np.ndarray:
+    """
+    Bin edges pd.qcut(q=bins, duplicates="drop") finds on these values, read from the sorted values
+    with the same linear interpolation (percentiles, as pandas computes them) instead of a new pass.
+    """
+    n_values = len(sorted_values)
+    quantiles = np.true_divide(np.linspace(0, 1, bins + 1) * 100.0, 100)
+    virtual_index = quantiles * (n_values - 1)
+    below = np.floor(virtual_index).astype(np.int64)
+    above = np.minimum(below + 1, n_values - 1)
+    weight = virtual_index - below
+    low, high = sorted_values[below], sorted_values[above]
+    step = high - low
+    return np.unique(np.where(weight >= 0.5, high - step * (1 - weight), low + step * weight))
+
+
+def _monotonic_merge(good: np.ndarray, bad: np.ndarray, increasing: bool):
+    """
+    Merges adjacent bins until their bad rate is monotonic (pool adjacent violators).
+    :return: Tuple of the merged good and bad counts
+    """
+    blocks = []
+    for bin_good, bin_bad in zip(good.tolist(), bad.tolist()):
+        blocks.append([bin_good, bin_bad])
+        while len(blocks) > 1:
+            (prev_good, prev_bad), (last_good, last_bad) = blocks[-2], blocks[-1]
+            # Compare bad rates without dividing: prev_bad / prev_n vs last_bad / last_n
+            prev_rate, last_rate = prev_bad * (last_good + last_bad), last_bad * (prev_good + prev_bad)
+            if (prev_rate <= last_rate) if increasing else (prev_rate >= last_rate):
+                break
+            blocks[-2:] = [[prev_good + last_good, prev_bad + last_bad]]
+
+    merged = np.array(blocks, dtype=np.float64).reshape(-1, 2)
+    return merged[:, 0], merged[:, 1]
+
 
 class WoeTransformer:
     """
@@ -13,6 +53,9 @@ class WoeTransformer:
         category_count_min_threashold (int): Minimum count threshold for categorical features.
         EPS (float): Smoothing constant to avoid division by zero.
         woe_maps (dict): A dictionary to store WoE mappings for each feature.
+        bin_labels (dict): Feature -> array of bin labels learned during fit, indexed by bin code.
+        bin_codes (dict): Feature -> integer bin code of every row of df, -1 for values without a bin.
+        sufficient_stats (dict): Feature -> per-value good/bad counts of df used by sweep_iv, computed once.
     """
 
     def __init__(self, df: pd.DataFrame):
@@ -27,6 +70,13 @@ class WoeTransformer:
         # Learned during fit
         self.numeric_bin_edges = {}  # feature -> bin edges
         self.category_merge_map = {}  # feature -> set(low volume categories)
+        self.bin_labels = {}  # feature -> labels, bin code i is labelled bin_labels[feature][i]
+
+        # Computed during transform
+        self.bin_codes = {}
+
+        # Computed by the first sweep_iv
+        self.sufficient_stats = {}
 
     # =========================
     # FIT PHASE
@@ -39,6 +89,10 @@ class WoeTransformer:
         bin_edges[-1] = np.inf
 
         self.numeric_bin_edges[feature.name] = bin_edges
+        # Missing values get the last code
+        self.bin_labels[feature.name] = np.array(
+            [f"bin_{i}" for i in range(len(bin_edges) - 1)] + [MISSING_LABEL], dtype=object
+        )
 
     def _fit_categorical(self, feature: pd.Series):
         feature_name = feature.name
@@ -48,31 +102,56 @@ class WoeTransformer:
             self.category_merge_map[feature_name] = set()
 
         feature_counts = feature.value_counts()
+        low_volume = (feature_counts <= self.category_count_min_threashold) & ~feature_counts.index.isin(
+            PROTECTED_CATEGORIES
+        )
+        self.category_merge_map[feature_name].update(feature_counts.index[low_volume])
 
-        for category, count in feature_counts.items():
-            if category != "transport" and count <= self.category_count_min_threashold:  # protected category
-                self.category_merge_map[feature_name].add(category)
+        labels = np.where(low_volume, OTHER_LABEL, feature_counts.index.to_numpy(dtype=object))
+        self.bin_labels[feature_name] = np.asarray(pd.unique(labels), dtype=object)
 
     # =========================
     # TRANSFORM PHASE
     # =========================
-    def _transform_numeric(self, feature: pd.Series) -> pd.Series:
+    def _bin_codes_numeric(self, feature: pd.Series) -> np.ndarray:
         bin_edges = self.numeric_bin_edges[feature.name]
-        bin_labels = [f"bin_{i}" for i in range(len(bin_edges) - 1)]
+        values = feature.to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # Bins are closed on the right like pd.cut: code i holds edges[i] < value <= edges[i + 1]
+        codes = np.searchsorted(bin_edges[1:-1], values, side="left")
+        codes[np.isnan(values)] = len(bin_edges) - 1
+        return codes
+
+    def _bin_codes_categorical(self, feature: pd.Series) -> np.ndarray:
+        # Categories are matched once per distinct value, rows only gather the resulting codes
+        value_codes, uniques = pd.factorize(feature)
+        uniques = np.asarray(uniques, dtype=object)
+        low_volume_categories = list(self.category_merge_map.get(feature.name, set()))
 
-        binned = pd.cut(feature, bins=bin_edges, labels=bin_labels, include_lowest=True)
-        return binned.astype("object").fillna("MISSING")
+        merged = np.where(pd.Index(uniques).isin(low_volume_categories), OTHER_LABEL, uniques)
+        unique_codes = pd.Index(self.bin_labels[feature.name]).get_indexer(merged)
+        return np.append(unique_codes, -1)[value_codes]
+
+    def _bin_codes(self, feature: pd.Series) -> np.ndarray:
+        if feature.name in self.numeric_bin_edges:
+            return self._bin_codes_numeric(feature)
+        return self._bin_codes_categorical(feature)
+
+    def _transform_numeric(self, feature: pd.Series) -> pd.Series:
+        codes = self._bin_codes_numeric(feature)
+        return pd.Series(self.bin_labels[feature.name].take(codes), index=feature.index, name=feature.name)
 
     def _transform_categorical(self, feature: pd.Series) -> pd.Series:
-        feature_name = feature.name
-        low_volume_categories = self.category_merge_map.get(feature_name, set())
-        return feature.apply(lambda x: "OTHER_LOW_VOLUME" if x in low_volume_categories else x)
+        codes = self._bin_codes_categorical(feature)
+        # Categories unseen during fit keep their value
+        labels = np.where(codes >= 0, self.bin_labels[feature.name].take(codes), feature.to_numpy(dtype=object))
+        return pd.Series(labels, index=feature.index, name=feature.name)
 
     def _fit(self, feature_cols):
         for col in feature_cols:
             series = self.df[col]
 
-            if series.dtype == "object":
+            if not pd.api.types.is_numeric_dtype(series):
                 self._fit_categorical(series)
             else:
                 self._fit_numeric(series)
@@ -80,17 +159,27 @@ class WoeTransformer:
         return self
 
     def _transform(self, feature_cols):
-        working_df = self.df.copy()
-
-        for col in feature_cols:
-            if working_df[col].dtype == "object":
-                working_df[col] = self._transform_categorical(working_df[col])
+        # Feature columns are replaced by their bin labels, the other columns are shared with df
+        columns = {}
+        for col in self.df.columns:
+            if col in feature_cols:
+                self.bin_codes[col] = self._bin_codes(self.df[col])
+                if col in self.numeric_bin_edges:
+                    columns[col] = self._transform_numeric(self.df[col])
+                else:
+                    columns[col] = self._transform_categorical(self.df[col])
             else:
-                working_df[col] = self._transform_numeric(working_df[col])
+                columns[col] = self.df[col]
 
+        working_df = pd.DataFrame(columns, index=self.df.index, copy=False)
         self.binned_df = working_df
         return working_df
 
+    def _woe_lookup(self, feature: str) -> np.ndarray:
+        # WoE of every bin code, with NaN appended for code -1 and for bins without a WoE
+        woe_map = self.woe_maps[feature]
+        return np.array([woe_map.get(label, np.nan) for label in self.bin_labels[feature]] + [np.nan])
+
     # =========================
     # PUBLIC METHODS
     # =========================
@@ -99,35 +188,187 @@ class WoeTransformer:
         self.transformed_df = self._transform(WOE_CANDIDATE_COLS)
         return self.transformed_df
 
-    def get_iv_table(self):
-        working_df = self.transformed_df.copy()
-        feature_cols = [c for c in working_df.columns if c != TARGET_COL]
-        iv_results = []
-        total_good = (working_df[TARGET_COL] == 0).sum()
-        total_bad = (working_df[TARGET_COL] == 1).sum()
+    def _iv_bin_codes(self, feature_cols):
+        # Bin codes and labels of every feature, columns without fitted bins are binned by value
         for col in feature_cols:
-            tmp = pd.DataFrame({"bin": working_df[col], TARGET_COL: working_df[TARGET_COL]})
-
-            grouped = tmp.groupby("bin")[TARGET_COL].agg(total="count", bad="sum")
-
-            grouped["good"] = grouped["total"] - grouped["bad"]
-
-            # Apply smoothing
-            grouped["good_s"] = grouped["good"] + self.EPS
-            grouped["bad_s"] = grouped["bad"] + self.EPS
-
-            grouped["dist_good"] = grouped["good_s"] / (total_good + self.EPS * len(grouped))
-            grouped["dist_bad"] = grouped["bad_s"] / (total_bad + self.EPS * len(grouped))
-
-            grouped["woe"] = np.log(grouped["dist_good"] / grouped["dist_bad"])
-            grouped["iv"] = (grouped["dist_good"] - grouped["dist_bad"]) * grouped["woe"]
+            if col in self.bin_codes:
+                yield self.bin_codes[col], self.bin_labels[col]
+            else:
+                codes, labels = pd.factorize(self.transformed_df[col])
+                yield codes, np.asarray(labels, dtype=object)
+
+    def compute_iv_and_woe(self):
+        """
+        Computes the WoE of every bin and the IV of every feature in one pass: the bin codes of all
+        features are offset into one index space and the good/bad counts come from a single bincount.
+        Only bins holding rows count towards the EPS smoothing, as with a groupby over the bins.
+        :return: Tuple of the IV table (feature, iv) sorted by decreasing iv and the woe_maps (feature -> bin -> woe)
+        """
+        if self.transformed_df is None:
+            raise ValueError("Call fit_transform() first")
 
-            self.woe_maps[col] = grouped["woe"].to_dict()
+        feature_cols = [c for c in self.transformed_df.columns if c != TARGET_COL]
+        target = self.transformed_df[TARGET_COL].to_numpy(dtype=np.float64, na_value=np.nan)
+        total_good = (target == 0).sum()
+        total_bad = (target == 1).sum()
+        # 0 good, 1 bad, 2 missing target (the row still makes its bin observed)
+        target_codes = np.where(np.isnan(target), 2, target).astype(np.int64)
+
+        stacked, all_labels, n_bins, offset = [], [], [], 0
+        for codes, labels in self._iv_bin_codes(feature_cols):
+            binned = codes >= 0
+            stacked.append((codes[binned] + offset) * 3 + target_codes[binned])
+            all_labels.append(labels)
+            n_bins.append(len(labels))
+            offset += len(labels)
+
+        counts = np.bincount(np.concatenate(stacked) if stacked else [], minlength=offset * 3).reshape(offset, 3)
+        good, bad = counts[:, 0], counts[:, 1]
+        observed = counts.sum(axis=1) > 0
+        feature_of_bin = np.repeat(np.arange(len(feature_cols)), n_bins)
+        n_observed = np.bincount(feature_of_bin[observed], minlength=len(feature_cols))
+
+        # Apply smoothing
+        dist_good = (good + self.EPS) / (total_good + self.EPS * n_observed[feature_of_bin])
+        dist_bad = (bad + self.EPS) / (total_bad + self.EPS * n_observed[feature_of_bin])
+        woe = np.log(dist_good / dist_bad)
+        iv = np.bincount(
+            feature_of_bin[observed], weights=((dist_good - dist_bad) * woe)[observed], minlength=len(feature_cols)
+        )
+
+        bin_starts = np.r_[0, np.cumsum(n_bins)]
+        woe_maps = {}
+        for i, (col, labels) in enumerate(zip(feature_cols, all_labels)):
+            feature_bins = slice(bin_starts[i], bin_starts[i + 1])
+            feature_observed = observed[feature_bins]
+            woe_maps[col] = dict(zip(labels[feature_observed].tolist(), woe[feature_bins][feature_observed].tolist()))
+
+        iv_df = pd.DataFrame({"feature": feature_cols, "iv": iv}).sort_values("iv", ascending=False)
+        return iv_df, woe_maps
 
-            feature_iv = grouped["iv"].sum()
-            iv_results.append({"feature": col, "iv": feature_iv})
+    def get_iv_table(self):
+        iv_df, self.woe_maps = self.compute_iv_and_woe()
+        return iv_df
 
-        return pd.DataFrame(iv_results).sort_values("iv", ascending=False)
+    # =========================
+    # BINNING CONFIGURATION SEARCH
+    # =========================
+    def _iv_from_counts(self, good: np.ndarray, bad: np.ndarray, total_good: int, total_bad: int) -> float:
+        # Same smoothing as compute_iv_and_woe, over the bins holding rows
+        dist_good = (good + self.EPS) / (total_good + self.EPS * len(good))
+        dist_bad = (bad + self.EPS) / (total_bad + self.EPS * len(bad))
+        return float(((dist_good - dist_bad) * np.log(dist_good / dist_bad)).sum())
+
+    def _sufficient_stats(self, col: str, target: np.ndarray) -> dict:
+        series = self.df[col]
+        is_good, is_bad = (target == 0).astype(np.int64), (target == 1).astype(np.int64)
+
+        if not pd.api.types.is_numeric_dtype(series):
+            codes, categories = pd.factorize(series)
+            counted = codes >= 0
+            return {
+                "categories": np.asarray(categories, dtype=object),
+                "rows": np.bincount(codes[counted], minlength=len(categories)),
+                "good": np.bincount(codes[counted], weights=is_good[counted], minlength=len(categories)),
+                "bad": np.bincount(codes[counted], weights=is_bad[counted], minlength=len(categories)),
+            }
+
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(values)
+        order = np.argsort(values[~missing], kind="stable")
+        sorted_values = values[~missing][order]
+        distinct, starts = np.unique(sorted_values, return_index=True)
+        ends = np.r_[starts[1:], len(sorted_values)]
+        # Cumulative counts of the rows with a value <= each distinct value, led by a 0
+        return {
+            "sorted_values": sorted_values,
+            "distinct": distinct,
+            "cum_rows": np.r_[0, ends],
+            "cum_good": np.r_[0, np.cumsum(is_good[~missing][order])][np.r_[0, ends]],
+            "cum_bad": np.r_[0, np.cumsum(is_bad[~missing][order])][np.r_[0, ends]],
+            "missing": (missing.sum(), is_good[missing].sum(), is_bad[missing].sum()),
+        }
+
+    def _numeric_bin_counts(self, stats: dict, bins: int):
+        # Good and bad counts of the non-empty qcut bins, then of the MISSING bin
+        if len(stats["sorted_values"]) == 0:
+            bin_ends = np.zeros(1, dtype=np.int64)
+        else:
+            inner_edges = _qcut_edges(stats["sorted_values"], bins)[1:-1]
+            # Bins are closed on the right: bin i ends after the last distinct value <= its edge
+            bin_ends = np.r_[np.searchsorted(stats["distinct"], inner_edges, side="right"), len(stats["distinct"])]
+        bin_starts = np.r_[0, bin_ends[:-1]]
+
+        rows = stats["cum_rows"][bin_ends] - stats["cum_rows"][bin_starts]
+        good = (stats["cum_good"][bin_ends] - stats["cum_good"][bin_starts])[rows > 0]
+        bad = (stats["cum_bad"][bin_ends] - stats["cum_bad"][bin_starts])[rows > 0]
+        return good, bad
+
+    def sweep_iv(
+        self,
+        bins_grid=range(2, 21),
+        threshold_grid=(0, 10, 30, 50, 100),
+        monotonic=(False, True),
+        features: list = None,
+    ) -> pd.DataFrame:
+        """
+        Evaluates the IV of every feature over many binning configurations without rescanning df.
+        Per-value good/bad counts are computed once per feature (sorted distinct values with cumulative
+        counts for numeric features, a count table per category otherwise), every configuration is then
+        scored from those counts. Non-monotonic results equal get_iv_table after fit_transform with the
+        same bins and category_count_min_threashold.
+        :param bins_grid: Candidate numbers of quantile bins for numeric features
+        :param threshold_grid: Candidate category_count_min_threashold values for categorical features
+        :param monotonic: Whether numeric bins are also merged until their bad rate is monotonic (the direction
+            with the higher IV is kept), False and/or True
+        :param features: Features to sweep, defaults to WOE_CANDIDATE_COLS
+        :return: IV surface with one row per feature and configuration: feature, bins,
+            category_count_min_threashold, monotonic, n_bins (bins holding rows) and iv
+        :rtype: pd.DataFrame
+        """
+        features = features if features is not None else WOE_CANDIDATE_COLS
+        target = self.df[TARGET_COL].to_numpy(dtype=np.float64, na_value=np.nan)
+        total_good, total_bad = (target == 0).sum(), (target == 1).sum()
+
+        rows = []
+        for col in features:
+            if col not in self.sufficient_stats:
+                self.sufficient_stats[col] = self._sufficient_stats(col, target)
+            stats = self.sufficient_stats[col]
+
+            if "categories" in stats:
+                protected = pd.Index(stats["categories"]).isin(PROTECTED_CATEGORIES)
+                for threshold in threshold_grid:
+                    low_volume = (stats["rows"] <= threshold) & ~protected
+                    good, bad = stats["good"][~low_volume], stats["bad"][~low_volume]
+                    if stats["rows"][low_volume].sum() > 0:  # OTHER_LOW_VOLUME bin
+                        good = np.r_[good, stats["good"][low_volume].sum()]
+                        bad = np.r_[bad, stats["bad"][low_volume].sum()]
+                    iv = self._iv_from_counts(good, bad, total_good, total_bad)
+                    rows.append((col, np.nan, threshold, False, len(good), iv))
+                continue
+
+            missing_rows, missing_good, missing_bad = stats["missing"]
+            for bins in bins_grid:
+                good, bad = self._numeric_bin_counts(stats, bins)
+                for merge in monotonic:
+                    candidates = [(good, bad)]
+                    if merge:
+                        candidates = [_monotonic_merge(good, bad, increasing) for increasing in (True, False)]
+
+                    best = None
+                    for candidate_good, candidate_bad in candidates:
+                        if missing_rows:
+                            candidate_good = np.r_[candidate_good, missing_good]
+                            candidate_bad = np.r_[candidate_bad, missing_bad]
+                        iv = self._iv_from_counts(candidate_good, candidate_bad, total_good, total_bad)
+                        if best is None or iv > best[1]:
+                            best = (len(candidate_good), iv)
+                    rows.append((col, bins, np.nan, merge, *best))
+
+        return pd.DataFrame(
+            rows, columns=["feature", "bins", "category_count_min_threashold", "monotonic", "n_bins", "iv"]
+        )
 
     # =========================
     # WOe TRANSFORM PHASE
@@ -136,10 +377,35 @@ class WoeTransformer:
         if self.binned_df is None:
             raise ValueError("Call fit_transform() first")
 
-        woe_df = self.binned_df.copy()
-
-        for feature, woe_map in self.woe_maps.items():
-            woe_df[feature] = woe_df[feature].map(woe_map)
+        columns = {}
+        for col in self.binned_df.columns:
+            if col in self.woe_maps and col in self.bin_codes:
+                columns[col] = self._woe_lookup(col)[self.bin_codes[col]]
+            elif col in self.woe_maps:
+                columns[col] = self.binned_df[col].map(self.woe_maps[col])
+            else:
+                columns[col] = self.binned_df[col]
 
+        woe_df = pd.DataFrame(columns, index=self.binned_df.index)
         self.woe_df = woe_df
         return woe_df
+
+    def transform_to_woe_matrix(self, df: pd.DataFrame = None, features: list = None) -> np.ndarray:
+        """
+        Bins and WoE-encodes features straight from bin codes, without building label columns.
+        :param df: Dataframe to encode with the fitted bins, defaults to the fitted df
+        :param features: Feature order of the matrix columns, defaults to the WOE_CANDIDATE_COLS with a WoE map
+        :return: C-contiguous float64 matrix of shape (rows, features), NaN for values without a WoE
+        :rtype: np.ndarray
+        """
+        if not self.woe_maps:
+            raise ValueError("Call get_iv_table() first")
+
+        features = features if features is not None else [col for col in WOE_CANDIDATE_COLS if col in self.woe_maps]
+        n_rows = len(self.df) if df is None else len(df)
+
+        matrix = np.empty((n_rows, len(features)), dtype=np.float64)
+        for i, feature in enumerate(features):
+            codes = self.bin_codes[feature] if df is None else self._bin_codes(df[feature])
+            matrix[:, i] = self._woe_lookup(feature)[codes]
+        return matrix
@@ -0,0 +1,26 @@
+import mlflow
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.constants import MODEL_NAME
+
+
+@pytest.fixture
+def tracking_uri(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_CACHE_DIR", str(tmp_path / "model_cache"))
+    previous = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    mlflow.set_experiment(MODEL_NAME)
+    yield mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(previous)
+
+
+def build_woe_df(n: int = 2000, seed: int = 0) -> tuple:
+    """
+    Helper function to build WoE-like features with a few missing values and a binary target.
+    """
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(0, 1, size=(n, 6)), columns=[f"feature_{i}" for i in range(6)])
+    y = pd.Series((X.to_numpy() @ np.linspace(-1, 1, 6) + rng.normal(0, 1, n) > 0).astype(int))
+    return X, y
@@ -0,0 +1,295 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregation import CustomerAggregateState, CustomerAggregationEngine, most_common_by_group
+from src.schema import apply_schema
+from src.data_pipeline import CustomAggregator, DataPreprocessor, TimeFeatureExtractor
+from src.feature_store import CustomerFeatureStore
+from src.woe_transformer import WoeTransformer
+from scripts.constants import Columns, Aggregated_Columns, Default_Enums, FEATURE_ORDER, TARGET_COL, WOE_CANDIDATE_COLS
+
+
+def _build_raw_df(n: int = 400, n_customers: int = 40, seed: int = 0) -> pd.DataFrame:
+    """
+    Helper function to build a raw transaction dataframe with plenty of ties
+    and a few missing timestamps and categories.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = (
+        pd.Series(pd.to_datetime("2018-11-01", utc=True) + pd.to_timedelta(rng.integers(0, 120 * 24, size=n), unit="h"))
+        .dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+        .to_numpy(dtype=object)
+    )
+    timestamps[rng.random(n) < 0.05] = "not-a-date"
+    categories = rng.choice(["airtime", "financial_services", "transport", "utility_bill"], size=n).astype(object)
+    categories[rng.random(n) < 0.05] = None
+
+    return pd.DataFrame(
+        {
+            Columns.TransactionId.value: [f"TransactionId_{i}" for i in range(n)],
+            Columns.CustomerId.value: [f"CustomerId_{i}" for i in rng.integers(0, n_customers, size=n)],
+            Columns.Amount.value: rng.choice([-500.0, 100.0, 1000.0, 2500.0], size=n),
+            Columns.ProductCategory.value: categories,
+            Columns.ChannelId.value: rng.choice(["ChannelId_1", "ChannelId_2", "ChannelId_3"], size=n),
+            Columns.TransactionStartTime.value: timestamps,
+        }
+    )
+
+
+def _mode_or(default):
+    return lambda row: (row.mode()[0] if not row.mode().empty else default)
+
+
+# =====================================================
+# TEST 1: Vectorized mode matches Series.mode()[0]
+# =====================================================
+@pytest.mark.parametrize("n_customers, dense_min_cells", [(5, 1 << 16), (1500, 1 << 16), (1500, 0)])
+def test_most_common_by_group_matches_series_mode(monkeypatch, n_customers, dense_min_cells):
+    monkeypatch.setattr("src.aggregation.DENSE_COUNT_TABLE_MIN_CELLS", dense_min_cells)
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(
+        {
+            "key": rng.integers(0, n_customers, size=2000),
+            "value": rng.choice([3.0, 1.0, 2.0, np.nan], size=2000),
+        }
+    )
+    expected = df.groupby("key")["value"].agg(_mode_or(None))
+
+    codes, keys = pd.factorize(df["key"], sort=True)
+    result = most_common_by_group(codes, len(keys), df["value"])
+
+    np.testing.assert_array_equal(result.to_numpy(dtype=float), expected.to_numpy(dtype=float))
+
+
+def test_most_common_by_group_uses_default_for_empty_groups():
+    codes = np.array([0, 0, 1, 1, 2])
+    values = pd.Series(["b", "a", None, None, "c"])
+
+    result = most_common_by_group(codes, 3, values, Default_Enums.UNKNOWN.value)
+
+    assert result.tolist() == ["a", Default_Enums.UNKNOWN.value, "c"]
+
+
+# =====================================================
+# TEST 2: CustomAggregator keeps the lambda semantics
+# =====================================================
+def test_custom_aggregator_most_common_columns_match_mode():
+    time_df = TimeFeatureExtractor().transform(_build_raw_df())
+    aggregated_df = CustomAggregator().transform(time_df)
+
+    grouped = time_df.groupby(Columns.CustomerId.value)
+    expected = {
+        Aggregated_Columns.MostCommonTransactionDay.value: grouped[Aggregated_Columns.TransactionDay.value].agg(
+            _mode_or(None)
+        ),
+        Aggregated_Columns.MostCommonTransactionMonth.value: grouped[Aggregated_Columns.TransactionMonth.value].agg(
+            _mode_or(None)
+        ),
+        Aggregated_Columns.MostCommonProductCategory.value: grouped[Columns.ProductCategory.value].agg(
+            _mode_or(Default_Enums.UNKNOWN.value)
+        ),
+        Aggregated_Columns.MostCommonChannel.value: grouped[Columns.ChannelId.value].agg(
+            _mode_or(Default_Enums.UNKNOWN.value)
+        ),
+    }
+
+    aggregated_df = aggregated_df.set_index(Columns.CustomerId.value)
+    for col, expected_series in expected.items():
+        pd.testing.assert_series_equal(aggregated_df[col], expected_series, check_names=False, check_dtype=False)
+
+
+# =====================================================
+# TEST 3: Aggregation engine matches pandas groupby
+# =====================================================
+def test_aggregation_engine_matches_groupby():
+    raw_df = _build_raw_df()
+    raw_df.loc[::7, Columns.Amount.value] = np.nan
+    agg_config = {
+        "total": (Columns.Amount.value, "sum"),
+        "average": (Columns.Amount.value, "mean"),
+        "std": (Columns.Amount.value, "std"),
+        "count": (Columns.TransactionId.value, "count"),
+        "unique": (Columns.ProductCategory.value, "nunique"),
+    }
+
+    result = CustomerAggregationEngine(Columns.CustomerId.value, agg_config).aggregate(raw_df)
+    expected = raw_df.groupby(Columns.CustomerId.value).agg(**agg_config).reset_index()
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_aggregation_engine_rejects_unknown_aggregation():
+    with pytest.raises(ValueError):
+        CustomerAggregationEngine(Columns.CustomerId.value, {"median": (Columns.Amount.value, "median")})
+
+
+def test_time_feature_extractor_does_not_modify_input():
+    raw_df = _build_raw_df()
+    original = raw_df.copy()
+
+    TimeFeatureExtractor().transform(raw_df)
+
+    pd.testing.assert_frame_equal(raw_df, original)
+
+
+# =====================================================
+# TEST 4: Merged chunk states match the in-memory path
+# =====================================================
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_merged_partial_states_match_in_memory_aggregation(seed):
+    time_df = TimeFeatureExtractor().transform(_build_raw_df(seed=seed))
+    aggregator = CustomAggregator()
+    expected = aggregator.transform(time_df)
+
+    rng = np.random.default_rng(seed)
+    bounds = [0, *np.sort(rng.choice(np.arange(1, len(time_df)), size=4, replace=False)), len(time_df)]
+    chunks = [time_df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    state = aggregator.aggregate_partial(chunks[0])
+    for chunk in chunks[1:]:
+        state = state.merge(aggregator.aggregate_partial(chunk))
+
+    pd.testing.assert_frame_equal(aggregator.transform_state(state), expected)
+
+
+def test_transform_chunks_matches_transform_all():
+    raw_df = _build_raw_df()
+    expected = DataPreprocessor(raw_df).transform_all()
+
+    chunks = (raw_df.iloc[start : start + 64] for start in range(0, len(raw_df), 64))
+    result = DataPreprocessor().transform_chunks(chunks)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+# =====================================================
+# TEST 5: Typed raw data gives the same features
+# =====================================================
+def test_raw_schema_does_not_change_features():
+    raw_df = _build_raw_df()
+    typed_df = apply_schema(raw_df.copy())
+
+    assert isinstance(typed_df[Columns.CustomerId.value].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(DataPreprocessor(typed_df).transform_all(), DataPreprocessor(raw_df).transform_all())
+
+    typed_chunks = (apply_schema(raw_df.iloc[start : start + 64].copy()) for start in range(0, len(raw_df), 64))
+    pd.testing.assert_frame_equal(
+        DataPreprocessor().transform_chunks(typed_chunks), DataPreprocessor(raw_df).transform_all()
+    )
+
+
+# =====================================================
+# TEST 6: Incremental refresh matches a full recompute
+# =====================================================
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_refresh_matches_full_recompute(tmp_path, seed):
+    raw_df = _build_raw_df(n=600, n_customers=60, seed=seed)
+    rng = np.random.default_rng(seed)
+    bounds = [0, *np.sort(rng.choice(np.arange(1, len(raw_df)), size=3, replace=False)), len(raw_df)]
+    batches = [raw_df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    state_dir = tmp_path / "state"
+
+    preprocessor = DataPreprocessor()
+    aggregator = CustomAggregator()
+    for i, batch in enumerate(batches):
+        refreshed = preprocessor.refresh(batch, state_dir=state_dir)
+
+        # Full recompute over every transaction seen so far, restricted to the customers of the batch
+        history_df = TimeFeatureExtractor().transform(pd.concat(batches[: i + 1]))
+        expected = aggregator.transform(history_df)
+        expected = expected[expected[Columns.CustomerId.value].isin(batch[Columns.CustomerId.value])]
+
+        pd.testing.assert_frame_equal(refreshed, expected.reset_index(drop=True))
+
+    state = CustomerAggregateState.load(state_dir, Columns.CustomerId.value, CustomAggregator.agg_config)
+    pd.testing.assert_frame_equal(
+        aggregator.transform_state(state), aggregator.transform(TimeFeatureExtractor().transform(raw_df))
+    )
+
+
+def test_refreshed_state_is_logged_and_compacted(tmp_path):
+    raw_df = TimeFeatureExtractor().transform(_build_raw_df(n=600, n_customers=60))
+    aggregator = CustomAggregator()
+    batches = [aggregator.aggregate_partial(raw_df.iloc[start : start + 100]) for start in range(0, 600, 100)]
+    state_dir = tmp_path / "state"
+
+    state = CustomerAggregateState(Columns.CustomerId.value, CustomAggregator.agg_config)
+    signatures = []
+    for batch_state in batches:
+        state.update(batch_state)
+        state.save_update(state_dir, batch_state, max_deltas=2)
+        signatures.append(CustomerAggregateState.signature(state_dir))
+        loaded = CustomerAggregateState.load(state_dir, Columns.CustomerId.value, CustomAggregator.agg_config)
+        pd.testing.assert_frame_equal(aggregator.transform_state(loaded), aggregator.transform_state(state))
+
+    assert len(set(signatures)) == len(batches)
+    # A snapshot, then two deltas before every compaction
+    assert sorted(path.name for path in state_dir.iterdir() if path.is_dir()) == [
+        "delta-2-1",
+        "delta-2-2",
+        "snapshot-2",
+    ]
+    pd.testing.assert_frame_equal(aggregator.transform_state(state), aggregator.transform(raw_df))
+
+
+# =====================================================
+# TEST 7: Fitted preprocessing transforms without refitting
+# =====================================================
+def test_transform_uses_statistics_learned_at_fit(tmp_path):
+    train_df = _build_raw_df(seed=0)
+    new_df = _build_raw_df(n=100, n_customers=15, seed=1)
+
+    preprocessor = DataPreprocessor(train_df).fit()
+    scaler = preprocessor.pipeline.named_steps["feature_scaler"].scaler
+    centers = [transformer.center_.copy() for _, transformer, _ in scaler.transformers_[:2]]
+
+    scored = preprocessor.transform(new_df)
+    pd.testing.assert_frame_equal(preprocessor.transform(train_df), DataPreprocessor(train_df).transform_all())
+    assert not scored.equals(DataPreprocessor(new_df).transform_all())  # not refit on the new batch
+    for center, (_, transformer, _) in zip(centers, scaler.transformers_[:2]):
+        np.testing.assert_array_equal(transformer.center_, center)
+
+    loaded = DataPreprocessor.load(preprocessor.save(tmp_path / "preprocessor.joblib"))
+    pd.testing.assert_frame_equal(loaded.transform(new_df), scored)
+
+
+def test_transform_requires_fit():
+    with pytest.raises(ValueError):
+        DataPreprocessor().transform(_build_raw_df())
+
+
+# =====================================================
+# TEST 8: Feature store holds the WoE rows of the pipeline
+# =====================================================
+@pytest.mark.filterwarnings("ignore")
+def test_feature_store_is_published_and_refreshed_by_the_pipeline(tmp_path):
+    raw_df = _build_raw_df(n=1000, n_customers=80)
+    history, batch = raw_df.iloc[:800], raw_df.iloc[800:]
+    preprocessor = DataPreprocessor(history).fit()
+    customer_df = preprocessor.transform(history).infer_objects()
+    woe_df = customer_df[WOE_CANDIDATE_COLS].assign(**{TARGET_COL: np.arange(len(customer_df)) % 2})
+    woe_transformer = WoeTransformer(woe_df)
+    woe_transformer.fit_transform()
+    woe_transformer.get_iv_table()
+
+    def expected_rows(df: pd.DataFrame) -> pd.DataFrame:
+        features = woe_transformer.transform_to_woe_matrix(df, FEATURE_ORDER)
+        return pd.DataFrame(features, index=df[Columns.CustomerId.value].astype(str))
+
+    store_dir, state_dir = tmp_path / "store", tmp_path / "state"
+    preprocessor.refresh(history, state_dir=state_dir)  # aggregate state of the history
+    store = preprocessor.publish_features(history, woe_transformer, store_dir=store_dir)
+    expected = expected_rows(preprocessor.transform(history))
+    assert len(store) == len(expected) and store.feature_order == FEATURE_ORDER
+    for customer_id in expected.index[:10]:
+        np.testing.assert_array_equal(store.row(customer_id), expected.loc[customer_id].to_numpy())
+
+    refreshed = preprocessor.refresh_feature_store(batch, woe_transformer, state_dir=state_dir, store_dir=store_dir)
+    assert store.is_stale() and refreshed.generation == store.generation + 1
+    # Customers of the batch get the features of a full recompute, the others keep theirs
+    expected = expected_rows(preprocessor.transform(raw_df))
+    assert set(refreshed.customer_ids) == set(expected.index)
+    for customer_id in expected.index:
+        np.testing.assert_allclose(refreshed.row(customer_id), expected.loc[customer_id].to_numpy())
+    assert not CustomerFeatureStore.open(store_dir).is_stale()
@@ -0,0 +1,459 @@
+import asyncio
+import importlib
+import json
+import logging
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import model_loader
+from src.api.model_loader import LoadedModel, load_model_version
+from src.api.batching import MicroBatcher
+from src.api.prediction_cache import PredictionCache
+from src.api.features import RequestEncoder, load_channel_woe, save_channel_woe
+from src.api.structured_logging import JsonFormatter
+from src.feature_store import CustomerFeatureStore
+from src.woe_transformer import OTHER_LABEL
+
+
+class _LogisticModel:
+    """
+    Helper model scoring like a fitted logistic regression on the WoE features,
+    standing in for the registry model so the api can be imported without a tracking server.
+    """
+
+    def __init__(self, feature_order: list = None):
+        self.feature_order = feature_order
+        self.calls = 0
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        self.calls += 1
+        if self.feature_order is not None:
+            assert list(df.columns) == self.feature_order
+        weights = np.linspace(-0.5, 0.5, df.shape[1])
+        return 1 / (1 + np.exp(-(df.to_numpy(dtype=float) @ weights)))
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(model_loader, "load_model_version", lambda: LoadedModel(_LogisticModel(), "1"))
+    sys.modules.pop("src.api.main", None)
+    main = importlib.import_module("src.api.main")
+    main.serving.current.model.feature_order = main.FEATURE_ORDER
+    return main
+
+
+def _build_records(api, n: int = 25, seed: int = 0) -> list:
+    """
+    Helper function to build prediction payloads with WoE-like feature values.
+    """
+    rng = np.random.default_rng(seed)
+    return [dict(zip(api.FEATURE_ORDER, rng.normal(0, 2, size=len(api.FEATURE_ORDER)).round(4))) for _ in range(n)]
+
+
+def test_batch_predict_matches_single_predict_in_input_order(api):
+    client = TestClient(api.app)
+    records = _build_records(api)
+
+    singles = [client.post("/predict", json=record).json() for record in records]
+    calls_before = api.serving.current.model.calls
+    by_records = client.post("/predict/batch", json={"records": records})
+    columns = {col: [record[col] for record in records] for col in api.FEATURE_ORDER}
+    by_columns = client.post("/predict/batch", json={"columns": columns})
+
+    assert by_records.status_code == 200 and by_columns.status_code == 200
+    assert api.serving.current.model.calls - calls_before == 2  # one vectorized call per batch
+    for response in (by_records.json(), by_columns.json()):
+        assert response["risk_probability"] == pytest.approx([single["risk_probability"] for single in singles])
+        assert response["is_high_risk"] == [single["is_high_risk"] for single in singles]
+
+
+def test_batch_predict_rejects_invalid_payloads(api):
+    client = TestClient(api.app)
+    records = _build_records(api, n=3)
+    columns = {col: [record[col] for record in records] for col in api.FEATURE_ORDER}
+    ragged = dict(columns, TransactionCount=columns["TransactionCount"][:2])
+
+    assert client.post("/predict/batch", json={}).status_code == 422
+    assert client.post("/predict/batch", json={"records": records, "columns": columns}).status_code == 422
+    assert client.post("/predict/batch", json={"columns": ragged}).status_code == 422
+    empty = {"risk_probability": [], "is_high_risk": [], "model_version": "1"}
+    assert client.post("/predict/batch", json={"records": []}).json() == empty
+
+
+def test_micro_batcher_coalesces_concurrent_requests_in_order():
+    batches = []
+
+    def predict_batch(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(predict_batch, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(run()) == [i * 10 for i in range(20)]
+    assert [len(batch) for batch in batches] == [8, 8, 4]
+    assert sum(batches, []) == list(range(20))
+
+
+def test_micro_batcher_fails_every_request_of_a_failed_batch():
+    def predict_batch(items):
+        if 3 in items:
+            raise ValueError("bad batch")
+        return items
+
+    async def run():
+        batcher = MicroBatcher(predict_batch, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(6)), return_exceptions=True)
+        # The worker keeps serving after a failed batch
+        results.append(await batcher.submit(7))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results[:4])
+    assert results[4:] == [4, 5, 7]
+
+
+def test_predict_without_batching(api, monkeypatch):
+    monkeypatch.setenv("PREDICT_MAX_BATCH_SIZE", "1")
+    unbatched = importlib.reload(api)
+    unbatched.serving.current.model.feature_order = unbatched.FEATURE_ORDER
+    assert unbatched.batcher is None
+
+    record = _build_records(unbatched, n=1)[0]
+    response = TestClient(unbatched.app).post("/predict", json=record).json()
+    expected = unbatched.serving.current.model.predict(pd.DataFrame([record])[unbatched.FEATURE_ORDER])[0]
+    assert response["risk_probability"] == pytest.approx(expected)
+
+
+def test_channel_labels_are_encoded_with_the_woe_table(api):
+    api.encoder.channel_woe = {"ChannelId_3": -0.75}
+    client = TestClient(api.app)
+    record = _build_records(api, n=1)[0]
+
+    by_label = client.post("/predict", json=dict(record, MostCommonChannel="ChannelId_3")).json()
+    by_woe = client.post("/predict", json=dict(record, MostCommonChannel=-0.75)).json()
+    unknown = client.post("/predict", json=dict(record, MostCommonChannel="ChannelId_9"))
+
+    assert by_label == by_woe
+    assert unknown.status_code == 422 and "ChannelId_9" in unknown.json()["detail"]
+    assert client.post("/predict", json=dict(record, MostCommonChannel=None)).status_code == 422
+
+
+def test_request_encoder_matrix_matches_frame_reindexing(api):
+    records = _build_records(api, n=5)
+    requests = [api.PredictionRequest(**record) for record in records]
+    encoder = RequestEncoder(api.FEATURE_ORDER)
+    expected = pd.DataFrame(records)[api.FEATURE_ORDER].to_numpy(dtype=float)
+
+    out = np.full((5, len(api.FEATURE_ORDER)), np.nan)
+    assert encoder.matrix(requests, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+    np.testing.assert_array_equal(encoder.row(requests[2]), expected[2])
+
+
+def test_channel_woe_table_round_trip_includes_merged_channels(tmp_path):
+    woe_transformer = SimpleNamespace(
+        woe_maps={"MostCommonChannel": {"ChannelId_3": -0.5, "ChannelId_2": 0.25, OTHER_LABEL: 1.0}},
+        category_merge_map={"MostCommonChannel": {"ChannelId_4", "ChannelId_5"}},
+    )
+    path = tmp_path / "channel_woe.json"
+    save_channel_woe(woe_transformer, path)
+
+    assert load_channel_woe(path) == {
+        "ChannelId_3": -0.5,
+        "ChannelId_2": 0.25,
+        OTHER_LABEL: 1.0,
+        "ChannelId_4": 1.0,
+        "ChannelId_5": 1.0,
+    }
+    assert load_channel_woe(tmp_path / "missing.json") == {}
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.makeLogRecord({"name": "api", "levelname": "INFO", "msg": "batch prediction", "rows": 3})
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "batch prediction" and entry["rows"] == 3 and entry["level"] == "INFO"
+
+
+def test_prediction_cache_evicts_least_recently_used_and_expired_rows():
+    now = [0.0]
+    cache = PredictionCache(max_size=2, ttl_seconds=10, timer=lambda: now[0])
+    rows = np.arange(6, dtype=float).reshape(3, 2)
+
+    keys, scores, missing = cache.lookup("1", rows[:2])
+    assert missing.all()
+    cache.store("1", keys, [0.1, 0.2])
+    cache.lookup("1", rows[:1])  # row 0 becomes the most recently used
+    keys, _, _ = cache.lookup("1", rows[2:])
+    cache.store("1", keys, [0.3])  # evicts row 1
+    _, scores, missing = cache.lookup("1", rows)
+    assert missing.tolist() == [False, True, False] and scores[[0, 2]].tolist() == [0.1, 0.3]
+
+    now[0] = 11.0
+    assert cache.lookup("1", rows)[2].all()
+    assert cache.stats()["size"] == 0 and cache.stats()["hits"] == 3
+
+
+def test_prediction_cache_is_emptied_when_the_model_version_changes():
+    cache = PredictionCache(max_size=10, ttl_seconds=60)
+    row = np.ones((1, 3))
+    keys, _, _ = cache.lookup("1", row)
+    cache.store("1", keys, [0.4])
+    assert not cache.lookup("1", row)[2][0]
+
+    keys, _, missing = cache.lookup("2", row)
+    cache.store("1", keys, [0.4])  # scored by the previous version before the swap, not kept
+    assert missing[0] and cache.lookup("2", row)[2][0]
+    assert cache.stats()["model_version"] == "2"
+
+
+def test_cached_predictions_skip_the_model(api, monkeypatch):
+    monkeypatch.setenv("PREDICT_CACHE_SIZE", "100")
+    cached_api = importlib.reload(api)
+    model = cached_api.serving.current.model
+    model.feature_order = cached_api.FEATURE_ORDER
+    client = TestClient(cached_api.app)
+    records = _build_records(cached_api, n=4)
+
+    first = client.post("/predict", json=records[0]).json()
+    calls = model.calls
+    assert client.post("/predict", json=records[0]).json() == first
+    assert model.calls == calls
+
+    # Only the rows that are not cached yet are scored, in one call
+    batch = client.post("/predict/batch", json={"records": records}).json()
+    assert model.calls == calls + 1 and batch["risk_probability"][0] == first["risk_probability"]
+    assert client.post("/predict/batch", json={"records": records}).json() == batch
+    assert model.calls == calls + 1
+
+    stats = client.get("/cache/stats").json()
+    assert stats["enabled"] and stats == dict(stats, hits=6, misses=4, size=4, model_version="1")
+
+
+def test_customers_are_scored_from_the_feature_store(api, monkeypatch, tmp_path):
+    monkeypatch.setenv("FEATURE_STORE_DIR", str(tmp_path))
+    store_api = importlib.reload(api)
+    store_api.serving.current.model.feature_order = store_api.FEATURE_ORDER
+    client = TestClient(store_api.app)
+    assert client.get("/predict/customer/CustomerId_1").status_code == 503  # nothing published yet
+
+    records = _build_records(store_api, n=5)
+    customer_ids = [f"CustomerId_{i}" for i in range(len(records))]
+    features = np.array([[record[col] for col in store_api.FEATURE_ORDER] for record in records])
+    CustomerFeatureStore.write(customer_ids, features, store_api.FEATURE_ORDER, tmp_path)
+
+    response = client.get("/predict/customer/CustomerId_3").json()
+    expected = client.post("/predict", json=records[3]).json()
+    assert response == dict(expected, CustomerId="CustomerId_3")
+    assert client.get("/predict/customer/CustomerId_9").status_code == 404
+
+    # A generation published by the pipeline is picked up without restarting
+    store = CustomerFeatureStore.open(tmp_path).upsert(["CustomerId_9"], features[:1])
+    expected = client.post("/predict", json=records[0]).json()["risk_probability"]
+    assert client.get("/predict/customer/CustomerId_9").json()["risk_probability"] == expected
+
+    export = client.get("/predict/customers")
+    lines = export.text.splitlines()
+    assert lines[0] == "CustomerId,risk_probability,is_high_risk,model_version" and len(lines) == len(store) + 1
+    exported = {line.split(",")[0]: float(line.split(",")[1]) for line in lines[1:]}
+    assert exported["CustomerId_3"] == pytest.approx(response["risk_probability"])
+    assert export.headers["X-Model-Version"] == "1"
+
+
+def test_background_loading_reports_loading_until_ready(monkeypatch):
+    release = threading.Event()
+
+    def slow_loader():
+        release.wait(10)
+        return LoadedModel(_LogisticModel(), "7", {"load": 0.0})
+
+    monkeypatch.setenv("MODEL_LOAD_MODE", "background")
+    monkeypatch.setattr(model_loader, "load_model_version", slow_loader)
+    sys.modules.pop("src.api.main", None)
+    api = importlib.import_module("src.api.main")
+    record = _build_records(api, n=1)[0]
+
+    with TestClient(api.app) as client:
+        assert client.get("/health/live").json() == {"status": "alive"}
+        loading = client.get("/health/ready")
+        assert loading.status_code == 503 and loading.json()["status"] == "loading"
+        assert client.post("/predict", json=record).status_code == 503
+
+        release.set()
+        assert api.serving.wait(10)
+        ready = client.get("/health/ready").json()
+        assert ready["status"] == "ready" and ready["model_version"] == "7" and "startup" in ready["timings"]
+        assert client.post("/predict", json=record).status_code == 200
+
+
+def test_failed_background_load_is_reported_and_retried(monkeypatch):
+    attempts = []
+
+    def flaky_loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("registry unreachable")
+        return LoadedModel(_LogisticModel(), "2")
+
+    monkeypatch.setenv("MODEL_LOAD_MODE", "background")
+    monkeypatch.setattr(model_loader, "load_model_version", flaky_loader)
+    sys.modules.pop("src.api.main", None)
+    api = importlib.import_module("src.api.main")
+
+    with TestClient(api.app) as client:
+        api.serving.wait(10)
+        failed = client.get("/health/ready")
+        assert failed.status_code == 503
+        assert failed.json() == {"status": "failed", "error": "RuntimeError: registry unreachable"}
+
+        api.serving.start()
+        assert api.serving.wait(10)
+        assert client.get("/health/ready").json()["model_version"] == "2"
+
+
+def test_watcher_swaps_in_promoted_versions_after_warming_them_up(monkeypatch):
+    production = {"version": "1"}
+    models = {}
+
+    def loader(version=None, run_id=None):
+        version = version or production["version"]
+        if version == "3":
+            raise RuntimeError("artifact missing")
+        models[version] = _LogisticModel()
+        return LoadedModel(models[version], version)
+
+    monkeypatch.setenv("MODEL_WATCH_INTERVAL", "0.02")
+    monkeypatch.setattr(model_loader, "load_model_version", loader)
+    monkeypatch.setattr(model_loader, "resolve_production_version", lambda: (production["version"], None))
+    sys.modules.pop("src.api.main", None)
+    api = importlib.import_module("src.api.main")
+    records = _build_records(api, n=4)
+
+    def served_version(timeout: float = 5.0, expected: str = None) -> str:
+        deadline = time.monotonic() + timeout
+        while True:
+            version = client.post("/predict", json=records[0]).json()["model_version"]
+            if version == expected or time.monotonic() > deadline:
+                return version
+            time.sleep(0.01)
+
+    with TestClient(api.app) as client:
+        assert served_version(timeout=0) == "1"
+        production["version"] = "2"
+        assert served_version(expected="2") == "2"
+        assert models["2"].calls >= 1  # warmed up before it was served
+        assert client.post("/predict/batch", json={"records": records}).json()["model_version"] == "2"
+        assert client.get("/health/ready").json()["model_version"] == "2"
+
+        # A version that fails to load is not swapped in, the current one keeps serving
+        production["version"] = "3"
+        time.sleep(0.1)
+        assert served_version(timeout=0) == "2" and api.serving.status == "ready"
+    assert not api.watcher._thread.is_alive()
+
+
+def test_swap_during_a_batched_request_labels_with_the_model_that_scored(api, monkeypatch):
+    record = _build_records(api, n=1)[0]
+    old = LoadedModel(_LogisticModel(api.FEATURE_ORDER), "1", threshold=1.0)
+    new = LoadedModel(_LogisticModel(api.FEATURE_ORDER), "2", threshold=0.0)
+    # The request picks up version 1, version 2 is swapped in before its micro-batch is scored
+    monkeypatch.setattr(api, "loaded_model", lambda: old)
+    api.serving.current = new
+
+    response = TestClient(api.app).post("/predict", json=record).json()
+    assert response["model_version"] == "2" and response["is_high_risk"] == 1
+    assert old.model.calls == 0 and new.model.calls == 1
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_predict_proba_versions_serve_the_positive_class_probability(api, tmp_path):
+    import mlflow.pyfunc
+    import mlflow.sklearn
+    from sklearn.linear_model import LogisticRegression
+
+    from src.registry.native_scorer import compile_native_scorer
+
+    records = _build_records(api, n=5)
+    X = pd.DataFrame(_build_records(api, n=200, seed=1))
+    sk_model = LogisticRegression().fit(X, (X.sum(axis=1) > 0).astype(int))
+    expected = sk_model.predict_proba(pd.DataFrame(records))[:, 1]
+    mlflow.sklearn.save_model(sk_model, tmp_path / "pyfunc", pyfunc_predict_fn="predict_proba")
+    models = {
+        "native": compile_native_scorer(sk_model, predict_fn="predict_proba"),
+        "pyfunc": mlflow.pyfunc.load_model(str(tmp_path / "pyfunc")),
+    }
+
+    client = TestClient(api.app)
+    for version, model in models.items():
+        api.serving.current = LoadedModel(model, version)
+        np.testing.assert_allclose(api.score_matrix(api.serving.current, pd.DataFrame(records).to_numpy()), expected)
+        response = client.post("/predict/batch", json={"records": records}).json()
+        assert response["model_version"] == version
+        assert response["risk_probability"] == pytest.approx(expected)
+        assert client.post("/predict", json=records[0]).json()["risk_probability"] == pytest.approx(expected[0])
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_tuned_threshold_labels_served_probabilities(api, tracking_uri, monkeypatch):
+    import mlflow
+    from sklearn.linear_model import LogisticRegression
+
+    from scripts.constants import MODEL_NAME
+    from src.registry.model_registry import ModelRegistryManager
+    from src.training.experiment_runner import ExperimentRunner
+
+    X = pd.DataFrame(_build_records(api, n=3000, seed=1))
+    rng = np.random.default_rng(1)
+    y = pd.Series((X.to_numpy() @ np.linspace(-0.5, 0.5, X.shape[1]) + rng.normal(0, 1, len(X)) > 1).astype(int))
+    runner = ExperimentRunner(LogisticRegression(), "LogisticRegression")
+    with mlflow.start_run(run_name="LogisticRegression"):
+        runner.train(X[:2000], y[:2000])
+        runner.evaluate(X[2000:], y[2000:])
+        runner.log_to_mlflow()
+    ModelRegistryManager(MODEL_NAME).promote_to_production()
+
+    default = load_model_version()
+    pyfunc = load_model_version(native=False)
+    monkeypatch.setenv("HIGH_RISK_THRESHOLD", "max_f1")
+    tuned = load_model_version()
+    assert default.native and default.threshold == 0.5 and tuned.threshold != 0.5
+
+    # Native and pyfunc models serve probabilities, not class labels
+    scores = model_loader.score_matrix(default, X.to_numpy())
+    np.testing.assert_allclose(model_loader.score_matrix(pyfunc, X.to_numpy()), scores)
+    assert ((scores > 0) & (scores < 1)).all()
+    low, high = sorted((default.threshold, tuned.threshold))
+    record = X.iloc[int(np.flatnonzero((scores >= low) & (scores < high))[0])].to_dict()
+
+    client = TestClient(api.app)
+    labels = []
+    for loaded in (default, tuned):
+        api.serving.current = loaded
+        labels.append(client.post("/predict", json=record).json()["is_high_risk"])
+    assert labels == ([0, 1] if tuned.threshold < 0.5 else [1, 0])
+
+
+def test_watcher_is_off_for_pinned_versions(api, monkeypatch):
+    monkeypatch.setenv("MODEL_VERSION", "1")
+    assert importlib.reload(api).watcher is None
+
+
+def test_background_mode_import_defers_heavy_modules():
+    code = (
+        "import os, sys; os.environ['MODEL_LOAD_MODE'] = 'background'; import src.api.main; "
+        "print(sorted(m for m in ('mlflow', 'sklearn', 'pandas') if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
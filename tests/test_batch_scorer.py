@@ -0,0 +1,89 @@
+import mlflow
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from scripts.constants import (
+    FEATURE_ORDER,
+    MODEL_NAME,
+    NATIVE_SCORER_ARTIFACT_PATH,
+    NATIVE_TREE_MAX_BATCH_ROWS,
+    Columns,
+)
+from src.api import model_loader
+from src.api.model_loader import load_model_version
+from src.batch_scorer import BatchScorer
+from src.registry.native_scorer import compile_native_scorer
+
+
+def test_batch_scorer_streams_feature_file_through_cached_version(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(0, 1, size=(1000, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+    y = (X.sum(axis=1) + rng.normal(0, 1, len(X)) > 0).astype(int)
+    scorer = compile_native_scorer(LogisticRegression().fit(X, y), predict_fn="predict_proba")
+    monkeypatch.setenv("MODEL_CACHE_DIR", str(tmp_path / "model_cache"))
+    scorer.save(tmp_path / "model_cache" / MODEL_NAME / "3" / NATIVE_SCORER_ARTIFACT_PATH)
+    expected = scorer.predict_proba(X.to_numpy())[:, 1]
+
+    customers = X.assign(**{Columns.CustomerId.value: [f"CustomerId_{i}" for i in range(len(X))], "Unused": 1.0})
+    customers.to_parquet(tmp_path / "customers.parquet")
+    channel_woe = {"ChannelId_1": -0.5, "ChannelId_3": 0.5}
+    labels = np.where(X["MostCommonChannel"] > 0, "ChannelId_3", "ChannelId_1")
+    customers.assign(MostCommonChannel=labels).to_csv(tmp_path / "customers.csv", index=False)
+    expected_from_labels = scorer.predict_proba(
+        X.assign(MostCommonChannel=np.where(labels == "ChannelId_3", 0.5, -0.5))
+    )[:, 1]
+
+    loaded = load_model_version("3")
+    # Several chunks per worker, scored out of process and written back in input order
+    pooled = BatchScorer(loaded, chunksize=150, workers=2, channel_woe=channel_woe)
+    summary = pooled.score_file(tmp_path / "customers.parquet", tmp_path / "scores.parquet")
+    scores = pd.read_parquet(tmp_path / "scores.parquet")
+    assert summary["rows"] == len(X) and summary["model_version"] == "3"
+    assert list(scores.columns) == [Columns.CustomerId.value, "risk_probability", "is_high_risk"]
+    assert scores[Columns.CustomerId.value].tolist() == customers[Columns.CustomerId.value].tolist()
+    np.testing.assert_allclose(scores["risk_probability"], expected)
+    np.testing.assert_array_equal(scores["is_high_risk"], (expected >= 0.5).astype(int))
+
+    inline = BatchScorer(loaded, chunksize=400, channel_woe=channel_woe)
+    inline.score_file(tmp_path / "customers.csv", tmp_path / "scores.csv", id_column=None)
+    scores = pd.read_csv(tmp_path / "scores.csv")
+    assert list(scores.columns) == ["risk_probability", "is_high_risk"]
+    np.testing.assert_allclose(scores["risk_probability"], expected_from_labels)
+    assert sorted(path.name for path in tmp_path.iterdir() if path.name.startswith(".")) == []
+
+    customers.iloc[:0].to_parquet(tmp_path / "no_customers.parquet")
+    for output in ("empty.csv", "empty.parquet"):
+        assert inline.score_file(tmp_path / "no_customers.parquet", tmp_path / output)["rows"] == 0
+        read = pd.read_parquet if output.endswith(".parquet") else pd.read_csv
+        empty = read(tmp_path / output)
+        assert empty.empty and list(empty.columns) == [Columns.CustomerId.value, "risk_probability", "is_high_risk"]
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_batch_scorer_scores_tree_ensemble_chunks_with_sklearn(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(0, 1, size=(600, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+    y = (X.sum(axis=1) > 0).astype(int)
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    version_dir = tmp_path / "model_cache" / MODEL_NAME / "4"
+    compile_native_scorer(forest, predict_fn="predict_proba").save(version_dir / NATIVE_SCORER_ARTIFACT_PATH)
+    monkeypatch.setenv("MODEL_CACHE_DIR", str(tmp_path / "model_cache"))
+    loaded = load_model_version("4")
+    loaded.threshold = 0.7
+
+    # Small chunks keep the native tree walk, a version without a pyfunc model keeps it too
+    assert BatchScorer(loaded, chunksize=NATIVE_TREE_MAX_BATCH_ROWS, channel_woe={}).loaded is loaded
+    assert BatchScorer(loaded, chunksize=500, channel_woe={}).loaded is loaded
+
+    mlflow.sklearn.save_model(forest, version_dir / model_loader.PYFUNC_DIR_NAME, pyfunc_predict_fn="predict_proba")
+    scorer = BatchScorer(loaded, chunksize=500, channel_woe={})
+    assert not scorer.loaded.native and scorer.loaded.version == "4" and scorer.loaded.threshold == 0.7
+
+    X.assign(**{Columns.CustomerId.value: range(len(X))}).to_parquet(tmp_path / "customers.parquet")
+    scorer.score_file(tmp_path / "customers.parquet", tmp_path / "scores.csv")
+    scores = pd.read_csv(tmp_path / "scores.csv")
+    np.testing.assert_allclose(scores["risk_probability"], forest.predict_proba(X)[:, 1])
+    np.testing.assert_array_equal(scores["is_high_risk"], (forest.predict_proba(X)[:, 1] >= 0.7).astype(int))
@@ -58,3 +58,116 @@ def test_save_to_csv_empty_dataframe_raises(data_manager):
 
     with pytest.raises(ValueError):
         data_manager.save_to_csv(empty_df, file_name="empty_file.csv")
+
+
+def test_load_csv_chunks(data_manager):
+    """Test streaming a CSV file in chunks."""
+    chunks = list(data_manager.load_csv_chunks(load_clean=False, chunksize=1))
+
+    assert len(chunks) == 2
+    assert pd.concat(chunks).reset_index(drop=True).equals(data_manager.load_csv(load_clean=False))
+
+
+@pytest.fixture
+def transactions_df():
+    """Create a small transactions DataFrame with categorical and tz-aware columns."""
+    return pd.DataFrame(
+        {
+            "CustomerId": pd.Categorical(["CustomerId_1", "CustomerId_2", "CustomerId_1", "CustomerId_3"]),
+            "Amount": [1000.0, -50.0, 20.5, 300.0],
+            "TransactionStartTime": pd.to_datetime(
+                ["2018-11-15T02:18:49Z", "2018-12-01T10:00:00Z", "2019-01-03T08:00:00Z", "2019-02-13T09:54:09Z"],
+                utc=True,
+            ),
+        }
+    )
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather"])
+def test_columnar_round_trip_preserves_dtypes(data_manager, transactions_df, file_format):
+    """Test that columnar formats round-trip dtypes, including categoricals."""
+    path = data_manager.save(transactions_df, file_name="features.csv", file_format=file_format)
+    loaded_df = data_manager.load(load_clean=True, file_name="features.csv", file_format=file_format)
+
+    assert path.suffix == f".{file_format}"
+    pd.testing.assert_frame_equal(loaded_df, transactions_df)
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet", "feather"])
+def test_load_projects_columns_and_filters_time_range(data_manager, transactions_df, file_format):
+    """Test column projection and the TransactionStartTime range filter."""
+    data_manager.save(transactions_df, file_name="features.csv", file_format=file_format)
+
+    loaded_df = data_manager.load(
+        load_clean=True,
+        file_name="features.csv",
+        file_format=file_format,
+        columns=["Amount"],
+        time_range=("2018-12-01", "2019-02-01"),
+    )
+
+    assert list(loaded_df.columns) == ["Amount"]
+    assert loaded_df["Amount"].tolist() == [-50.0, 20.5]
+
+
+def test_load_csv_stage_drops_legacy_index_column(data_manager, transactions_df):
+    """Test that csv files written with an index do not bring back an Unnamed: 0 column."""
+    data_manager.save_to_csv(transactions_df, file_name="legacy.csv")
+
+    loaded_df = data_manager.load(load_clean=True, file_name="legacy.csv")
+
+    assert "Unnamed: 0" not in loaded_df.columns
+
+
+def test_load_chunks_parquet(data_manager, transactions_df):
+    """Test streaming a parquet file in chunks."""
+    data_manager.save(transactions_df, file_name="features.parquet")
+
+    chunks = list(data_manager.load_chunks(load_clean=True, file_name="features.parquet", chunksize=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+
+
+def test_load_raw_csv_applies_schema(data_manager, tmp_path):
+    """Test that raw data is loaded with the compact RAW_SCHEMA types."""
+    (tmp_path / "raw" / "transactions.csv").write_text(
+        "TransactionId,CustomerId,Amount,Value,TransactionStartTime,FraudResult\n"
+        "TransactionId_1,CustomerId_1,1000.0,1000,2018-11-15T02:18:49Z,0\n"
+        "TransactionId_2,CustomerId_2,-20.0,20,2018-11-15T02:19:08Z,1\n"
+    )
+
+    df = data_manager.load_csv(load_clean=False, file_name="transactions.csv")
+    untyped_df = data_manager.load_csv(load_clean=False, file_name="transactions.csv", use_schema=False)
+
+    assert isinstance(df["CustomerId"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["TransactionStartTime"].dtype, pd.DatetimeTZDtype)
+    assert df["Amount"].dtype == "float32"
+    assert df["FraudResult"].dtype == "int8"
+    assert untyped_df["CustomerId"].dtype == object
+
+
+@pytest.mark.parametrize("bad_time", [False, True])
+def test_read_csv_typed_matches_chunked_schema_load(tmp_path, bad_time):
+    """Test typed reads across several blocks, and the C reader fallback on unparseable timestamps."""
+    from src.schema import apply_schema, read_csv_typed
+
+    n = 2000
+    df = pd.DataFrame(
+        {
+            "TransactionId": [f"TransactionId_{i}" for i in range(n)],
+            "CustomerId": [f"CustomerId_{(i * 7919) % 301}" for i in range(n)],
+            "ChannelId": [None if i % 11 == 0 else f"ChannelId_{i % 5}" for i in range(n)],
+            "Amount": [i * 0.5 for i in range(n)],
+            "TransactionStartTime": pd.date_range("2018-11-15", periods=n, freq="min").strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+    )
+    if bad_time:
+        df.loc[n - 1, "TransactionStartTime"] = "not-a-date"
+    path = tmp_path / "transactions.csv"
+    df.to_csv(path, index=False)
+
+    typed_df = read_csv_typed(path, block_size=4096)  # many blocks with different categories each
+    expected_df = apply_schema(pd.read_csv(path))
+
+    pd.testing.assert_frame_equal(typed_df, expected_df)
+    assert typed_df["TransactionStartTime"].isna().sum() == int(bad_time)
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+import pytest
 
 from src.woe_transformer import WoeTransformer
 from scripts.constants import TARGET_COL, WOE_CANDIDATE_COLS
@@ -122,3 +123,140 @@ def test_target_column_integrity():
 
     assert TARGET_COL in transformed_df.columns
     assert set(transformed_df[TARGET_COL].unique()).issubset({0, 1})
+
+
+def _build_large_sample_df(n: int = 600, seed: int = 0) -> pd.DataFrame:
+    """
+    Helper function to build a bigger dataframe with missing values, repeated values
+    falling on the bin edges and low volume categories.
+    """
+    rng = np.random.default_rng(seed)
+    df = _build_sample_df(10).iloc[:0].copy()
+    for col in WOE_CANDIDATE_COLS[:-2]:
+        df[col] = rng.choice([0.0, 1.0, 2.0, 5.0, 10.0, 50.0, np.nan], size=n) * rng.choice([1, 1, 3.5], size=n)
+    df["MostCommonProductCategory"] = rng.choice(
+        ["airtime", "financial_services", "transport", "tv", "movies", None],
+        size=n,
+        p=[0.4, 0.4, 0.04, 0.1, 0.04, 0.02],
+    )
+    df["MostCommonChannel"] = rng.choice(["ChannelId_1", "ChannelId_2", "ChannelId_3", "ChannelId_5"], size=n)
+    df[TARGET_COL] = (rng.random(n) < 0.3).astype(int)
+    return df
+
+
+def _reference_woe(transformer: WoeTransformer, df: pd.DataFrame) -> pd.DataFrame:
+    """Label based binning and dictionary mapping, as the transformer originally did it."""
+    woe_df = df.copy()
+    for col in WOE_CANDIDATE_COLS:
+        if col in transformer.numeric_bin_edges:
+            edges = transformer.numeric_bin_edges[col]
+            labels = [f"bin_{i}" for i in range(len(edges) - 1)]
+            binned = pd.cut(df[col], bins=edges, labels=labels, include_lowest=True).astype("object").fillna("MISSING")
+        else:
+            low_volume = transformer.category_merge_map[col]
+            binned = df[col].apply(lambda x: "OTHER_LOW_VOLUME" if x in low_volume else x)
+        woe_df[col] = binned.map(transformer.woe_maps[col])
+    return woe_df
+
+
+# =====================================================
+# TEST 6: Integer-coded binning matches label binning
+# =====================================================
+def test_woe_matrix_matches_label_binning():
+    df = _build_large_sample_df()
+    transformer = WoeTransformer(df)
+    transformer.fit_transform()
+    transformer.get_iv_table()
+
+    expected = _reference_woe(transformer, df)
+    pd.testing.assert_frame_equal(transformer.transform_to_woe(), expected)
+
+    matrix = transformer.transform_to_woe_matrix()
+    assert matrix.flags["C_CONTIGUOUS"] and matrix.dtype == np.float64
+    np.testing.assert_array_equal(matrix, expected[WOE_CANDIDATE_COLS].to_numpy(dtype=float))
+
+    # New data, including a category never seen during fit, is encoded with the fitted bins
+    new_df = _build_large_sample_df(n=200, seed=1)
+    new_df.loc[:4, "MostCommonChannel"] = "ChannelId_9"
+    np.testing.assert_array_equal(
+        transformer.transform_to_woe_matrix(new_df),
+        _reference_woe(transformer, new_df)[WOE_CANDIDATE_COLS].to_numpy(dtype=float),
+    )
+
+
+def _reference_iv(transformed_df: pd.DataFrame, eps: float):
+    """Per-feature groupby IV computation, as get_iv_table originally did it."""
+    feature_cols = [c for c in transformed_df.columns if c != TARGET_COL]
+    total_good = (transformed_df[TARGET_COL] == 0).sum()
+    total_bad = (transformed_df[TARGET_COL] == 1).sum()
+    iv_results, woe_maps = [], {}
+    for col in feature_cols:
+        grouped = transformed_df.groupby(col)[TARGET_COL].agg(total="count", bad="sum")
+        grouped["good"] = grouped["total"] - grouped["bad"]
+        dist_good = (grouped["good"] + eps) / (total_good + eps * len(grouped))
+        dist_bad = (grouped["bad"] + eps) / (total_bad + eps * len(grouped))
+        woe = np.log(dist_good / dist_bad)
+        woe_maps[col] = woe.to_dict()
+        iv_results.append({"feature": col, "iv": ((dist_good - dist_bad) * woe).sum()})
+    return pd.DataFrame(iv_results).sort_values("iv", ascending=False), woe_maps
+
+
+# =====================================================
+# TEST 7: Single-pass IV table matches per-feature groupbys
+# =====================================================
+def test_iv_table_matches_per_feature_groupby():
+    df = _build_large_sample_df()
+    df["Segment"] = np.random.default_rng(3).choice(["a", "b", None], size=len(df))  # not binned
+    df.loc[:2, TARGET_COL] = np.nan
+
+    transformer = WoeTransformer(df)
+    transformer.fit_transform()
+    iv_df, woe_maps = transformer.compute_iv_and_woe()
+    expected_iv_df, expected_woe_maps = _reference_iv(transformer.transformed_df, transformer.EPS)
+
+    pd.testing.assert_frame_equal(iv_df, expected_iv_df)
+    assert woe_maps.keys() == expected_woe_maps.keys()
+    for col, expected_map in expected_woe_maps.items():
+        assert woe_maps[col] == pytest.approx(expected_map, rel=1e-12)
+
+    pd.testing.assert_frame_equal(transformer.get_iv_table(), expected_iv_df)
+    assert transformer.woe_maps == woe_maps
+
+
+# =====================================================
+# TEST 8: IV sweep matches refitting every configuration
+# =====================================================
+def test_sweep_iv_matches_refit_iv_tables():
+    df = _build_large_sample_df()
+    df.loc[:2, TARGET_COL] = np.nan
+    bins_grid, threshold_grid = [2, 3, 5, 10, 15], [0, 10, 30, 80]
+
+    surface = WoeTransformer(df).sweep_iv(bins_grid, threshold_grid)
+    assert len(surface) == 9 * len(bins_grid) * 2 + 2 * len(threshold_grid)
+
+    for bins, threshold in zip(bins_grid, threshold_grid + [30]):
+        transformer = WoeTransformer(df)
+        transformer.bins, transformer.category_count_min_threashold = bins, threshold
+        transformer.fit_transform()
+        expected_iv = transformer.get_iv_table().set_index("feature")["iv"]
+
+        numeric = surface[(surface["bins"] == bins) & ~surface["monotonic"]].set_index("feature")["iv"]
+        categorical = surface[surface["category_count_min_threashold"] == threshold].set_index("feature")["iv"]
+        swept_iv = pd.concat([numeric, categorical])
+        np.testing.assert_allclose(swept_iv, expected_iv[swept_iv.index], rtol=1e-12)
+
+    merged = surface[surface["monotonic"]].set_index(["feature", "bins"])
+    unmerged = surface[surface["bins"].notna() & ~surface["monotonic"]].set_index(["feature", "bins"])
+    assert (merged["n_bins"] <= unmerged["n_bins"]).all()
+
+
+def test_monotonic_merge_gives_monotonic_bad_rates():
+    from src.woe_transformer import _monotonic_merge
+
+    rng = np.random.default_rng(0)
+    good, bad = rng.integers(1, 50, size=12), rng.integers(0, 20, size=12)
+    for increasing in (True, False):
+        merged_good, merged_bad = _monotonic_merge(good, bad, increasing)
+        rates = merged_bad / (merged_good + merged_bad)
+        assert (np.diff(rates) >= 0).all() if increasing else (np.diff(rates) <= 0).all()
+        assert merged_good.sum() == good.sum() and merged_bad.sum() == bad.sum()
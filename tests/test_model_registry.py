@@ -0,0 +1,184 @@
+import json
+
+import mlflow
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from scripts.constants import (
+    MODEL_NAME,
+    NATIVE_SCORER_ARTIFACT_PATH,
+    NATIVE_SCORER_TOLERANCE,
+    THRESHOLD_TABLE_ARTIFACT_PATH,
+)
+from src.api import model_loader
+from src.api.model_loader import load_model, load_model_version
+from src.registry import model_registry
+from src.registry.model_registry import ModelRegistryManager
+from src.registry.native_scorer import NativeScorer, check_rows, compile_native_scorer, max_score_difference
+from src.training.experiment_runner import ExperimentRunner
+from tests.conftest import build_woe_df
+
+
+@pytest.mark.parametrize(
+    "sk_model",
+    [
+        LogisticRegression(),
+        DecisionTreeClassifier(max_depth=6, random_state=0),
+        RandomForestClassifier(n_estimators=20, random_state=0),
+        ExtraTreesClassifier(n_estimators=10, random_state=0),
+    ],
+)
+def test_native_scorer_matches_sklearn_model(sk_model, tmp_path):
+    X, y = build_woe_df()
+    if not isinstance(sk_model, LogisticRegression):
+        X.iloc[::17, 2] = np.nan  # trees learn where missing values go
+    sk_model.fit(X, y)
+
+    scorer = compile_native_scorer(sk_model)
+    scorer.save(tmp_path)
+    loaded = NativeScorer.load(tmp_path)
+    rows = check_rows(loaded)
+    if not isinstance(sk_model, LogisticRegression):
+        rows[::13, 2] = np.nan
+
+    assert max_score_difference(loaded, sk_model, rows) <= NATIVE_SCORER_TOLERANCE
+    np.testing.assert_array_equal(loaded.predict(rows), sk_model.predict(pd.DataFrame(rows, columns=X.columns)))
+    np.testing.assert_array_equal(
+        NativeScorer.load(tmp_path, mmap_mode="r").predict_proba(rows), loaded.predict_proba(rows)
+    )
+    # Frames are scored by column name, whatever their column order
+    np.testing.assert_array_equal(loaded.predict(X[X.columns[::-1]]), sk_model.predict(X))
+
+
+def test_unsupported_models_are_not_compiled():
+    X, y = build_woe_df(n=300)
+    assert compile_native_scorer(GradientBoostingClassifier(n_estimators=5).fit(X, y)) is None
+    assert compile_native_scorer(LogisticRegression().fit(X, y % 2 + (X.iloc[:, 0] > 1))) is None  # 3 classes
+    assert compile_native_scorer(LogisticRegression().fit(X, y), predict_fn="predict_log_proba") is None
+
+
+def _register_and_promote() -> tuple:
+    """
+    Helper function to log a logistic regression and a gradient boosting model through ExperimentRunner
+    and promote the logistic regression, which has a native scorer.
+    """
+    X, y = build_woe_df()
+    for model_name, model in (
+        ("LogisticRegression", LogisticRegression()),
+        ("GradientBoosting", GradientBoostingClassifier()),
+    ):
+        runner = ExperimentRunner(model, model_name=model_name)
+        with mlflow.start_run(run_name=model_name):
+            runner.train(X[:1500], y[:1500])
+            runner.evaluate(X[1500:], y[1500:])
+            runner.metrics["roc_auc"] = 1.0 if model_name == "LogisticRegression" else 0.5
+            runner.log_to_mlflow()
+
+    manager = ModelRegistryManager(model_name=MODEL_NAME)
+    version, _ = manager.promote_to_production()
+    gradient_boosting = max(manager.get_all_versions(), key=lambda mv: int(mv.version))
+    return manager, str(version), gradient_boosting, X
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_promotion_exports_native_scorer_loaded_by_the_api(tracking_uri):
+    manager, version, gradient_boosting, X = _register_and_promote()
+    served = load_model()
+    pyfunc_model = mlflow.pyfunc.load_model(f"models:/{MODEL_NAME}/{version}")
+
+    assert isinstance(served, NativeScorer) and served.kind == "linear"
+    np.testing.assert_allclose(served.predict(X), pyfunc_model.predict(X), rtol=0, atol=NATIVE_SCORER_TOLERANCE)
+    assert not manager.export_native_scorer(gradient_boosting)
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_model_versions_are_cached_locally(tracking_uri, tmp_path, monkeypatch):
+    manager, version, gradient_boosting, X = _register_and_promote()
+    cache = tmp_path / "model_cache" / MODEL_NAME
+
+    first = load_model_version()
+    cached = load_model_version()
+    assert first.native and "download" in first.timings
+    assert isinstance(first.model.arrays["coef"], np.memmap)  # shared between api workers through the page cache
+    assert cached.version == version and "download" not in cached.timings
+    assert (cache / version / NATIVE_SCORER_ARTIFACT_PATH).is_dir()
+    threshold_table = json.loads((cache / version / THRESHOLD_TABLE_ARTIFACT_PATH).read_text())
+    assert first.threshold == threshold_table["default"]["threshold"] == 0.5  # the tuned rows are opt-in
+    with monkeypatch.context() as patch:
+        patch.setenv("HIGH_RISK_THRESHOLD", "max_f1")
+        assert load_model_version().threshold == threshold_table["max_f1"]["threshold"]
+
+    def registry_down(cache_dir=None):
+        raise ConnectionError("registry unreachable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(model_loader, "resolve_production_version", registry_down)
+        assert load_model_version().version == version
+        patch.setenv("MODEL_VERSION", version)
+        assert load_model_version().timings.keys() == {"load", "total"}  # pinned versions skip the registry
+
+    # Versions without a native scorer are cached as pyfunc models
+    manager.client.transition_model_version_stage(MODEL_NAME, gradient_boosting.version, "Production")
+    pyfunc_loaded = load_model_version()
+    pyfunc_model = mlflow.pyfunc.load_model(f"models:/{MODEL_NAME}/{gradient_boosting.version}")
+    assert pyfunc_loaded.version == str(gradient_boosting.version) and not pyfunc_loaded.native
+    assert (cache / pyfunc_loaded.version / "pyfunc" / "MLmodel").is_file()
+    np.testing.assert_array_equal(pyfunc_loaded.model.predict(X), pyfunc_model.predict(X))
+
+    # A registry that cannot be reached falls back to the last version seen in Production, not the highest cached one
+    manager.client.transition_model_version_stage(MODEL_NAME, version, "Production", archive_existing_versions=True)
+    assert load_model_version().version == version
+    assert json.loads((cache / model_loader.PRODUCTION_VERSION_FILE_NAME).read_text()) == {"version": version}
+    with monkeypatch.context() as patch:
+        warnings = []
+        patch.setattr(model_loader.logger, "warning", lambda message, extra: warnings.append(extra))
+        patch.setattr(model_loader, "resolve_production_version", registry_down)
+        assert load_model_version().version == version < pyfunc_loaded.version
+        assert warnings[-1]["model_version"] == version and warnings[-1]["reason"] == "last known Production"
+
+        (cache / model_loader.PRODUCTION_VERSION_FILE_NAME).unlink()
+        assert load_model_version().version == pyfunc_loaded.version
+
+        def registry_error(cache_dir=None):
+            raise RuntimeError(f"{MODEL_NAME} has no Production version")
+
+        patch.setattr(model_loader, "resolve_production_version", registry_error)
+        with pytest.raises(RuntimeError):
+            load_model_version()  # only an unreachable registry falls back to the cache
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_registry_metrics_are_fetched_in_bulk_and_cached(tracking_uri, monkeypatch):
+    client = mlflow.tracking.MlflowClient()
+    client.create_registered_model(MODEL_NAME)
+    experiment_id = mlflow.get_experiment_by_name(MODEL_NAME).experiment_id
+    for roc_auc in (0.61, 0.74, 0.69, 0.8, 0.72, 0.55, 0.66, 0.7, 0.62, 0.71):
+        run = client.create_run(experiment_id)
+        client.log_metric(run.info.run_id, "roc_auc", roc_auc)
+        client.create_model_version(MODEL_NAME, f"runs:/{run.info.run_id}/model", run_id=run.info.run_id)
+    client.transition_model_version_stage(MODEL_NAME, "2", "Production")
+
+    monkeypatch.setattr(model_registry, "RUN_ID_BATCH_SIZE", 4)
+    manager = ModelRegistryManager(MODEL_NAME)
+    assert (manager.tracking_uri, manager.registry_uri) == (tracking_uri, mlflow.get_registry_uri())
+    calls = []
+    for name in ("search_model_versions", "search_runs", "get_run"):
+        method = getattr(manager.client, name)
+        monkeypatch.setattr(manager.client, name, lambda *a, _m=method, _n=name, **k: calls.append(_n) or _m(*a, **k))
+    monkeypatch.setattr(manager, "export_native_scorer", lambda model_version: False)
+
+    best, score = manager.get_best_version_by_metric()
+    assert (str(best.version), score) == ("4", 0.8)
+    assert calls == ["search_model_versions"] + ["search_runs"] * 3  # 10 runs in batches of 4, no get_run
+    assert manager.get_best_version_by_metric() == (best, score) and len(calls) == 4  # served from the cache
+    assert len(ModelRegistryManager(MODEL_NAME).get_all_versions()) == 10 and len(calls) == 4
+
+    calls.clear()
+    assert manager.promote_to_production() == (best.version, 0.8)
+    assert calls.count("search_model_versions") == 1  # a fresh listing reused to find the versions to archive
+    stages = {str(mv.version): mv.current_stage for mv in manager.get_all_versions()}
+    assert stages["4"] == "Production" and stages["2"] == "Archived"
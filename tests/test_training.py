@@ -0,0 +1,158 @@
+import mlflow
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score, roc_curve
+
+from scripts.constants import FEATURE_ORDER, MODEL_NAME, READY_TO_MODEL_DATA_FILE_NAME
+from src import data_manager
+from src.api.model_loader import select_threshold
+from src.registry.model_registry import ModelRegistryManager
+from src.training.evaluation import evaluate_scores
+from src.training.experiment_runner import ExperimentRunner
+from src.training.hyperparameter_search import SuccessiveHalvingSearch
+from src.training.train import TrainModels, _holdout_mask
+from tests.conftest import build_woe_df
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_run_experiments_trains_in_parallel_and_logs_each_run(tracking_uri):
+    X, y = build_woe_df()
+    trainer = TrainModels(X.assign(target=y), target_col="target")
+    trainer.split_data()
+    sequential = trainer.run_experiment("sequential", ExperimentRunner(LogisticRegression(), "LogisticRegression"))
+
+    runners = {
+        "LogisticRegression_Baseline": ExperimentRunner(LogisticRegression(), "LogisticRegression"),
+        "RandomForest_Baseline": ExperimentRunner(RandomForestClassifier(n_estimators=20, random_state=0), "RF"),
+    }
+    results = trainer.run_experiments(runners, max_workers=2)
+
+    assert list(results) == list(runners)
+    assert results["LogisticRegression_Baseline"] == pytest.approx(sequential)
+    assert runners["RandomForest_Baseline"].model.n_estimators == 20 and hasattr(
+        runners["RandomForest_Baseline"].model, "estimators_"
+    )
+    runs = mlflow.search_runs(experiment_names=[MODEL_NAME])
+    assert set(runs["tags.mlflow.runName"]) == {"sequential", *runners}
+    assert runs["metrics.train_seconds"].notna().sum() == 2
+    assert sorted(int(mv.version) for mv in ModelRegistryManager(MODEL_NAME).get_all_versions()) == [1, 2, 3]
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_successive_halving_prunes_candidates_and_logs_rungs(tracking_uri):
+    X, y = build_woe_df(n=3000)
+    by_samples = SuccessiveHalvingSearch(
+        LogisticRegression(),
+        {"C": [0.001, 0.01, 0.1, 1, 10, 100], "penalty": ["l1", "l2"], "solver": ["liblinear"]},
+        n_candidates=9,
+        factor=3,
+        random_state=0,
+    ).fit(X, y)
+    assert [rung["n_candidates"] for rung in by_samples.rungs_] == [9, 3]
+    assert [rung["n_resources"] for rung in by_samples.rungs_] == [666, 2000]
+    assert by_samples.n_fits_ == (9 + 3) * 3 and by_samples.best_score_ > 0.8
+    assert by_samples.best_params_ in [c["params"] for c in by_samples.rungs_[0]["candidates"]]
+
+    # n_estimators budget: forests grow between rungs instead of being refitted
+    search = SuccessiveHalvingSearch(
+        RandomForestClassifier(random_state=0),
+        {"max_depth": [2, 4, 8, None], "min_samples_leaf": [1, 10]},
+        n_candidates=8,
+        factor=2,
+        resource="n_estimators",
+        max_resources=40,
+        random_state=0,
+    )
+    runner = ExperimentRunner(RandomForestClassifier(), "RandomForest", param_search=search)
+    with mlflow.start_run(run_name="RandomForest_Halving") as parent:
+        runner.train(X[:2400], y[:2400])
+        runner.evaluate(X[2400:], y[2400:])
+        runner.log_to_mlflow()
+    assert [rung["n_resources"] for rung in search.rungs_] == [10, 20, 40]
+    assert runner.model.n_estimators == 40 and not runner.model.warm_start
+
+    runs = mlflow.search_runs(experiment_names=[MODEL_NAME])
+    rungs = runs[runs["tags.mlflow.parentRunId"] == parent.info.run_id]
+    assert sorted(rungs["tags.mlflow.runName"]) == [f"RandomForest_rung_{i}" for i in range(3)]
+    assert runs.loc[runs["run_id"] == parent.info.run_id, "metrics.search_fits"].item() == (8 + 4 + 2) * 3
+
+
+def test_evaluation_engine_matches_sklearn_metrics_with_tied_scores():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 5000)
+    scores = np.clip(y * 0.2 + rng.normal(0.4, 0.2, len(y)), 0, 1).round(2)  # many tied scores, some exactly 0.5
+
+    metrics, table = evaluate_scores(y, scores)
+    labels = scores >= 0.5
+    fpr, tpr, _ = roc_curve(y, scores)
+    assert metrics["roc_auc"] == pytest.approx(roc_auc_score(y, scores))
+    assert metrics["gini"] == pytest.approx(2 * roc_auc_score(y, scores) - 1)
+    assert metrics["ks"] == pytest.approx((tpr - fpr).max())
+    assert metrics["accuracy"] == pytest.approx(accuracy_score(y, labels))
+    assert metrics["precision"] == pytest.approx(precision_score(y, labels))
+    assert metrics["recall"] == pytest.approx(recall_score(y, labels))
+    assert metrics["f1"] == pytest.approx(f1_score(y, labels))
+
+    assert list(table.index) == ["default", "max_f1", "max_ks"]
+    best_f1 = max(f1_score(y, scores >= t) for t in np.unique(scores))
+    assert table.loc["max_f1", "f1"] == pytest.approx(best_f1)
+    assert table.loc["max_f1", "f1"] == pytest.approx(f1_score(y, scores >= table.loc["max_f1", "threshold"]))
+    assert select_threshold(table.to_dict(orient="index"), "max_ks") == table.loc["max_ks", "threshold"]
+    assert select_threshold(None, "max_f1") == 0.5 and select_threshold({}, "0.3") == 0.3
+
+
+def test_evaluate_runs_inference_once():
+    X, y = build_woe_df()
+    model = LogisticRegression().fit(X, y)
+    runner = ExperimentRunner(model, "LogisticRegression")
+    calls = []
+    model.predict = lambda X: calls.append("predict")
+    predict_proba = model.predict_proba
+    model.predict_proba = lambda X: calls.append("predict_proba") or predict_proba(X)
+
+    metrics = runner.evaluate(X, y)
+    assert calls == ["predict_proba"]
+    assert metrics["roc_auc"] == pytest.approx(roc_auc_score(y, predict_proba(X)[:, 1]))
+    assert runner.threshold_table.loc["default", "threshold"] == 0.5
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_streaming_experiment_trains_from_chunks_and_logs_like_in_memory(tracking_uri, tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(0, 1, size=(5000, len(FEATURE_ORDER))), columns=FEATURE_ORDER)
+    y = (X.to_numpy() @ np.linspace(-1, 1, len(FEATURE_ORDER)) + rng.normal(0, 1, len(X)) > 1).astype(int)
+    X.assign(is_high_risk=y, CustomerId=[f"CustomerId_{i}" for i in range(len(X))]).to_parquet(
+        tmp_path / "final.parquet"
+    )
+
+    # The hold-out is stratified and does not depend on how the file is chunked
+    whole = _holdout_mask(y, {}, 0.2)
+    seen = {}
+    chunked = np.concatenate([_holdout_mask(y[i : i + 700], seen, 0.2) for i in range(0, len(y), 700)])
+    np.testing.assert_array_equal(whole, chunked)
+    assert [int(whole[y == label].sum()) for label in (0, 1)] == [int((y == label).sum() * 0.2) for label in (0, 1)]
+
+    trainer = TrainModels(None, target_col="is_high_risk")
+    runner = ExperimentRunner(SGDClassifier(loss="log_loss", random_state=0), "SGDLogisticRegression")
+    metrics = trainer.run_streaming_experiment(
+        "SGD_Streaming", runner, file_name=tmp_path / "final.parquet", chunksize=700, n_epochs=3
+    )
+    in_memory = TrainModels(X.assign(is_high_risk=y), target_col="is_high_risk")
+    in_memory.split_data()
+    in_memory.run_experiment("SGD_InMemory", ExperimentRunner(SGDClassifier(loss="log_loss"), "SGDLogisticRegression"))
+
+    assert metrics["roc_auc"] > 0.9 and runner.threshold_table is not None
+    runs = mlflow.search_runs(experiment_names=[MODEL_NAME]).set_index("tags.mlflow.runName")
+    logged = runs.columns[runs.loc["SGD_Streaming"].notna()]
+    assert set(logged) == set(runs.columns[runs.loc["SGD_InMemory"].notna()])
+    assert runs.loc["SGD_Streaming", "metrics.roc_auc"] == pytest.approx(metrics["roc_auc"])
+
+    # By default the model-ready data is read as the csv the notebooks write with DataManager.save_to_csv
+    monkeypatch.setattr(data_manager, "CLEAN_DATA_DIR", str(tmp_path))
+    X.assign(is_high_risk=y).to_csv(tmp_path / READY_TO_MODEL_DATA_FILE_NAME)
+    runner = ExperimentRunner(SGDClassifier(loss="log_loss", random_state=0), "SGDLogisticRegression")
+    from_csv = trainer.run_streaming_experiment("SGD_Streaming_Csv", runner, chunksize=700, n_epochs=3)
+    assert from_csv["roc_auc"] == pytest.approx(metrics["roc_auc"])